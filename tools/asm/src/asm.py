@@ -1,43 +1,28 @@
 import argparse
 import binutils
+import cycles
 import data
+import fileutils
 import i18n
+import obj_cache
 import obj_file
 import relocation_table
+import state_file
 import symbol_table
 import symbols
 
+import collections
+import concurrent.futures
+import contextlib
+import hashlib
+import io
+import itertools
+import mmap
 import os
 import re
-import shlex
 import sys
 
-total_errors_count = 0
-
-current_file_name = None
-current_line_num = 0
-current_line_str = None
-current_symbol_name = None
-current_proc_name = None
-
-valid_directives = ['base', 'proc', 'endproc', 'end']
-
-valid_mnemonics = ['nop', 'hlt', 'rst', 'inchl', 'dechl', 'pushhl', 'pophl', 'pushf', 'popf',
-                   'mov',
-                   'loda',
-                   'stoa',
-                   'push', 'pop',
-                   'add', 'sub', 'cmp', 'adc', 'sbb', 'and', 'or', 'xor',
-                   'jmp', 'jc', 'jnc', 'jz', 'jnz', 'ja', 'jna',
-                   'jb', 'jnb', 'je', 'jne', 'jae', 'jnae', 'jbe', 'jnbe',
-                   'call', 'cc', 'cnc', 'cz', 'cnz', 'ca', 'cna',
-                   'cb', 'cnb', 'ce', 'cne', 'cae', 'cnae', 'cbe', 'cnbe',
-                   'ret', 'rc', 'rnc', 'rz', 'rnz', 'ra', 'rna',
-                   'rb', 'rnb', 're', 'rne', 'rae', 'rnae', 'rbe', 'rnbe',
-                   'iret',
-                   'int',
-                   'db', 'dw',
-                   'inc', 'dec', 'not', 'shl', 'shr']
+valid_directives = ['base', 'proc', 'endproc', 'end', 'incbin', 'include']
 
 valid_registers = {
     'a': {'size': 8, 'opcode': 0b000},
@@ -55,8 +40,13 @@ valid_operands = list(valid_registers.keys()) + ['m']
 
 valid_name_regex = re.compile('[@_a-z][_a-z0-9]{,254}', re.IGNORECASE)
 
-# using the .base directive, the assembler allows setting the link base which is then stored in the object file header
-link_base = None
+# the end of a procedure, to find the text of a procedure before assembling it (see read_block)
+endproc_regex = re.compile(r'[ \t\r\n]*\.endproc[ \t\r\n]*(;|$)', re.IGNORECASE)
+
+# a line is split into tokens, each token being a word (which may contain quotes after its first character), a string
+# (in quotes) or any other single character; whitespace and comments (starting with a semicolon) are skipped
+token_regex = re.compile(r'''[ \t\r\n]+|;[^\n]*|(?P<word>[A-Za-z0-9_.:@][A-Za-z0-9_.:@'"]*)|(?P<str>'[^']*'|"[^"]*")'''
+                         r'''|(?P<quote>['"])|(?P<char>.)''', re.DOTALL)
 
 
 def is_valid_directive(s):
@@ -64,7 +54,7 @@ def is_valid_directive(s):
 
 
 def is_valid_mnemonic(s):
-    return s in valid_mnemonics
+    return s in instruction_forms_by_mnemonic.keys() or s in ['db', 'dw']
 
 
 def is_valid_register(s):
@@ -95,7 +85,7 @@ def is_valid_name(s):
 
 def is_valid_addr(s):
     # a symbol name is always a valid address (the linker will determine the address during relocation)
-    return is_valid_name(s) or (data.is_valid(s) and not data.is_valid_chr(s) and not data.is_valid_str(s))
+    return is_valid_name(s) or data.get_literal(s)['kind'] in data.num_kinds
 
 
 def get_addr_value(addr):
@@ -116,7 +106,11 @@ def get_addr_size(addr):
         return None
 
 
-def validate_operands_count(operands, count_valid, errors=None):
+def validate_operands_count(operands, count_valid, errors=None, count_max=None):
+    # count_max allows optional operands
+    if count_max is None:
+        count_max = count_valid
+
     if len(operands) < count_valid:
         if errors is not None:
             errors.append({
@@ -124,11 +118,11 @@ def validate_operands_count(operands, count_valid, errors=None):
                 'info': [len(operands), count_valid]
             })
         return False
-    elif len(operands) > count_valid:
+    elif len(operands) > count_max:
         if errors is not None:
             errors.append({
                 'name': 'TOO_MANY_OPERANDS',
-                'info': [len(operands), count_valid]
+                'info': [len(operands), count_max]
             })
         return False
     else:
@@ -191,7 +185,7 @@ def validate_operand_data(operand, errors=None):
 
 def validate_operand_data_size(operand, size_valid, errors=None):
     if validate_operand_data(operand, errors):
-        size = data.get_size(operand)
+        size = data.get_literal(operand)['size']
         if size <= size_valid:
             # data just has to fit in
             return True
@@ -242,431 +236,332 @@ def validate_operand_addr_size(operand, size_valid, errors=None):
         return False
 
 
-def expand_local_symbol_name(symbol_name):
-    global current_proc_name
-
+def expand_local_symbol_name(symbol_name, proc_name=None):
     if '@' == symbol_name[0]:
         # if a symbol name starts with an @ sign, the symbol becomes local by automatically putting the current
         # procedure name at the beginning of the symbol name, or at least an underscore
-        if current_proc_name is not None:
-            symbol_name = current_proc_name + '_' + symbol_name[1:]
+        if proc_name is not None:
+            symbol_name = proc_name + '_' + symbol_name[1:]
         else:
             symbol_name = '_' + symbol_name[1:]
 
     return symbol_name
 
 
-def mnemonics_nop_hlt_rst_inchl_dechl_pushhl_pophl_pushf_popf(mnemonic, operands, errors=None):
-    opcode = None
-
-    if validate_operands_count(operands, 0, errors):
-        if 'nop' == mnemonic:
-            opcode = 0b00000000
-        elif 'hlt' == mnemonic:
-            opcode = 0b11111111
-        elif 'rst' == mnemonic:
-            opcode = 0b11110111
-        elif 'inchl' == mnemonic:
-            opcode = 0b10010111
-        elif 'dechl' == mnemonic:
-            opcode = 0b10100111
-        elif 'pushhl' == mnemonic:
-            opcode = 0b10010001
-        elif 'pophl' == mnemonic:
-            opcode = 0b10010101
-        elif 'pushf' == mnemonic:
-            opcode = 0b10000111
-        elif 'popf' == mnemonic:
-            opcode = 0b11011001
-
-    if errors:
-        return None
-    else:
-        machine_code = bytearray()
-        machine_code.append(opcode)
-        return {
-            'machine_code': machine_code,
-            'relocation_table': []
-        }
-
-
-def mnemonic_mov(operands, errors=None):
-    opcode = None
-    opcode_operands = bytearray()
-    _relocation_table = []
-
-    if validate_operands_count(operands, 2, errors):
-        operand1 = operands[0].lower()
-        operand2 = operands[1].lower()
-        if 'm' == operand1:
-            # move into M is only supported from an 8-bit register
-            register1_opcode = 0b110
-            if validate_operand_register_size(operand2, 8, errors):
-                register2_opcode = get_register_opcode(operand2)
-                opcode = 0b10000000 | (register1_opcode << 4) | (register2_opcode << 1)
-        elif validate_operand_register(operand1, errors):
-            register1_size = get_register_size(operand1)
-            register1_opcode = get_register_opcode(operand1)
-            if 8 == register1_size:
-                # move into an 8-bit register is supported from M, another 8-bit register or using max. 8-bit data or a
-                # single character but no string
-                register2_opcode = None
-                if 'm' == operand2:
-                    register2_opcode = 0b110
-                elif is_valid_register(operand2):
-                    if validate_operand_register_size(operand2, register1_size, errors):
-                        register2_opcode = get_register_opcode(operand2)
-                elif data.is_valid_str(operand2):
-                    if errors is not None:
-                        errors.append({
-                            'name': 'INCOMPATIBLE_DATA_TYPE',
-                            'info': []
-                        })
-                elif validate_operand_data_size(operand2, register1_size, errors):
-                    register2_opcode = 0b111
-                    data_value = data.get_value(operand2)
-                    opcode_operands.append(data_value)
-
-                if register2_opcode is not None:
-                    opcode = 0b10000000 | (register1_opcode << 4) | (register2_opcode << 1)
-            elif 16 == register1_size:
-                # move into a 16-bit register is supported from a symbol name (using relocation), another 16-bit
-                # register or using max. 16-bit data or a single character including unicode but no string
-                register2_opcode = None
-                if is_valid_name(operand2):
-                    operand2 = expand_local_symbol_name(operand2)
-                    register2_opcode = 0b111
-                    opcode_operands.extend([0, 0])
-                    _relocation_table.append({
-                        'machine_code_offset': 1,
-                        'symbol_index': symbol_table.get_index(operand2)
-                    })
-                elif is_valid_register(operand2):
-                    if validate_operand_register_size(operand2, register1_size, errors):
-                        register2_opcode = get_register_opcode(operand2)
-                elif data.is_valid_str(operand2):
-                    errors.append({
-                        'name': 'INCOMPATIBLE_DATA_TYPE',
-                        'info': []
-                    })
-                elif validate_operand_data_size(operand2, register1_size, errors):
-                    register2_opcode = 0b111
-                    data_value = data.get_value(operand2)
-                    opcode_operands.extend(binutils.word_to_le(data_value))
-
-                if register2_opcode is not None:
-                    opcode = (register1_opcode << 4) | (register2_opcode << 1)
-
-    if errors:
-        return None
-    else:
-        machine_code = bytearray()
-        machine_code.append(opcode)
-        machine_code.extend(opcode_operands)
-        return {
-            'machine_code': machine_code,
-            'relocation_table': _relocation_table
-        }
+# instruction forms: each form maps one or more mnemonics (aliases) and the kinds of their operands to an opcode
+#
+# operand kinds of a form:
+#   'm'                 the M operand
+#   ('r8', shift, ...)  any 8-bit register, the register opcode is shifted left and or'ed into the opcode
+#   ('r16', shift, ...) any 16-bit register, likewise
+#   'data8'             max. 8-bit data or a single character but no string, appended as a byte
+#   'data16'            a symbol name (using relocation), max. 16-bit data or a single character including unicode but
+#                       no string, appended as a word
+#   'addr16'            an address or a symbol name (using relocation), appended as a word
+#   'int'               max. 8-bit data with a value up to 63 (for 64 interrupts), appended as a byte
+#
+# db and dw take any number of operands and are not covered by instruction forms
+instruction_forms = [
+    (['nop'], [], 0b00000000),
+    (['hlt'], [], 0b11111111),
+    (['rst'], [], 0b11110111),
+    (['inchl'], [], 0b10010111),
+    (['dechl'], [], 0b10100111),
+    (['pushhl'], [], 0b10010001),
+    (['pophl'], [], 0b10010101),
+    (['pushf'], [], 0b10000111),
+    (['popf'], [], 0b11011001),
+
+    # move into M is only supported from an 8-bit register
+    (['mov'], ['m', ('r8', 1)], 0b11100000),
+    # move into an 8-bit register is supported from M, another 8-bit register or using max. 8-bit data or a single
+    # character but no string
+    (['mov'], [('r8', 4), 'm'], 0b10001100),
+    (['mov'], [('r8', 4), ('r8', 1)], 0b10000000),
+    (['mov'], [('r8', 4), 'data8'], 0b10001110),
+    # move into a 16-bit register is supported from a symbol name (using relocation), another 16-bit register or using
+    # max. 16-bit data or a single character including unicode but no string
+    (['mov'], [('r16', 4), ('r16', 1)], 0b00000000),
+    (['mov'], [('r16', 4), 'data16'], 0b00001110),
+
+    # load from address into an 8-bit register is supported from an address or a symbol name (using relocation)
+    (['loda'], [('r8', 4), 'addr16'], 0b10001101),
+
+    # store to address is supported to an address or a symbol name (using relocation) but only from an 8-bit register
+    (['stoa'], ['addr16', ('r8', 1)], 0b11100001),
+
+    # push and pop are supported with any 8-bit register
+    (['push'], [('r8', 4, 1)], 0b10000000),
+    (['pop'], [('r8', 4, 1)], 0b10000001),
+
+    # add (with carry), subtract (with borrow), compare, and, or and xor are supported with M, any 8-bit register or
+    # max. 8-bit data or a single character but no string
+    (['add'], ['m'], 0b01101100),
+    (['add'], [('r8', 1)], 0b01100000),
+    (['add'], ['data8'], 0b01101110),
+    (['sub'], ['m'], 0b01101101),
+    (['sub'], [('r8', 1)], 0b01100001),
+    (['sub'], ['data8'], 0b01101111),
+    (['cmp'], ['m'], 0b01111100),
+    (['cmp'], [('r8', 1)], 0b01110000),
+    (['cmp'], ['data8'], 0b01111110),
+    (['adc'], ['m'], 0b01010110),
+    (['adc'], [('r8', 0)], 0b01010000),
+    (['adc'], ['data8'], 0b01010111),
+    (['sbb'], ['m'], 0b01011110),
+    (['sbb'], [('r8', 0)], 0b01011000),
+    (['sbb'], ['data8'], 0b01011111),
+    (['and'], ['m'], 0b00110110),
+    (['and'], [('r8', 0)], 0b00110000),
+    (['and'], ['data8'], 0b00110111),
+    (['or'], ['m'], 0b00111110),
+    (['or'], [('r8', 0)], 0b00111000),
+    (['or'], ['data8'], 0b00111111),
+    (['xor'], ['m'], 0b01000110),
+    (['xor'], [('r8', 0)], 0b01000000),
+    (['xor'], ['data8'], 0b01000111),
+
+    # jumps and calls are supported to M, an address or a symbol name (using relocation); note: M vs. address/symbol
+    # name is distinguished using a flip-bit in the opcode
+    (['jmp'], ['m'], 0b01110101),
+    (['jmp'], ['addr16'], 0b01110111),
+    (['jc', 'jb', 'jnae'], ['m'], 0b01111001),
+    (['jc', 'jb', 'jnae'], ['addr16'], 0b01111011),
+    (['jnc', 'jnb', 'jae'], ['m'], 0b01111101),
+    (['jnc', 'jnb', 'jae'], ['addr16'], 0b01111111),
+    (['jz', 'je'], ['m'], 0b10001111),
+    (['jz', 'je'], ['addr16'], 0b10011111),
+    (['jnz', 'jne'], ['m'], 0b10101111),
+    (['jnz', 'jne'], ['addr16'], 0b10111111),
+    (['ja', 'jnbe'], ['m'], 0b00000001),
+    (['ja', 'jnbe'], ['addr16'], 0b00000011),
+    (['jna', 'jbe'], ['m'], 0b00000110),
+    (['jna', 'jbe'], ['addr16'], 0b00000111),
+
+    (['call'], ['m'], 0b11000001),
+    (['call'], ['addr16'], 0b11000011),
+    (['cc', 'cb', 'cnae'], ['m'], 0b11000101),
+    (['cc', 'cb', 'cnae'], ['addr16'], 0b11000111),
+    (['cnc', 'cnb', 'cae'], ['m'], 0b11001011),
+    (['cnc', 'cnb', 'cae'], ['addr16'], 0b11001111),
+    (['cz', 'ce'], ['m'], 0b11010001),
+    (['cz', 'ce'], ['addr16'], 0b11010011),
+    (['cnz', 'cne'], ['m'], 0b11010101),
+    (['cnz', 'cne'], ['addr16'], 0b11010111),
+    (['ca', 'cnbe'], ['m'], 0b00010010),
+    (['ca', 'cnbe'], ['addr16'], 0b00010011),
+    (['cna', 'cbe'], ['m'], 0b00010110),
+    (['cna', 'cbe'], ['addr16'], 0b00010111),
+
+    (['ret'], [], 0b00000101),
+    (['rc', 'rb', 'rnae'], [], 0b00010001),
+    (['rnc', 'rnb', 'rae'], [], 0b00010101),
+    (['rz', 're'], [], 0b00100001),
+    (['rnz', 'rne'], [], 0b00100011),
+    (['ra', 'rnbe'], [], 0b10000011),
+    (['rna', 'rbe'], [], 0b10000101),
+    (['iret'], [], 0b10110101),
+
+    (['int'], ['int'], 0b11011111),
+
+    # increment, decrement, not, shift left and shift right are supported with M or any 8-bit register
+    # note: for not, shift left and shift right M is 111, instead of the usual 110
+    (['inc'], ['m'], 0b11110110),
+    (['inc'], [('r8', 0)], 0b11110000),
+    (['dec'], ['m'], 0b11111110),
+    (['dec'], [('r8', 0)], 0b11111000),
+    (['not'], ['m'], 0b00001111),
+    (['not'], [('r8', 0)], 0b00001000),
+    (['shl'], ['m'], 0b00011111),
+    (['shl'], [('r8', 0)], 0b00011000),
+    (['shr'], ['m'], 0b00101111),
+    (['shr'], [('r8', 0)], 0b00101000),
+]
+
+register_kind_sizes = {'r8': 8, 'r16': 16}
+
+immediate_kind_sizes = {'data8': 8, 'data16': 16, 'addr16': 16, 'int': 8}
+
+max_int_value = 63  # for 64 interrupts
+
+# the kinds of an actual operand matching an operand kind of a form (registers and M are matched by their name)
+operand_kinds = {
+    'm': ['m'],
+    'r8': [register for register in valid_registers.keys() if 8 == get_register_size(register)],
+    'r16': [register for register in valid_registers.keys() if 16 == get_register_size(register)],
+    'data8': ['num', 'chr'],
+    'data16': ['name', 'num', 'chr'],
+    'addr16': ['name', 'num'],
+    'int': ['num'],
+}
 
 
-def mnemonic_loda(operands, errors=None):
-    opcode = None
-    opcode_operands = bytearray()
-    _relocation_table = []
-
-    if validate_operands_count(operands, 2, errors):
-        operand1 = operands[0].lower()
-        operand2 = operands[1].lower()
-        if validate_operand_register_size(operand1, 8, errors):
-            # load from address into an 8-bit register is supported from an address or a symbol name (using relocation)
-            register_opcode = get_register_opcode(operand1)
-            opcode = 0b10001101 | (register_opcode << 4)
-            if validate_operand_addr_size(operand2, 16, errors):
-                addr_value = get_addr_value(operand2)
-                if addr_value is None:
-                    operand2 = expand_local_symbol_name(operand2)
-                    opcode_operands.extend([0, 0])
-                    _relocation_table.append({
-                        'machine_code_offset': 1,
-                        'symbol_index': symbol_table.get_index(operand2)
-                    })
-                else:
-                    opcode_operands.extend(binutils.word_to_le(addr_value))
-            else:
-                opcode = None
+def build_instruction_encodings(forms):
+    # expand the instruction forms into a map keyed by the mnemonic and the kinds of the actual operands, each value
+    # being the opcode and the index and kind of the operand to be appended (if any)
+    encodings = {}
+    forms_by_mnemonic = {}
 
-    if errors:
-        return None
-    else:
-        machine_code = bytearray()
-        machine_code.append(opcode)
-        machine_code.extend(opcode_operands)
-        return {
-            'machine_code': machine_code,
-            'relocation_table': _relocation_table
-        }
+    for mnemonics, form_operands, opcode in forms:
+        # normalize the operand kinds of the form into (kind, register shifts) tuples
+        form_operands = [(form_operand, ()) if isinstance(form_operand, str) else (form_operand[0], form_operand[1:])
+                         for form_operand in form_operands]
 
+        for mnemonic in mnemonics:
+            forms_by_mnemonic.setdefault(mnemonic, []).append(form_operands)
 
-def mnemonic_stoa(operands, errors=None):
-    opcode = None
-    opcode_operands = bytearray()
-    _relocation_table = []
-
-    if validate_operands_count(operands, 2, errors):
-        operand1 = operands[0].lower()
-        operand2 = operands[1].lower()
-        if validate_operand_addr_size(operand1, 16, errors):
-            # store to address is supported to an address or a symbol name (using relocation) but only from an 8-bit
-            # register
-            addr_value = get_addr_value(operand1)
-            if addr_value is None:
-                operand1 = expand_local_symbol_name(operand1)
-                opcode_operands.extend([0, 0])
-                _relocation_table.append({
-                    'machine_code_offset': 1,
-                    'symbol_index': symbol_table.get_index(operand1)
-                })
-            else:
-                opcode_operands.extend(binutils.word_to_le(addr_value))
+        for kinds in itertools.product(*[operand_kinds[kind] for kind, shifts in form_operands]):
+            encoding_opcode = opcode
+            immediate = None
+            for i, ((kind, shifts), operand_kind) in enumerate(zip(form_operands, kinds)):
+                if kind in register_kind_sizes:
+                    for shift in shifts:
+                        encoding_opcode |= get_register_opcode(operand_kind) << shift
+                elif kind in immediate_kind_sizes:
+                    immediate = (i, kind)
 
-            if validate_operand_register_size(operand2, 8, errors):
-                register_opcode = get_register_opcode(operand2)
-                opcode = 0b11100001 | (register_opcode << 1)
-            else:
-                opcode_operands.clear()
+            for mnemonic in mnemonics:
+                encodings[(mnemonic,) + kinds] = (encoding_opcode, immediate)
 
-    if errors:
-        return None
-    else:
-        machine_code = bytearray()
-        machine_code.append(opcode)
-        machine_code.extend(opcode_operands)
-        return {
-            'machine_code': machine_code,
-            'relocation_table': _relocation_table
-        }
+    return encodings, forms_by_mnemonic
 
 
-def mnemonics_push_pop(mnemonic, operands, errors=None):
-    opcode = None
+instruction_encodings, instruction_forms_by_mnemonic = build_instruction_encodings(instruction_forms)
 
-    if validate_operands_count(operands, 1, errors):
-        operand = operands[0].lower()
-        if validate_operand_register_size(operand, 8, errors):
-            # push and pop are supported with any 8-bit register
-            register_opcode = get_register_opcode(operand)
-            if 'push' == mnemonic:
-                opcode = 0b10000000 | (register_opcode << 4) | (register_opcode << 1)
-            elif 'pop' == mnemonic:
-                opcode = 0b10000001 | (register_opcode << 4) | (register_opcode << 1)
 
-    if errors:
-        return None
+def get_operand_kind(operand):
+    # registers and M are classified by their name
+    if is_valid_operand(operand):
+        return operand
+    elif is_valid_name(operand):
+        return 'name'
     else:
-        machine_code = bytearray()
-        machine_code.append(opcode)
-        return {
-            'machine_code': machine_code,
-            'relocation_table': []
-        }
+        kind = data.get_literal(operand)['kind']
+        if kind in data.num_kinds:
+            return 'num'
+        else:
+            return kind  # 'str', 'chr' or None
 
 
-def mnemonics_add_sub_cmp_adc_sbb_and_or_xor(mnemonic, operands, errors=None):
-    opcode = None
-    opcode_operands = bytearray()
+def validate_instruction_operand(operand, operand_kind, kinds, errors=None):
+    # kinds are the operand kinds of all forms still matching the operands before this one
+    register_sizes = [register_kind_sizes[kind] for kind in kinds if kind in register_kind_sizes]
+    immediate_kinds = [kind for kind in kinds if kind in immediate_kind_sizes]
 
-    if validate_operands_count(operands, 1, errors):
-        # add (with carry), subtract (with borrow), compare, and, or and xor are supported with M, any 8-bit register or
-        # max. 8-bit data or a single character but no string
-        operand = operands[0].lower()
-        if 'm' == operand:
-            opcode = 0b110
-        elif is_valid_register(operand):
-            if validate_operand_register_size(operand, 8, errors):
-                register_opcode = get_register_opcode(operand)
-                opcode = register_opcode
-        elif data.is_valid_str(operand):
+    if 'm' == operand_kind and 'm' in kinds:
+        return True
+    elif is_valid_register(operand) and register_sizes:
+        if get_register_size(operand) in register_sizes:
+            return True
+        else:
+            return validate_operand_register_size(operand, register_sizes[0], errors)
+    elif immediate_kinds:
+        immediate_kind = immediate_kinds[0]
+        if 'addr16' == immediate_kind:
+            return validate_operand_addr_size(operand, 16, errors)
+        elif 'data16' == immediate_kind and 'name' == operand_kind:
+            return True
+        elif 'int' == immediate_kind and operand_kind in ['str', 'chr']:
+            if errors is not None:
+                errors.append({
+                    'name': 'UNSUPPORTED_OPERAND',
+                    'info': [operand]
+                })
+            return False
+        elif 'str' == operand_kind:
             if errors is not None:
                 errors.append({
                     'name': 'INCOMPATIBLE_DATA_TYPE',
                     'info': []
                 })
-        elif validate_operand_data_size(operand, 8, errors):
-            opcode = 0b111
+            return False
+        elif validate_operand_data_size(operand, immediate_kind_sizes[immediate_kind], errors):
             data_value = data.get_value(operand)
-            opcode_operands.append(data_value)
-
-        if opcode is not None:
-            if 'add' == mnemonic:
-                opcode = 0b01100000 | (opcode << 1)
-            elif 'sub' == mnemonic:
-                opcode = 0b01100001 | (opcode << 1)
-            elif 'cmp' == mnemonic:
-                opcode = 0b01110000 | (opcode << 1)
-            elif 'adc' == mnemonic:
-                opcode = 0b01010000 | opcode
-            elif 'sbb' == mnemonic:
-                opcode = 0b01011000 | opcode
-            elif 'and' == mnemonic:
-                opcode = 0b00110000 | opcode
-            elif 'or' == mnemonic:
-                opcode = 0b00111000 | opcode
-            elif 'xor' == mnemonic:
-                opcode = 0b01000000 | opcode
-
-    if errors:
-        return None
+            if 'int' == immediate_kind and data_value > max_int_value:
+                if errors is not None:
+                    errors.append({
+                        'name': 'INVALID_INT',
+                        'info': [data_value]
+                    })
+                return False
+            else:
+                return True
+        else:
+            return False
     else:
-        machine_code = bytearray()
-        machine_code.append(opcode)
-        machine_code.extend(opcode_operands)
-        return {
-            'machine_code': machine_code,
-            'relocation_table': []
-        }
+        return validate_operand_register(operand, errors)
 
 
-def mnemonics_jmps_calls(mnemonic, operands, errors=None):
-    opcode = None
-    opcode_operands = bytearray()
-    _relocation_table = []
+def validate_instruction_operands(mnemonic, operands, _operand_kinds, errors=None):
+    forms = instruction_forms_by_mnemonic[mnemonic]
 
-    if validate_operands_count(operands, 1, errors):
-        # jumps and calls are supported to M, an address or a symbol name (using
-        # relocation); note: M vs. address/symbol name is distinguished using a
-        # flip-bit in the opcode
-        operand = operands[0].lower()
-        if 'm' == operand:
-            opcode = 0b0
-        elif validate_operand_addr_size(operand, 16, errors):
-            opcode = 0b1
-            addr_value = get_addr_value(operand)
-            if addr_value is None:
-                operand = expand_local_symbol_name(operand)
-                opcode_operands.extend([0, 0])
-                _relocation_table.append({
-                    'machine_code_offset': 1,
-                    'symbol_index': symbol_table.get_index(operand)
-                })
-            else:
-                opcode_operands.extend(binutils.word_to_le(addr_value))
-
-        # optimized usage of opcodes ...and flip the bit for M vs. address/symbol name
-        if opcode is not None:
-            if 'jmp' == mnemonic:
-                opcode = 0b01110101 | (opcode << 1)
-            elif mnemonic in ['jc', 'jb', 'jnae']:
-                opcode = 0b01111001 | (opcode << 1)
-            elif mnemonic in ['jnc', 'jnb', 'jae']:
-                opcode = 0b01111101 | (opcode << 1)
-            elif mnemonic in ['jz', 'je']:
-                opcode = 0b10001111 | (opcode << 4)
-            elif mnemonic in ['jnz', 'jne']:
-                opcode = 0b10101111 | (opcode << 4)
-            elif mnemonic in ['ja', 'jnbe']:
-                opcode = 0b00000001 | (opcode << 1)
-            elif mnemonic in ['jna', 'jbe']:
-                opcode = 0b00000110 | opcode
-
-            elif 'call' == mnemonic:
-                opcode = 0b11000001 | (opcode << 1)
-            elif mnemonic in ['cc', 'cb', 'cnae']:
-                opcode = 0b11000101 | (opcode << 1)
-            elif mnemonic in ['cnc', 'cnb', 'cae']:
-                opcode = 0b11001011 | (opcode << 2)
-            elif mnemonic in ['cz', 'ce']:
-                opcode = 0b11010001 | (opcode << 1)
-            elif mnemonic in ['cnz', 'cne']:
-                opcode = 0b11010101 | (opcode << 1)
-            elif mnemonic in ['ca', 'cnbe']:
-                opcode = 0b00010010 | opcode
-            elif mnemonic in ['cna', 'cbe']:
-                opcode = 0b00010110 | opcode
+    for i in range(len(operands)):
+        if not validate_instruction_operand(operands[i], _operand_kinds[i], [form[i][0] for form in forms], errors):
+            return False
 
-    if errors:
-        return None
-    else:
-        machine_code = bytearray()
-        machine_code.append(opcode)
-        machine_code.extend(opcode_operands)
-        return {
-            'machine_code': machine_code,
-            'relocation_table': _relocation_table
-        }
+        # keep only the forms matching the operand to validate the next operand
+        forms = [form for form in forms if _operand_kinds[i] in operand_kinds[form[i][0]]]
 
+    return True
 
-def mnemonics_rets_iret(mnemonic, operands, errors=None):
-    opcode = None
-
-    if validate_operands_count(operands, 0, errors):
-        if 'ret' == mnemonic:
-            opcode = 0b00000101
-        elif mnemonic in ['rc', 'rb', 'rnae']:
-            opcode = 0b00010001
-        elif mnemonic in ['rnc', 'rnb', 'rae']:
-            opcode = 0b00010101
-        elif mnemonic in ['rz', 're']:
-            opcode = 0b00100001
-        elif mnemonic in ['rnz', 'rne']:
-            opcode = 0b00100011
-        elif mnemonic in ['ra', 'rnbe']:
-            opcode = 0b10000011
-        elif mnemonic in ['rna', 'rbe']:
-            opcode = 0b10000101
-        elif 'iret' == mnemonic:
-            opcode = 0b10110101
 
-    if errors:
-        return None
-    else:
-        machine_code = bytearray()
-        machine_code.append(opcode)
-        return {
-            'machine_code': machine_code,
-            'relocation_table': []
-        }
+def encode_instruction(encoding, operands, _operand_kinds, proc_name, _symbol_table):
+    opcode, immediate = encoding
+    opcode_operands = bytearray()
+    _relocation_table = relocation_table.new_relocation_table()
+
+    if immediate is not None:
+        i, immediate_kind = immediate
+        operand = operands[i]
+        if 'name' == _operand_kinds[i]:
+            operand = expand_local_symbol_name(operand, proc_name)
+            opcode_operands.extend([0, 0])
+            relocation_table.add_relocation(_relocation_table, 1, symbol_table.get_index(operand, _symbol_table))
+        else:
+            literal = data.get_literal(operand)
+            data_value = literal['value']
+            if literal['size'] > immediate_kind_sizes[immediate_kind] or \
+                    ('int' == immediate_kind and data_value > max_int_value):
+                return None  # let the validation report the error
+            elif 8 == immediate_kind_sizes[immediate_kind]:
+                opcode_operands.append(data_value)
+            else:
+                opcode_operands.extend(binutils.word_to_le(data_value))
 
+    machine_code = bytearray()
+    machine_code.append(opcode)
+    machine_code.extend(opcode_operands)
+    return {
+        'machine_code': machine_code,
+        'relocation_table': _relocation_table
+    }
 
-def mnemonic_int(operands, errors=None):
-    opcode = None
-    opcode_operands = bytearray()
 
-    if validate_operands_count(operands, 1, errors):
-        operand = operands[0].lower()
-        if data.is_valid_str(operand) or data.is_valid_chr(operand):
-            if errors is not None:
-                errors.append({
-                    'name': 'UNSUPPORTED_OPERAND',
-                    'info': [operand]
-                })
-        elif validate_operand_data_size(operand, 8, errors):
-            # call interrupt is supported with max. 8-bit data with a value up to 63 (for 64 interrupts)
-            opcode = 0b11011111
-            data_value = data.get_value(operand)
-            if data_value > 63:
-                if errors is not None:
-                    errors.append({
-                        'name': 'INVALID_INT',
-                        'info': [data_value]
-                    })
-            else:
-                opcode_operands.append(data_value)
+def assemble_instruction(mnemonic, operands, proc_name, _symbol_table, errors=None):
+    assembly = None
+
+    # all forms of a mnemonic have the same number of operands
+    if validate_operands_count(operands, len(instruction_forms_by_mnemonic[mnemonic][0]), errors):
+        operands = [operand.lower() for operand in operands]
+        _operand_kinds = tuple(map(get_operand_kind, operands))
+
+        encoding = instruction_encodings.get((mnemonic,) + _operand_kinds)
+        if encoding is not None:
+            assembly = encode_instruction(encoding, operands, _operand_kinds, proc_name, _symbol_table)
+
+        if assembly is None:
+            # no (valid) encoding, so determine the error
+            validate_instruction_operands(mnemonic, operands, _operand_kinds, errors)
 
     if errors:
         return None
     else:
-        machine_code = bytearray()
-        machine_code.append(opcode)
-        machine_code.extend(opcode_operands)
-        return {
-            'machine_code': machine_code,
-            'relocation_table': []
-        }
+        return assembly
 
 
-def mnemonics_db_dw(mnemonic, operands, errors=None):
+def mnemonics_db_dw(mnemonic, operands, proc_name, _symbol_table, errors=None):
     opcode_operands = bytearray()
-    _relocation_table = []
+    _relocation_table = relocation_table.new_relocation_table()
 
     if operands:
         for operand in operands:
@@ -674,7 +569,8 @@ def mnemonics_db_dw(mnemonic, operands, errors=None):
             if len(operand_splits) == 4 and '(' == operand_splits[-3] and ')' == operand_splits[-1]:
                 operand = operand_splits[0]
                 multiplier = operand_splits[-2]
-                if data.is_valid_str(multiplier) or data.is_valid_chr(multiplier):
+                multiplier_literal = data.get_literal(multiplier)
+                if multiplier_literal['kind'] in ['str', 'chr']:
                     if errors is not None:
                         errors.append({
                             'name': 'UNSUPPORTED_MULTIPLIER',
@@ -682,7 +578,7 @@ def mnemonics_db_dw(mnemonic, operands, errors=None):
                         })
                     opcode_operands.clear()
                     break
-                elif data.get_size(multiplier) is None or data.get_value(multiplier) < 1:
+                elif multiplier_literal['size'] is None or multiplier_literal['value'] < 1:
                     if errors is not None:
                         errors.append({
                             'name': 'INVALID_MULTIPLIER',
@@ -690,27 +586,27 @@ def mnemonics_db_dw(mnemonic, operands, errors=None):
                         })
                     opcode_operands.clear()
                     break
-                elif data.get_size(multiplier) > 16:
+                elif multiplier_literal['size'] > 16:
                     if errors is not None:
                         errors.append({
                             'name': 'UNSUPPORTED_MULTIPLIER_SIZE',
-                            'info': [data.get_size(multiplier), 16]
+                            'info': [multiplier_literal['size'], 16]
                         })
                     opcode_operands.clear()
                     break
-                multiplier_value = data.get_value(multiplier)
+                multiplier_value = multiplier_literal['value']
             else:
                 multiplier_value = 1
 
             if 'db' == mnemonic:
                 # bytes support max. 8-bit data, a single character or a string
                 if validate_operand_data_size(operand, 8, errors):
-                    if data.is_valid_str(operand):
-                        data_values = data.get_value(operand) * multiplier_value
-                        opcode_operands.extend(data_values)
+                    literal = data.get_literal(operand)
+                    if 'str' == literal['kind']:
+                        opcode_operands.extend(bytes(literal['value']) * multiplier_value)
                     else:
-                        data_value = data.get_value(operand)
-                        opcode_operands.extend([data_value] * multiplier_value)
+                        # fill in bulk, without building a list first
+                        opcode_operands.extend(bytes((literal['value'],)) * multiplier_value)
                 else:
                     opcode_operands.clear()
                     break
@@ -718,20 +614,18 @@ def mnemonics_db_dw(mnemonic, operands, errors=None):
                 # words support a symbol name (using relocation), max. 16-bit data, a single character or a string both
                 # including unicode
                 if is_valid_name(operand):
-                    operand = expand_local_symbol_name(operand)
+                    operand = expand_local_symbol_name(operand, proc_name)
                     opcode_operands.extend([0, 0])
-                    _relocation_table.append({
-                        'machine_code_offset': len(opcode_operands) - 2,
-                        'symbol_index': symbol_table.get_index(operand)
-                    })
+                    relocation_table.add_relocation(_relocation_table, len(opcode_operands) - 2,
+                                                    symbol_table.get_index(operand, _symbol_table))
                 elif validate_operand_data_size(operand, 16, errors):
-                    if data.is_valid_str(operand):
-                        data_values = data.get_value(operand) * multiplier_value
-                        for data_value in data_values:
-                            opcode_operands.extend(binutils.word_to_le(data_value))
+                    literal = data.get_literal(operand)
+                    if 'str' == literal['kind']:
+                        data_values = b''.join(binutils.word_to_le(data_value) for data_value in literal['value'])
+                        opcode_operands.extend(data_values * multiplier_value)
                     else:
-                        data_value = data.get_value(operand)
-                        opcode_operands.extend(binutils.word_to_le(data_value) * multiplier_value)
+                        # fill in bulk, without building a list first
+                        opcode_operands.extend(binutils.word_to_le(literal['value']) * multiplier_value)
                 else:
                     opcode_operands.clear()
                     break
@@ -753,55 +647,20 @@ def mnemonics_db_dw(mnemonic, operands, errors=None):
         }
 
 
-def mnemonics_inc_dec_not_shl_shr(mnemonic, operands, errors=None):
-    opcode = None
-
-    if validate_operands_count(operands, 1, errors):
-        # increment, decrement, not, shift left and shift right are supported with M or any 8-bit register
-        operand = operands[0].lower()
-        if 'm' == operand:
-            if mnemonic in ['not', 'shl', 'shr']:
-                opcode = 0b111  # note: for not, shift left and shift right M is 111, instead of the usual 110
-            else:
-                opcode = 0b110
-        elif validate_operand_register_size(operand, 8, errors):
-            register_opcode = get_register_opcode(operand)
-            opcode = register_opcode
-
-        if opcode is not None:
-            if 'inc' == mnemonic:
-                opcode = 0b11110000 | opcode
-            elif 'dec' == mnemonic:
-                opcode = 0b11111000 | opcode
-            elif 'not' == mnemonic:
-                opcode = 0b00001000 | opcode
-            elif 'shl' == mnemonic:
-                opcode = 0b00011000 | opcode
-            elif 'shr' == mnemonic:
-                opcode = 0b00101000 | opcode
-
-    if errors:
-        return None
-    else:
-        machine_code = bytearray()
-        machine_code.append(opcode)
-        return {
-            'machine_code': machine_code,
-            'relocation_table': []
-        }
+def dump_assembly(assembly, line_str, _symbol_table, _cycles=None):
+    # the rows are written at once (to stdout, which might be redirected into a dump file or listing file)
+    line_str = line_str.strip()
+    if _cycles is not None:
+        line_str = _cycles.rjust(5) + '   ' + line_str
 
+    rows = [fileutils.format_row(assembly['machine_code'], line_str, 3)]
+    for machine_code_offset, symbol_index in relocation_table.get_relocations(assembly['relocation_table']):
+        rows.append('   ' * machine_code_offset + f"^ {symbol_table.get_symbol_name(symbol_index, _symbol_table)}\n")
 
-def dump_assembly(assembly):
-    for byte in assembly['machine_code']:
-        print(hex(byte)[2:].upper().zfill(2), '', end='')
-    print('   ' * (3 - len(assembly['machine_code'])), '  ', end='')
-    print(current_line_str.strip())
-    for relocation in assembly['relocation_table']:
-        print('   ' * relocation['machine_code_offset'], end='')
-        print(f"^ {symbol_table.get_symbol_name(relocation['symbol_index'])}")
+    sys.stdout.writelines(rows)
 
 
-def assemble_asm_line(line, errors=None):
+def assemble_asm_line(line, proc_name, _symbol_table, errors=None):
     assembly = None
 
     mnemonic = line['mnemonic']
@@ -813,33 +672,10 @@ def assemble_asm_line(line, errors=None):
                 'name': 'INVALID_MNEMONIC',
                 'info': [mnemonic]
             })
-    elif mnemonic_lower in ['nop', 'hlt', 'rst', 'inchl', 'dechl', 'pushhl', 'pophl', 'pushf', 'popf']:
-        assembly = mnemonics_nop_hlt_rst_inchl_dechl_pushhl_pophl_pushf_popf(mnemonic_lower, line['operands'], errors)
-    elif 'mov' == mnemonic_lower:
-        assembly = mnemonic_mov(line['operands'], errors)
-    elif 'loda' == mnemonic_lower:
-        assembly = mnemonic_loda(line['operands'], errors)
-    elif 'stoa' == mnemonic_lower:
-        assembly = mnemonic_stoa(line['operands'], errors)
-    elif mnemonic_lower in ['push', 'pop']:
-        assembly = mnemonics_push_pop(mnemonic_lower, line['operands'], errors)
-    elif mnemonic_lower in ['add', 'sub', 'cmp', 'adc', 'sbb', 'and', 'or', 'xor']:
-        assembly = mnemonics_add_sub_cmp_adc_sbb_and_or_xor(mnemonic_lower, line['operands'], errors)
-    elif mnemonic_lower in ['jmp', 'jc', 'jnc', 'jz', 'jnz', 'ja', 'jna',
-                            'jb', 'jnb', 'je', 'jne', 'jae', 'jnae', 'jbe', 'jnbe',
-                            'call', 'cc', 'cnc', 'cz', 'cnz', 'ca', 'cna',
-                            'cb', 'cnb', 'ce', 'cne', 'cae', 'cnae', 'cbe', 'cnbe']:
-        assembly = mnemonics_jmps_calls(mnemonic_lower, line['operands'], errors)
-    elif mnemonic_lower in ['ret', 'rc', 'rnc', 'rz', 'rnz', 'ra', 'rna',
-                            'rb', 'rnb', 're', 'rne', 'rae', 'rnae', 'rbe', 'rnbe',
-                            'iret']:
-        assembly = mnemonics_rets_iret(mnemonic_lower, line['operands'], errors)
-    elif 'int' == mnemonic_lower:
-        assembly = mnemonic_int(line['operands'], errors)
     elif mnemonic_lower in ['db', 'dw']:
-        assembly = mnemonics_db_dw(mnemonic_lower, line['operands'], errors)
-    elif mnemonic_lower in ['inc', 'dec', 'not', 'shl', 'shr']:
-        assembly = mnemonics_inc_dec_not_shl_shr(mnemonic_lower, line['operands'], errors)
+        assembly = mnemonics_db_dw(mnemonic_lower, line['operands'], proc_name, _symbol_table, errors)
+    else:
+        assembly = assemble_instruction(mnemonic_lower, line['operands'], proc_name, _symbol_table, errors)
 
     if errors:
         return None
@@ -847,9 +683,80 @@ def assemble_asm_line(line, errors=None):
         return assembly
 
 
-def directive_base(operands, errors=None):
-    global link_base
+# the peephole optimizer (see -O) rewrites the instructions of a symbol once the symbol is complete; each instruction is
+# a map containing the opcode, the machine code and the relocation table (relative to the instruction), data (db, dw
+# and .incbin) has no opcode and is never touched
+#
+# note: mov x, x is not removed, as moving an 8-bit register into itself has the opcode of push x, while moving a 16-bit
+# register into itself has the opcode of another instruction as well
+
+
+def get_opcode(mnemonic, *_operand_kinds):
+    return instruction_encodings[(mnemonic,) + _operand_kinds][0]
+
+
+# push x followed by pop x
+push_pop_opcodes = {get_opcode('push', register): get_opcode('pop', register) for register in operand_kinds['r8']}
+push_pop_opcodes[get_opcode('pushhl')] = get_opcode('pophl')
+push_pop_opcodes[get_opcode('pushf')] = get_opcode('popf')
+
+# call f followed by ret becomes jmp f
+call_jmp_opcodes = {get_opcode('call', kind): get_opcode('jmp', kind) for kind in ['m', 'num']}
+ret_opcode = get_opcode('ret')
+
+# jmp to the label immediately following
+jmp_opcode = get_opcode('jmp', 'num')
+
+# cmp 0 after an instruction setting the zero flag according to the a register, if only the zero flag is tested next
+# (cmp 0 also sets the carry flag, so the optimizer assumes it is not tested after a zero test)
+cmp_zero_opcode = get_opcode('cmp', 'num')
+cmp_zero_machine_code = bytes((cmp_zero_opcode, 0))
+zero_flag_opcodes = {opcode for (mnemonic, *_operand_kinds), (opcode, immediate) in instruction_encodings.items()
+                     if mnemonic in ['add', 'sub', 'adc', 'sbb']} | {get_opcode('inc', 'a'), get_opcode('dec', 'a')}
+zero_flag_test_opcodes = {opcode for (mnemonic, *_operand_kinds), (opcode, immediate) in instruction_encodings.items()
+                          if mnemonic in ['jz', 'jnz', 'cz', 'cnz', 'rz', 'rnz']}
+
+
+def optimize_instructions(instructions, next_symbol_index=None):
+    # returns the optimized instructions, applying the patterns until none matches anymore; next_symbol_index is the
+    # symbol index of the label immediately following the instructions (if any)
+    instructions = list(instructions)
+
+    i = 0
+    while i < len(instructions):
+        instruction = instructions[i]
+        opcode = instruction['opcode']
+        next_opcodes = [next_instruction['opcode'] for next_instruction in instructions[i + 1:i + 3]] + [None, None]
+
+        if opcode in push_pop_opcodes and push_pop_opcodes[opcode] == next_opcodes[0]:
+            del instructions[i:i + 2]
+        elif opcode in call_jmp_opcodes and ret_opcode == next_opcodes[0]:
+            # the called procedure returns straight to the caller
+            instructions[i:i + 2] = [{
+                'opcode': call_jmp_opcodes[opcode],
+                'machine_code': bytes((call_jmp_opcodes[opcode],)) + instruction['machine_code'][1:],
+                'relocation_table': instruction['relocation_table']
+            }]
+        elif opcode in zero_flag_opcodes and cmp_zero_opcode == next_opcodes[0] and \
+                cmp_zero_machine_code == instructions[i + 1]['machine_code'] and \
+                next_opcodes[1] in zero_flag_test_opcodes:
+            # data bytes looking like cmp 0 are kept, as data has no opcode
+            del instructions[i + 1]
+        elif jmp_opcode == opcode and i == len(instructions) - 1 and next_symbol_index is not None and \
+                relocation_table.new_relocation_table([(1, next_symbol_index)]) == instruction['relocation_table']:
+            del instructions[i]
+        else:
+            i += 1
+            continue
+
+        # the instruction before might start a pattern now
+        i = max(i - 1, 0)
+
+    return instructions
 
+
+def directive_base(operands, link_base=None, errors=None):
+    # returns the link base to be set, the given link base is the one already set (if any)
     if link_base is not None:
         if errors is not None:
             errors.append({
@@ -865,7 +772,9 @@ def directive_base(operands, errors=None):
                     'info': [operand]
                 })
         elif validate_operand_addr_size(operand, 16, errors):
-            link_base = data.get_value(operand)
+            return data.get_value(operand)
+
+    return None
 
 
 def directive_proc(operands, errors=None):
@@ -884,22 +793,97 @@ def directive_proc(operands, errors=None):
         return None
 
 
-def show_error(error, symbol_name=None, line_str=None, line_num=None, file_name=None):
-    global total_errors_count
+def directive_incbin(operands, dir_name='', errors=None):
+    # returns the name of the included file (as given, relative to the directory of the source file) and its data
+    if not validate_operands_count(operands, 1, errors, 3):
+        return None, None
 
-    if symbol_name is None:
-        symbol_name = current_symbol_name
+    operand = operands[0]
+    if data.get_literal(operand)['kind'] not in ['str', 'chr']:
+        if errors is not None:
+            errors.append({
+                'name': 'INVALID_OPERAND',
+                'info': [operand]
+            })
+        return None, None
+    incbin_file_name = operand[1:-1]
+
+    # optional offset and length
+    values = []
+    for operand in operands[1:]:
+        literal = data.get_literal(operand)
+        if literal['kind'] in data.num_kinds:
+            values.append(literal['value'])
+        else:
+            if errors is not None:
+                errors.append({
+                    'name': 'UNSUPPORTED_OPERAND' if is_valid_operand(operand) or is_valid_name(operand)
+                    else 'INVALID_OPERAND',
+                    'info': [operand]
+                })
+            return None, None
 
-    if line_str is None:
-        line_str = current_line_str
+    if not os.path.isfile(os.path.join(dir_name, incbin_file_name)):
+        if errors is not None:
+            errors.append({
+                'name': 'FILE_NOT_FOUND',
+                'info': [os.path.join(dir_name, incbin_file_name)]
+            })
+        return None, None
 
-    if line_num is None:
-        line_num = current_line_num
+    with open(os.path.join(dir_name, incbin_file_name), 'rb') as incbin:
+        file_size = os.fstat(incbin.fileno()).st_size
+        offset = values[0] if len(values) > 0 else 0
+        length = values[1] if len(values) > 1 else max(file_size - offset, 0)
+        if offset + length > file_size:
+            if errors is not None:
+                errors.append({
+                    'name': 'INCBIN_OUT_OF_RANGE',
+                    'info': [offset, length, file_size]
+                })
+            return None, None
 
-    if file_name is None:
-        file_name = current_file_name
+        if 0 == length:
+            return incbin_file_name, b''
 
-    total_errors_count += 1
+        # copy the data straight from the memory-mapped file
+        with mmap.mmap(incbin.fileno(), 0, access=mmap.ACCESS_READ) as _mmap, memoryview(_mmap) as view, \
+                view[offset:offset + length] as incbin_data:
+            return incbin_file_name, bytes(incbin_data)
+
+
+def directive_include(operands, dir_name='', errors=None):
+    # returns the name of the included file (joined with the directory of the including file)
+    if not validate_operands_count(operands, 1, errors):
+        return None
+
+    operand = operands[0]
+    if data.get_literal(operand)['kind'] not in ['str', 'chr']:
+        if errors is not None:
+            errors.append({
+                'name': 'INVALID_OPERAND',
+                'info': [operand]
+            })
+        return None
+    include_file_name = os.path.join(dir_name, operand[1:-1])
+
+    if not os.path.isfile(include_file_name):
+        if errors is not None:
+            errors.append({
+                'name': 'FILE_NOT_FOUND',
+                'info': [include_file_name]
+            })
+        return None
+
+    return include_file_name
+
+
+def show_error(error):
+    # an error contains where it occurred (see Assembler.add_error)
+    symbol_name = error.get('symbol_name')
+    line_str = error.get('line_str')
+    line_num = error.get('line_num')
+    file_name = error.get('file_name')
 
     if symbol_name:
         if file_name:
@@ -920,6 +904,13 @@ def show_error(error, symbol_name=None, line_str=None, line_num=None, file_name=
     print()
 
 
+def show_optimizations(file_name, optimizations):
+    # the report of the peephole optimizer (see -O)
+    for proc_name, (instructions_count, bytes_count) in optimizations.items():
+        print(f"{file_name}: optimized '{proc_name}': removed {instructions_count} instruction(s), "
+              f"{bytes_count} byte(s)")
+
+
 def parse_asm_line_str(line_str, errors=None):
     directive = None
     symbol_name = None
@@ -928,12 +919,24 @@ def parse_asm_line_str(line_str, errors=None):
     operand = ''              # the current operand
     operand_expected = False  # whether another operand is expected (after a comma)
 
-    parser = shlex.shlex(line_str)
-    parser.commenters = ';'
-    parser.wordchars += '.:@'
+    for match in token_regex.finditer(line_str):
+        token_kind = match.lastgroup
+        token = match.group()
 
-    for token in parser:
-        if '.' == token[0]:
+        if token_kind is None:
+            # whitespace or comment
+            continue
+
+        elif 'quote' == token_kind:
+            # a string without closing quote
+            if errors is not None:
+                errors.append({
+                    'name': 'UNEXPECTED',
+                    'info': [token]
+                })
+            break
+
+        elif '.' == token[0]:
             if 1 == len(token) or directive or symbol_name or mnemonic:
                 if errors is not None:
                     errors.append({
@@ -998,7 +1001,11 @@ def parse_asm_line_str(line_str, errors=None):
                 break
 
         else:
-            if '.' in token:
+            if 'str' == token_kind and directive:
+                # strings are operands of directives as they are (e.g. file names of .incbin)
+                operand += ' ' + token
+                operand_expected = False
+            elif '.' in token:
                 if errors is not None:
                     errors.append({
                         'name': 'UNEXPECTED',
@@ -1052,159 +1059,715 @@ def parse_asm_line_str(line_str, errors=None):
         }
 
 
-def assemble_asm_file(file_name, dump=False):
-    global current_file_name, current_line_num, current_line_str, current_symbol_name, current_proc_name
+class Assembler:
+    # an assembler holds all state of assembling a source file, so that assemblers can be used as a library, assembling
+    # any number of source files within the same process (one assembler per source file)
 
-    if os.path.isfile(file_name):
-        with open(file_name, 'r') as asm:
-            current_file_name = file_name
-            line_num = 0
-            current_line_num = line_num
+    def __init__(self, dump=False, blocks=None, use_mmap=False, optimize=False, cycles_table=None):
+        self.dump = dump
+        self.use_mmap = use_mmap
 
-            for line_str in asm.readlines():
-                current_line_str = line_str
-                line_num += 1
-                current_line_num = line_num
+        # to dump the cycles of the instructions (see cycles.read_microcode_file), and the cycles of the current
+        # procedure so far (if all conditions are met, if none are met and whether any instruction has unknown cycles)
+        self.cycles_table = cycles_table
+        self.proc_cycles = None
 
-                errors = []
+        # for the peephole optimizer, the instructions of the current symbol (see optimize_instructions) and the number
+        # of instructions and bytes removed per procedure
+        self.optimize = optimize
+        self.instructions = []
+        self.optimizations = {}
 
-                line = parse_asm_line_str(current_line_str, errors)
+        # for incremental assembly, blocks maps the fingerprints of the procedures of a previous assembly to their
+        # symbols (see state_file), assembled_blocks is filled with the procedures of this assembly
+        self.blocks = blocks
+        self.assembled_blocks = None if blocks is None else {}
+        self.block = None  # the procedure currently being assembled
 
-                if not errors and line['directive']:
-                    directive = line['directive']
-                    directive_lower = directive.lower()
+        # errors are maps just like everywhere else, but also containing where they occurred
+        self.errors = []
 
-                    if not is_valid_directive(directive_lower):
-                        show_error({
-                            'name': 'INVALID_DIRECTIVE',
-                            'info': [directive]
-                        })
-                        return
-                    elif 'base' == directive_lower:
-                        directive_base(line['operands'], errors)
-                    elif 'proc' == directive_lower:
-                        if current_proc_name is None:
-                            current_proc_name = directive_proc(line['operands'], errors)
-                            if not errors:
-                                line['symbol_name'] = current_proc_name
-                        else:
-                            show_error({
-                                'name': 'UNEXPECTED_PROC',
-                                'info': []
-                            })
-                            return
-                    elif 'endproc' == directive_lower:
-                        if current_proc_name is not None:
-                            current_proc_name = None
-                            current_symbol_name = None
-                        else:
-                            show_error({
-                                'name': 'UNEXPECTED_ENDPROC',
-                                'info': []
-                            })
-                            return
-                    elif 'end' == directive_lower:
-                        # the .end directive simply exists the line-by-line loop (skipping the rest of the file)
+        self.asm_file_name = None
+        self.file_name = None  # the source file or an included file
+        self.line_num = 0
+        self.line_str = None
+        self.symbol_name = None
+        self.proc_name = None
+
+        # using the .base directive, the assembler allows setting the link base which is then stored in the object file
+        # header
+        self.link_base = None
+
+        self.symbol_table = symbol_table.new_symbol_table()
+        self.symbols = {}
+
+        # the files the object file depends on besides the source file, relative to the directory of the source file
+        # (see .incbin and .include)
+        self.dependencies = []
+
+        # the real paths of the source file and all included files, each file is only included once
+        self.included_file_names = set()
+
+    def add_error(self, error, symbol_name=None):
+        if symbol_name is None:
+            symbol_name = self.symbol_name
+
+        self.errors.append({
+            'name': error['name'],
+            'info': error['info'],
+            'symbol_name': symbol_name,
+            'line_str': self.line_str,
+            'line_num': self.line_num,
+            'file_name': self.file_name
+        })
+
+    def assemble_asm_file(self, file_name):
+        if os.path.isfile(file_name):
+            with contextlib.closing(fileutils.read_lines(file_name, self.use_mmap)) as asm:
+                self.asm_file_name = file_name
+                self.file_name = file_name
+                self.included_file_names.add(os.path.realpath(file_name))
+                line_num = 0
+                self.line_num = line_num
+
+                # the source file is read line by line, only procedures are read ahead for incremental assembly
+                pending_lines = collections.deque()
+
+                for line_str in read_lines_ahead(asm, pending_lines):
+                    self.line_str = line_str
+                    line_num += 1
+                    self.line_num = line_num
+
+                    errors = []
+
+                    line = parse_asm_line_str(self.line_str, errors)
+
+                    if not errors and self.assembled_blocks is not None and self.proc_name is None \
+                            and line['directive'] and 'proc' == line['directive'].lower():
+                        block_lines = read_block(line_str, asm, pending_lines)
+                        fingerprint = hashlib.sha256(''.join(block_lines).encode()).hexdigest()
+                        if self.splice_block(fingerprint):
+                            # skip the procedure
+                            line_num += len(block_lines) - 1
+                            continue
+                        # assemble the procedure line by line
+                        pending_lines.extendleft(reversed(block_lines[1:]))
+                        self.block = {
+                            'fingerprint': fingerprint,
+                            'end': line_num + len(block_lines) - 1,  # the line number of the last line
+                            'symbol_names': [],
+                            'cacheable': True
+                        }
+
+                    if not self.assemble_line(line, errors):
                         break
 
-                if not errors and line['symbol_name']:
-                    symbol_name = line['symbol_name']
+                    if self.block is not None and line_num == self.block['end']:
+                        self.finish_block()
 
-                    if not is_valid_name(symbol_name):
-                        show_error({
-                            'name': 'INVALID_SYMBOL_NAME',
-                            'info': [symbol_name]
-                        }, '')
-                        return
+                # end of file
+        else:
+            self.add_error({
+                'name': 'FILE_NOT_FOUND',
+                'info': [file_name]
+            })
 
-                    symbol_name = expand_local_symbol_name(symbol_name)
+    def assemble_include_file(self, file_name):
+        # assembles the lines of an included file just like the lines of the source file, unless the file was already
+        # included (include guard); returns False if there were errors
+        real_file_name = os.path.realpath(file_name)
+        if real_file_name in self.included_file_names:
+            return True
+        self.included_file_names.add(real_file_name)
 
-                    if symbols.symbol_exists(symbol_name):
-                        show_error({
-                            'name': 'DUPLICATE_SYMBOL',
-                            'info': [symbol_name]
-                        }, '')
-                        return
-                    else:
-                        current_symbol_name = symbol_name
-
-                        if symbol_table.symbol_exists(current_symbol_name):
-                            # if the current symbol was already used as an operand (hence it already exists in the
-                            # symbol table, but with a lower index), move it to the end of the symbol table to keep
-                            # the symbols in the order of their definition
-                            old_symbol_table = symbol_table.get_symbol_table().copy()
-                            symbol_table.remove_symbol(current_symbol_name)
-                            symbol_table.add_symbol(current_symbol_name)
-
-                            # rebuild all symbols to use the new symbol indexes
-                            _symbols = symbols.get_symbols()
-                            for symbol in _symbols.values():
-                                # procedure
-                                proc_name = symbol_table.get_symbol_name(symbol['proc_index'], old_symbol_table)
-                                symbol['proc_index'] = symbol_table.get_index(proc_name)
-
-                                # relocation table
-                                relocation_table.rebuild(symbol['relocation_table'], old_symbol_table)
-                        else:
-                            symbol_table.add_symbol(current_symbol_name)
-
-                        symbols.add_symbol(current_symbol_name, current_proc_name)
-
-                if not errors and line['mnemonic']:
-                    if not current_symbol_name:
-                        show_error({
-                            'name': 'INSTRUCTION_WITHOUT_SYMBOL',
-                            'info': []
+        include_lines = read_include_file(file_name)
+
+        # errors point to the line of the included file
+        including_file_name, including_line_num, including_line_str = self.file_name, self.line_num, self.line_str
+        self.file_name = file_name
+
+        for line_num, (line_str, line, errors) in enumerate(include_lines, 1):
+            self.line_str = line_str
+            self.line_num = line_num
+
+            # the parsed lines are shared (see read_include_file), so the assembler gets its own copies
+            if not self.assemble_line(dict(line) if line else line, list(errors)):
+                # the .end directive only skips the rest of the included file
+                break
+
+        self.file_name, self.line_num, self.line_str = including_file_name, including_line_num, including_line_str
+
+        return not self.errors
+
+    def add_dependency(self, file_name):
+        # the dependencies are relative to the directory of the source file
+        file_name = os.path.relpath(file_name, os.path.dirname(self.asm_file_name) or os.curdir)
+        if file_name not in self.dependencies:
+            self.dependencies.append(file_name)
+
+    def assemble_line(self, line, errors):
+        # assembles a parsed line, or adds the (first) error of parsing it; returns False if the rest of the file is to
+        # be skipped, because of an error or the .end directive
+        if not errors and line['directive']:
+            directive = line['directive']
+            directive_lower = directive.lower()
+
+            if not is_valid_directive(directive_lower):
+                self.add_error({
+                    'name': 'INVALID_DIRECTIVE',
+                    'info': [directive]
+                })
+                return False
+            elif 'base' == directive_lower:
+                link_base = directive_base(line['operands'], self.link_base, errors)
+                if not errors:
+                    self.link_base = link_base
+                if self.block is not None:
+                    # the procedure depends on the link base of the source file
+                    self.block['cacheable'] = False
+            elif 'proc' == directive_lower:
+                if self.proc_name is None:
+                    self.proc_name = directive_proc(line['operands'], errors)
+                    if not errors:
+                        line['symbol_name'] = self.proc_name
+                        if self.dump and self.cycles_table is not None:
+                            self.proc_cycles = [0, 0, False]
+                else:
+                    self.add_error({
+                        'name': 'UNEXPECTED_PROC',
+                        'info': []
+                    })
+                    return False
+            elif 'endproc' == directive_lower:
+                if self.proc_name is not None:
+                    if self.proc_cycles is not None:
+                        # the cycles of the instructions of the procedure, without loops (if all conditions are met,
+                        # and if none are met)
+                        print(f"; '{self.proc_name}': {cycles.format_cycles(*self.proc_cycles[:2])}"
+                              f"{'+?' if self.proc_cycles[2] else ''} cycle(s)")
+                        self.proc_cycles = None
+
+                    self.optimize_symbol()
+                    self.proc_name = None
+                    self.symbol_name = None
+                else:
+                    self.add_error({
+                        'name': 'UNEXPECTED_ENDPROC',
+                        'info': []
+                    })
+                    return False
+            elif 'incbin' == directive_lower:
+                if not self.symbol_name:
+                    self.add_error({
+                        'name': 'INSTRUCTION_WITHOUT_SYMBOL',
+                        'info': []
+                    })
+                    return False
+                else:
+                    dir_name = os.path.dirname(self.file_name)
+                    incbin_file_name, incbin_data = directive_incbin(line['operands'], dir_name, errors)
+                    if not errors:
+                        self.add_dependency(os.path.join(dir_name, incbin_file_name))
+                        if self.block is not None:
+                            # the procedure depends on the included file
+                            self.block['cacheable'] = False
+
+                        self.add_assembly({
+                            'machine_code': incbin_data,
+                            'relocation_table': relocation_table.new_relocation_table()
                         })
-                        return
-                    else:
-                        assembly = assemble_asm_line(line, errors)
+            elif 'include' == directive_lower:
+                include_file_name = directive_include(line['operands'], os.path.dirname(self.file_name), errors)
+                if not errors:
+                    self.add_dependency(include_file_name)
+                    if self.block is not None:
+                        # the procedure depends on the included file
+                        self.block['cacheable'] = False
+
+                    if not self.assemble_include_file(include_file_name):
+                        return False
+            elif 'end' == directive_lower:
+                # the .end directive simply exists the line-by-line loop (skipping the rest of the file)
+                return False
+
+        if not errors and line['symbol_name']:
+            symbol_name = line['symbol_name']
+
+            if not is_valid_name(symbol_name):
+                self.add_error({
+                    'name': 'INVALID_SYMBOL_NAME',
+                    'info': [symbol_name]
+                }, '')
+                return False
+
+            symbol_name = expand_local_symbol_name(symbol_name, self.proc_name)
+
+            if symbols.symbol_exists(symbol_name, self.symbols):
+                self.add_error({
+                    'name': 'DUPLICATE_SYMBOL',
+                    'info': [symbol_name]
+                }, '')
+                return False
+            else:
+                if self.proc_name is not None and symbol_name != self.proc_name:
+                    # a label within the procedure
+                    self.optimize_symbol(symbol_name)
+                else:
+                    self.optimize_symbol()
 
-                        if not errors:
-                            if dump:
-                                dump_assembly(assembly)
+                self.symbol_name = symbol_name
 
-                            symbol = symbols.get_symbol(current_symbol_name)
+                if symbol_table.symbol_exists(self.symbol_name, self.symbol_table):
+                    # if the current symbol was already used as an operand (hence it already exists in the symbol
+                    # table, but with a lower index), move it to the end of the symbol table to keep the symbols in the
+                    # order of their definition (the indexes are only changed when the symbol table is sorted before
+                    # writing the object file)
+                    symbol_table.move_symbol_to_end(self.symbol_name, self.symbol_table)
+                else:
+                    symbol_table.add_symbol(self.symbol_name, self.symbol_table)
 
-                            for relocation in assembly['relocation_table']:
-                                # adjust the machine code offset to be relative to the current symbol
-                                relocation['machine_code_offset'] += len(symbol['machine_code'])
-                            symbol['relocation_table'].extend(assembly['relocation_table'])
-                            symbol['machine_code'].extend(assembly['machine_code'])
+                symbols.add_symbol(self.symbol_name, self.proc_name, self.symbols, self.symbol_table)
 
-                # end of line
+                if self.block is not None:
+                    self.block['symbol_names'].append(self.symbol_name)
 
-                if errors:
-                    show_error(errors[0])
-                    break
+        if not errors and line['mnemonic']:
+            if not self.symbol_name:
+                self.add_error({
+                    'name': 'INSTRUCTION_WITHOUT_SYMBOL',
+                    'info': []
+                })
+                return False
+            else:
+                assembly = assemble_asm_line(line, self.proc_name, self.symbol_table, errors)
+
+                if not errors:
+                    self.add_assembly(assembly, line['mnemonic'].lower() not in ['db', 'dw'])
+
+        # end of line
+
+        if errors:
+            self.add_error(errors[0])
+            return False
+
+        return True
+
+    def add_assembly(self, assembly, instruction=False):
+        # add the assembly of the current line to the current symbol
+        if self.dump:
+            if self.cycles_table is None:
+                dump_assembly(assembly, self.line_str, self.symbol_table)
+            else:
+                dump_assembly(assembly, self.line_str, self.symbol_table, self.count_cycles(assembly, instruction))
+
+        if self.optimize:
+            # keep the instruction (or data) until the symbol is complete (see optimize_symbol)
+            self.instructions.append({
+                'opcode': assembly['machine_code'][0] if instruction else None,
+                'machine_code': bytes(assembly['machine_code']),
+                'relocation_table': relocation_table.copy(assembly['relocation_table'])
+            })
+
+        symbol = symbols.get_symbol(self.symbol_name, self.symbols)
+
+        # adjust the machine code offsets to be relative to the current symbol
+        relocation_table.move(assembly['relocation_table'], len(symbol.machine_code))
+        symbol.relocation_table.extend(assembly['relocation_table'])
+        symbol.machine_code.extend(assembly['machine_code'])
+
+    def count_cycles(self, assembly, instruction):
+        # returns the cycles of an instruction (empty for data) to be dumped, adding them to the cycles of the procedure
+        if not instruction:
+            return ''
+
+        opcode_cycles = self.cycles_table.get(assembly['machine_code'][0])
+        if opcode_cycles is None:
+            # not in the microcode
+            if self.proc_cycles is not None:
+                self.proc_cycles[2] = True
+            return '?'
+
+        if self.proc_cycles is not None:
+            self.proc_cycles[0] += opcode_cycles[0]
+            self.proc_cycles[1] += opcode_cycles[1]
+
+        return cycles.format_cycles(*opcode_cycles)
+
+    def optimize_symbol(self, next_symbol_name=None):
+        # optimize the instructions of the current symbol, which is complete now; next_symbol_name is the label
+        # immediately following within the same procedure (if any)
+        if not self.optimize:
+            return
+
+        instructions = self.instructions
+        self.instructions = []
+
+        if not self.symbol_name:
+            return
+
+        if next_symbol_name is None or 'main' in [self.symbol_name, next_symbol_name] or \
+                not symbol_table.symbol_exists(next_symbol_name, self.symbol_table):
+            # the linker keeps the symbols of an object file in their order, except for the 'main' symbol, which it puts
+            # first: the 'main' symbol might not be followed by its label, and a label followed by the 'main' symbol is
+            # followed by the symbol after it instead
+            next_symbol_index = None
+        else:
+            next_symbol_index = symbol_table.get_index(next_symbol_name, self.symbol_table)
+
+        optimized_instructions = optimize_instructions(instructions, next_symbol_index)
+        if len(optimized_instructions) == len(instructions):
+            return
 
-            # end of file
+        symbol = symbols.get_symbol(self.symbol_name, self.symbols)
+        machine_code = bytearray()
+        _relocation_table = relocation_table.new_relocation_table()
+        for instruction in optimized_instructions:
+            instruction_relocation_table = relocation_table.copy(instruction['relocation_table'])
+            relocation_table.move(instruction_relocation_table, len(machine_code))
+            _relocation_table.extend(instruction_relocation_table)
+            machine_code.extend(instruction['machine_code'])
+
+        # count the removed instructions and bytes per procedure
+        optimization = self.optimizations.setdefault(self.proc_name or self.symbol_name, [0, 0])
+        optimization[0] += len(instructions) - len(optimized_instructions)
+        optimization[1] += len(symbol.machine_code) - len(machine_code)
+
+        symbol.machine_code = machine_code
+        symbol.relocation_table = _relocation_table
+
+    def finish_block(self):
+        # keep the procedure for the next incremental assembly, unless it depends on anything outside of its text
+        if self.block['cacheable'] and self.proc_name is None and self.block['symbol_names']:
+            symbol_names = symbol_table.get_symbol_names(self.symbol_table)
+            block = []
+            for symbol_name in self.block['symbol_names']:
+                symbol = symbols.get_symbol(symbol_name, self.symbols)
+                block.append([
+                    symbol_name,
+                    symbol.machine_code.hex(),
+                    [[machine_code_offset, symbol_names[symbol_index]] for machine_code_offset, symbol_index
+                     in relocation_table.get_relocations(symbol.relocation_table)]
+                ])
+            self.assembled_blocks[self.block['fingerprint']] = block
+
+        self.block = None
+
+    def splice_block(self, fingerprint):
+        # add the symbols of a procedure from a previous assembly, in the same order the assembler would have added
+        # them, so that the object file is the same; returns False if the procedure has to be assembled
+        if self.dump or fingerprint not in self.blocks:
+            return False
+
+        block = self.blocks[fingerprint]
+        try:
+            _symbols = [(symbol_name, bytes.fromhex(machine_code), [(offset, name) for offset, name in relocations])
+                        for symbol_name, machine_code, relocations in block]
+        except (TypeError, ValueError):
+            return False
+
+        if not _symbols or any(symbols.symbol_exists(symbol_name, self.symbols) for symbol_name, *_ in _symbols):
+            # let the assembler report the duplicate symbol
+            return False
+
+        self.optimize_symbol()
+
+        proc_name = _symbols[0][0]
+        for symbol_name, machine_code, relocations in _symbols:
+            if symbol_table.symbol_exists(symbol_name, self.symbol_table):
+                symbol_table.move_symbol_to_end(symbol_name, self.symbol_table)
+            else:
+                symbol_table.add_symbol(symbol_name, self.symbol_table)
+
+            symbol = symbols.add_symbol(symbol_name, proc_name, self.symbols, self.symbol_table)
+            symbol.machine_code.extend(machine_code)
+            for machine_code_offset, name in relocations:
+                relocation_table.add_relocation(symbol.relocation_table, machine_code_offset,
+                                                symbol_table.get_index(name, self.symbol_table))
+
+        self.assembled_blocks[fingerprint] = block
+
+        # just like after the .endproc directive
+        self.symbol_name = None
+
+        return True
+
+    def sort_symbol_table(self):
+        # put the symbol table into the order of the symbol definitions and rebuild all symbols to use the new symbol
+        # indexes
+        self.symbol_table, index_map = symbol_table.sort_symbol_table(self.symbol_table)
+
+        for symbol in self.symbols.values():
+            # procedure
+            symbol.proc_index = index_map[symbol.proc_index]
+
+            # relocation table
+            relocation_table.remap(symbol.relocation_table, index_map)
+
+    def assemble(self, file_name):
+        # returns the object file (bytes), the errors and the number of instructions and bytes removed by the peephole
+        # optimizer per procedure; with errors, the object file is None
+        self.assemble_asm_file(file_name)
+
+        if self.errors:
+            return None, self.errors, self.optimizations
+        else:
+            self.optimize_symbol()
+
+            self.sort_symbol_table()
+            return obj_file.build_obj_file(self.symbol_table, self.symbols, self.link_base), self.errors, \
+                self.optimizations
+
+
+def read_next_line(lines, pending_lines):
+    # returns the next line, taking the lines read ahead first (or None at the end of the file)
+    if pending_lines:
+        return pending_lines.popleft()
     else:
-        show_error({
-            'name': 'FILE_NOT_FOUND',
-            'info': [file_name]
-        })
+        return next(lines, None)
+
+
+def read_lines_ahead(lines, pending_lines):
+    # yields the lines, taking the lines read ahead first (which might be added while iterating)
+    line_str = read_next_line(lines, pending_lines)
+    while line_str is not None:
+        yield line_str
+        line_str = read_next_line(lines, pending_lines)
+
+
+def read_block(line_str, lines, pending_lines):
+    # returns the lines of the procedure starting at the given line, up to the .endproc directive (or the end of the
+    # file, if there is none)
+    block_lines = [line_str]
+    while not endproc_regex.match(line_str):
+        line_str = read_next_line(lines, pending_lines)
+        if line_str is None:
+            break
+        block_lines.append(line_str)
+
+    return block_lines
+
+
+# the parsed lines of the included files, so that a file included by many source files assembled within the same
+# process (e.g. by the same worker process) is only read and parsed once; maps the real path of an included file to
+# its modification time, size, hash and parsed lines
+include_file_cache = {}
+
+
+def read_include_file(file_name):
+    # returns the lines of an included file, each as the line, the parsed line and the errors of parsing it
+    real_file_name = os.path.realpath(file_name)
+    stat = os.stat(real_file_name)
+
+    include_file = include_file_cache.get(real_file_name)
+    if include_file is not None and stat.st_mtime_ns == include_file['mtime'] and stat.st_size == include_file['size']:
+        return include_file['lines']
+
+    with contextlib.closing(fileutils.read_lines(real_file_name)) as lines:
+        line_strs = list(lines)
+    hash = hashlib.sha256(''.join(line_strs).encode()).hexdigest()
+
+    if include_file is not None and hash == include_file['hash']:
+        # only the modification time changed
+        include_lines = include_file['lines']
+    else:
+        include_lines = []
+        for line_str in line_strs:
+            errors = []
+            line = parse_asm_line_str(line_str, errors)
+            include_lines.append((line_str, line, errors))
+
+    include_file_cache[real_file_name] = {
+        'mtime': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'hash': hash,
+        'lines': include_lines
+    }
+
+    return include_lines
+
+
+def assemble_file(file_name, dump=False, incremental=False, use_mmap=False, optimize=False, cycles_table=None):
+    # returns the object file, the errors, the optimizations (see Assembler.assemble) and the files the object file
+    # depends on besides the source file; for incremental assembly, the procedures of the previous assembly are kept in
+    # a state file next to the object file
+    version = get_assembler_version() if incremental else None
+
+    if version is None:
+        assembler = Assembler(dump, use_mmap=use_mmap, optimize=optimize, cycles_table=cycles_table)
+        obj_file_buffer, errors, optimizations = assembler.assemble(file_name)
+    else:
+        if optimize:
+            # the procedures are kept optimized
+            version += ' -O'
+
+        state_file_name = state_file.get_state_file_name(file_name)
+        assembler = Assembler(dump, state_file.read_state_file(state_file_name, version), use_mmap, optimize,
+                              cycles_table)
+        obj_file_buffer, errors, optimizations = assembler.assemble(file_name)
+
+        if not errors and assembler.assembled_blocks.keys() != assembler.blocks.keys():
+            state_file.write_state_file(state_file_name, version, assembler.assembled_blocks)
+
+    return obj_file_buffer, errors, optimizations, assembler.dependencies
+
+
+def assemble_file_with_output(file_name, dump=False, incremental=False, use_mmap=False, optimize=False,
+                              cycles_table=None):
+    # assembles a source file (e.g. in a worker process), also returning the dump output instead of printing it, so
+    # that it can be printed in the order of the source files (and kept in the object cache)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        obj_file_buffer, errors, optimizations, dependencies = assemble_file(file_name, dump, incremental, use_mmap,
+                                                                             optimize, cycles_table)
+
+    return obj_file_buffer, errors, optimizations, dependencies, output.getvalue()
 
 
 # main
 
-parser = argparse.ArgumentParser(description='the assembler')
-parser.add_argument('file', help='source file to be assembled')
-parser.add_argument('-d', '--dump', action='store_true', help='dump line-by-line instructions and assembly output')
-args = parser.parse_args()
+
+def get_assembler_version():
+    # the assembler version covers all modules affecting the object file (and the dump output) or the state file
+    return obj_cache.get_version([
+        sys.modules[__name__], binutils, cycles, data, fileutils, i18n, obj_file, relocation_table, state_file,
+        symbol_table, symbols
+    ])
 
 
 def main():
-    asm_file_name = args.file
-    assemble_asm_file(asm_file_name, args.dump)
+    parser = argparse.ArgumentParser(description='the assembler')
+    parser.add_argument('file', nargs='+', help='source file(s) to be assembled')
+    parser.add_argument('-d', '--dump', action='store_true', help='dump line-by-line instructions and assembly output')
+    parser.add_argument('-l', '--listing', action='store_true',
+                        help='write the dump output into a listing file (.lst) per source file')
+    parser.add_argument('--dump-file', help='write the dump output of all source files into a file instead of stdout')
+    parser.add_argument('--microcode', default=os.environ.get('ASM_MICROCODE'),
+                        help='microcode file (.csv) to dump the cycles of the instructions and procedures '
+                             '(default: $ASM_MICROCODE, no cycles if not set)')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of source files to be assembled in parallel')
+    parser.add_argument('-i', '--incremental', action='store_true',
+                        help='only assemble the procedures changed since the last incremental assembly')
+    parser.add_argument('--mmap', action='store_true', help='memory-map the source files instead of reading them')
+    parser.add_argument('-O', '--optimize', action='store_true',
+                        help='optimize the machine code using peephole patterns (assuming the carry flag is not tested '
+                             'after a zero test)')
+    parser.add_argument('--cache-dir', default=os.environ.get('ASM_CACHE_DIR'),
+                        help='directory of the object cache (default: $ASM_CACHE_DIR, no cache if not set)')
+    parser.add_argument('--cache-size', type=int, default=obj_cache.default_max_cache_size,
+                        help='maximum size of the object cache in bytes')
+    parser.add_argument('--cache-stats', action='store_true', help='show object cache hits and misses')
+    args = parser.parse_args()
+
+    asm_file_names = args.file
+
+    # the dump output is either printed (or written into a dump file) or written into listing files (or both)
+    dump = args.dump or args.listing or args.dump_file is not None
+
+    # the cycles of the instructions are read from the microcode only once for all source files
+    cycles_table = None
+    if args.microcode:
+        errors = []
+        cycles_table = cycles.read_microcode_file(args.microcode, errors)
+        if errors:
+            show_error(errors[0])
+            return len(errors)
+
+    # look up the source files in the object cache, only the misses are assembled
+    cache_dir = args.cache_dir
+    cache_keys = [None] * len(asm_file_names)
+    cache_entries = [None] * len(asm_file_names)
+    if cache_dir:
+        version = get_assembler_version()
+        if version is not None:
+            for i, asm_file_name in enumerate(asm_file_names):
+                cache_keys[i] = obj_cache.get_key(asm_file_name, version, [dump, args.optimize, cycles_table])
+                if cache_keys[i] is not None:
+                    cache_entries[i] = obj_cache.read_entry(cache_dir, cache_keys[i], os.path.dirname(asm_file_name))
+        else:
+            cache_dir = None
+
+    missed_asm_file_names = [
+        asm_file_name for asm_file_name, cache_entry in zip(asm_file_names, cache_entries) if cache_entry is None
+    ]
+
+    if args.jobs > 1 and len(missed_asm_file_names) > 1:
+        executor = concurrent.futures.ProcessPoolExecutor(min(args.jobs, len(missed_asm_file_names)))
+        results = executor.map(assemble_file_with_output, missed_asm_file_names, itertools.repeat(dump),
+                               itertools.repeat(args.incremental), itertools.repeat(args.mmap),
+                               itertools.repeat(args.optimize), itertools.repeat(cycles_table))
+    else:
+        executor = None
+        if cache_dir or args.listing or args.dump_file is not None:
+            # the dump output is stored in the object cache as well (or written into the dump file or listing file)
+            results = (assemble_file_with_output(asm_file_name, dump, args.incremental, args.mmap, args.optimize,
+                                                 cycles_table)
+                       for asm_file_name in missed_asm_file_names)
+        else:
+            results = ((*assemble_file(asm_file_name, dump, args.incremental, args.mmap, args.optimize, cycles_table),
+                        '')
+                       for asm_file_name in missed_asm_file_names)
+
+    dump_file = sys.stdout if args.dump_file is None else open(args.dump_file, 'w')
+
+    # the results are in the order of the source files, no matter which one was assembled first
+    total_errors_count = 0
+    cache_hits_count = 0
+    cache_misses_count = 0
+    for asm_file_name, cache_key, cache_entry in zip(asm_file_names, cache_keys, cache_entries):
+        if cache_entry is not None:
+            obj_file_buffer, output, optimizations = cache_entry
+            errors = []
+            cache_hits_count += 1
+        else:
+            obj_file_buffer, errors, optimizations, dependencies, output = next(results)
+            if cache_dir:
+                cache_misses_count += 1
+                if cache_key is not None and not errors:
+                    obj_cache.write_entry(cache_dir, cache_key, obj_file_buffer, output, optimizations, dependencies,
+                                          os.path.dirname(asm_file_name))
+
+        if args.dump or args.dump_file is not None or not args.listing:
+            dump_file.write(output)
+
+        if not errors:
+            show_optimizations(asm_file_name, optimizations)
+
+        for error in errors:
+            show_error(error)
+        total_errors_count += len(errors)
+
+        if not errors:
+            obj_file_name = os.path.splitext(os.path.basename(asm_file_name))[0] + '.obj'
+            with open(obj_file_name, 'wb') as obj:
+                obj.write(obj_file_buffer)
+
+            if args.listing:
+                lst_file_name = os.path.splitext(os.path.basename(asm_file_name))[0] + '.lst'
+                with open(lst_file_name, 'w') as lst:
+                    lst.write(output)
+
+    if dump_file is not sys.stdout:
+        dump_file.close()
+
+    if executor is not None:
+        executor.shutdown()
+
+    if cache_dir:
+        if cache_misses_count:
+            obj_cache.evict(cache_dir, args.cache_size)
+
+        if args.cache_stats:
+            cache_entries_count, cache_size = obj_cache.get_stats(cache_dir)
+            print(f'cache: {cache_hits_count} hit(s), {cache_misses_count} miss(es), '
+                  f'{cache_entries_count} entries, {cache_size} bytes')
+    elif args.cache_stats:
+        print('cache: disabled')
 
-    if not total_errors_count:
-        obj_file_name = os.path.splitext(os.path.basename(asm_file_name))[0] + '.obj'
-        obj_file.write_obj_file(obj_file_name, link_base=link_base)
+    return total_errors_count
 
 
 if '__main__' == __name__:
-    main()
+    total_errors_count = main()
 
     if total_errors_count:
         sys.exit(1)
@@ -0,0 +1,523 @@
+# benchmarks of the hot paths of the assembler and the linker, using the sources of the bios and the os and synthetic
+# sources; the sizes are those the optimizations were measured with (a full run takes minutes, mostly tracing the memory
+# of a link) and can be scaled down for a quick run
+#
+# run: python3 bench.py [--scale SCALE] [benchmark ...]
+
+import asm
+import binutils
+import data
+import obj_file
+import relocation_table
+import symbol_table
+import symbols
+
+import argparse
+import array
+import importlib
+import os
+import re
+import shlex
+import sys
+import tempfile
+import time
+import tracemalloc
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..')
+asm_file_names = [
+    os.path.join(root_dir, 'rom', 'bios', 'src', 'bios.asm'),
+    os.path.join(root_dir, 'os', 'src', 'os.asm')
+]
+
+
+def measure(function, *args):
+    # returns the result of the function and the time taken in seconds
+    start = time.perf_counter()
+    result = function(*args)
+
+    return result, time.perf_counter() - start
+
+
+def show_result(name, count, unit, seconds):
+    print(f'  {name:<32} {count:>10} {unit:<12} {seconds:8.3f} s {count / seconds:>14,.0f} {unit}/s')
+
+
+def show_memory_result(name, count, unit, size):
+    print(f'  {name:<32} {count:>10} {unit:<12} {size / 0x100000:8.1f} MiB {size / count:>12,.0f} bytes each')
+
+
+def show_count_result(name, count, unit, calls_count, calls_unit):
+    print(f'  {name:<32} {count:>10} {unit:<12} {calls_count:>10} {calls_unit:<12} {calls_count / count:>10.2f} each')
+
+
+class CountingRegex:
+    # a compiled regex counting the calls of fullmatch
+    def __init__(self, regex):
+        self.regex = regex
+        self.calls_count = 0
+
+    def fullmatch(self, s):
+        self.calls_count += 1
+        return self.regex.fullmatch(s)
+
+
+def read_asm_lines():
+    # returns the lines of the sources keyed by the file name
+    asm_lines = {}
+    for asm_file_name in asm_file_names:
+        with open(asm_file_name) as asm_file:
+            asm_lines[os.path.basename(asm_file_name)] = asm_file.read().splitlines()
+
+    return asm_lines
+
+
+def parse_asm_line_str_shlex(line_str, errors=None):
+    # asm.parse_asm_line_str as it was before the regex lexer (using shlex), the baseline of the lexer benchmark
+    directive = None
+    symbol_name = None
+    mnemonic = None
+    operands = []
+    operand = ''              # the current operand
+    operand_expected = False  # whether another operand is expected (after a comma)
+
+    parser = shlex.shlex(line_str)
+    parser.commenters = ';'
+    parser.wordchars += '.:@'
+
+    for token in parser:
+        unexpected = None
+
+        if '.' == token[0]:
+            if 1 == len(token) or directive or symbol_name or mnemonic:
+                unexpected = '.'
+            elif ':' in token:
+                unexpected = ':'
+            elif '@' in token:
+                unexpected = '@'
+            else:
+                directive = token[1:]
+
+        elif ':' == token[-1]:
+            if 1 == len(token) or directive or symbol_name or mnemonic:
+                unexpected = ':'
+            elif '.' in token:
+                unexpected = '.'
+            elif '@' in token[1:]:
+                unexpected = '@'
+            else:
+                symbol_name = token[:-1]
+
+        elif ',' == token:
+            if operand:
+                # finish the current operand and expect another one
+                operands.append(operand[1:])
+                operand = ''
+                operand_expected = True
+            else:
+                unexpected = ','
+
+        else:
+            if '.' in token:
+                unexpected = '.'
+            elif ':' in token:
+                unexpected = ':'
+            elif '@' in token[1:]:
+                unexpected = '@'
+            elif directive or mnemonic:
+                # everything after the directive or mnemonic is an operand
+                operand += ' ' + token
+                operand_expected = False
+            else:
+                mnemonic = token
+
+        if unexpected is not None:
+            if errors is not None:
+                errors.append({
+                    'name': 'UNEXPECTED',
+                    'info': [unexpected]
+                })
+            break
+
+    # end of line
+
+    if not errors:
+        if operand:
+            # finish the last operand
+            operands.append(operand[1:])
+        elif operand_expected:
+            if errors is not None:
+                errors.append({
+                    'name': 'UNEXPECTED',
+                    'info': [',']
+                })
+
+    if errors:
+        return None
+    else:
+        return {
+            'directive': directive,
+            'symbol_name': symbol_name,
+            'mnemonic': mnemonic,
+            'operands': operands
+        }
+
+
+def parse_lines(lines, parse_asm_line_str=asm.parse_asm_line_str):
+    return [parse_asm_line_str(line_str, []) for line_str in lines]
+
+
+def assemble_lines(lines):
+    _symbol_table = symbol_table.new_symbol_table()
+    for line in lines:
+        asm.assemble_asm_line(line, 'proc', _symbol_table, [])
+
+
+def bench_lexer(scale):
+    # lines per second of parse_asm_line_str using shlex (as before the regex lexer) and using the regex lexer, for the
+    # sources and a synthetic source of 1M lines repeating them
+    asm_lines = read_asm_lines()
+    for name, lines in asm_lines.items():
+        _, seconds = measure(parse_lines, lines * 100, parse_asm_line_str_shlex)
+        show_result(f'{name} (x100, shlex)', len(lines) * 100, 'lines', seconds)
+        _, seconds = measure(parse_lines, lines * 100)
+        show_result(f'{name} (x100)', len(lines) * 100, 'lines', seconds)
+
+    all_lines = [line_str for lines in asm_lines.values() for line_str in lines]
+    lines_count = max(1, int(1000000 * scale))
+    lines = (all_lines * (lines_count // len(all_lines) + 1))[:lines_count]
+    _, seconds = measure(parse_lines, lines, parse_asm_line_str_shlex)
+    show_result('synthetic (shlex)', lines_count, 'lines', seconds)
+    _, seconds = measure(parse_lines, lines)
+    show_result('synthetic', lines_count, 'lines', seconds)
+
+
+def bench_encoder(scale):
+    # instructions per second of assemble_asm_line (the lookup of the encoding and the encoding), for the instructions
+    # of the sources
+    lines = [line for line in parse_lines(line_str for lines in read_asm_lines().values() for line_str in lines)
+             if line is not None and line['mnemonic'] is not None]
+    lines_count = max(1, int(1000000 * scale))
+    lines = (lines * (lines_count // len(lines) + 1))[:lines_count]
+    _, seconds = measure(assemble_lines, lines)
+    show_result('bios.asm and os.asm', lines_count, 'instructions', seconds)
+
+
+# the classification of literals before data.get_literal: a regex per kind of literal, run by each of data.is_valid,
+# data.get_value and data.get_size again, in the order of precedence
+cascade_literal_regexes = {
+    'dec': CountingRegex(re.compile('[1-9][0-9_]*')),
+    'hex': CountingRegex(re.compile('0x[0-9a-f][0-9a-f_]*', re.IGNORECASE)),
+    'bin': CountingRegex(re.compile('0b[0-1][0-1_]*', re.IGNORECASE)),
+    'oct': CountingRegex(re.compile('0o[0-7][0-7_]*')),
+    'chr': CountingRegex(re.compile('(\'.\'|\".\")')),
+    'str': CountingRegex(re.compile('(\'.{2,}\'|\".{2,}\")'))
+}
+
+
+def is_valid_cascade(s):
+    return '0' == s or any(regex.fullmatch(s) for regex in cascade_literal_regexes.values())
+
+
+def get_value_cascade(s):
+    if '0' == s:
+        return 0
+
+    for kind, regex in cascade_literal_regexes.items():
+        if regex.fullmatch(s):
+            if 'dec' == kind:
+                return int(s.replace('_', ''))
+            elif kind in ['hex', 'bin', 'oct']:
+                return int(s[2:].replace('_', ''), {'hex': 16, 'bin': 2, 'oct': 8}[kind])
+            elif 'chr' == kind:
+                return ord(s[1])
+            else:
+                return tuple(map(ord, s[1:-1]))
+
+    return None
+
+
+def get_size_cascade(s):
+    value = get_value_cascade(s)
+    if isinstance(value, tuple):
+        return max([binutils.byte_length(item) * 8 for item in value] + [0])
+    elif value is not None:
+        return binutils.byte_length(value) * 8
+    else:
+        return None
+
+
+def use_operands_cascade(operands):
+    # as asm.validate_operand_data_size and the caller getting the value did before data.get_literal
+    for operand in operands:
+        if is_valid_cascade(operand) and get_size_cascade(operand) <= 16:
+            get_value_cascade(operand)
+
+
+def use_operands(operands):
+    for operand in operands:
+        if asm.validate_operand_data_size(operand, 16):
+            data.get_value(operand)
+
+
+def bench_literals(scale):
+    # regex calls and operands per second of validating the size of a data operand and getting its value, for 1028
+    # distinct literals (0 to 255 in all numeric kinds, characters and strings) repeated 20 times, classified by a regex
+    # per kind (as before data.get_literal) and by data.get_literal (a single regex, cached)
+    operands = [literal for value in range(256) for literal in [str(value), hex(value), bin(value), oct(value)]]
+    operands += ["'a'", '"b"', "'ab'", '"Hello World!"']
+    operands_count = max(1, int(20 * scale)) * len(operands)
+    operands = operands * (operands_count // len(operands))
+
+    for regex in cascade_literal_regexes.values():
+        regex.calls_count = 0
+    _, seconds = measure(use_operands_cascade, operands)
+    show_count_result('regex per kind', operands_count, 'operands', sum(
+        regex.calls_count for regex in cascade_literal_regexes.values()), 'regex calls')
+    show_result('regex per kind', operands_count, 'operands', seconds)
+
+    literal_regex = data.literal_regex
+    data.literal_regex = CountingRegex(literal_regex)
+    data.get_literal.cache_clear()
+    try:
+        _, seconds = measure(use_operands, operands)
+        show_count_result('get_literal', operands_count, 'operands', data.literal_regex.calls_count, 'regex calls')
+        show_result('get_literal', operands_count, 'operands', seconds)
+    finally:
+        data.literal_regex = literal_regex
+        data.get_literal.cache_clear()
+
+
+def build_symbol_table(symbol_names):
+    _symbol_table = symbol_table.new_symbol_table()
+    for symbol_name in symbol_names:
+        symbol_table.get_index(symbol_name, _symbol_table)
+
+    return _symbol_table
+
+
+def look_up_symbols(symbol_names, _symbol_table):
+    for symbol_name in symbol_names:
+        symbol_table.get_index(symbol_name, _symbol_table)
+
+
+def bench_symbol_table(scale):
+    # symbols per second of adding the symbols to a symbol table, looking them up, and rebuilding a relocation table
+    # referring to all of them into a new symbol table, from 1k to 500k symbols (linear if the rate does not drop)
+    for symbols_count in [1000, 10000, 100000, 500000]:
+        symbols_count = max(1, int(symbols_count * scale))
+        symbol_names = [f'symbol_{i}' for i in range(symbols_count)]
+
+        _symbol_table, seconds = measure(build_symbol_table, symbol_names)
+        show_result(f'add ({symbols_count})', symbols_count, 'symbols', seconds)
+
+        _, seconds = measure(look_up_symbols, symbol_names, _symbol_table)
+        show_result(f'look up ({symbols_count})', symbols_count, 'symbols', seconds)
+
+        _relocation_table = relocation_table.new_relocation_table(
+            (i * 2, symbol_table.get_index(symbol_name, _symbol_table)) for i, symbol_name in enumerate(symbol_names))
+        _, seconds = measure(relocation_table.rebuild, _relocation_table, _symbol_table,
+                             symbol_table.new_symbol_table())
+        show_result(f'rebuild ({symbols_count})', symbols_count, 'symbols', seconds)
+
+
+def build_symbols(symbols_count, relocations_count):
+    # returns a symbol table and symbols, each symbol referring to the next symbols with 3-byte instructions
+    _symbol_table = symbol_table.new_symbol_table()
+    _symbols = {}
+    for i in range(symbols_count):
+        symbol_name = f'symbol_{i}'
+        symbol = symbols.add_symbol(symbol_name, symbol_name, _symbols, _symbol_table)
+        symbol.machine_code = bytearray(3 * relocations_count)
+        for j in range(relocations_count):
+            relocation_table.add_relocation(symbol.relocation_table, 3 * j + 1, symbol_table.get_index(
+                f'symbol_{(i + j + 1) % symbols_count}', _symbol_table))
+
+    return _symbol_table, _symbols
+
+
+def build_obj_files(_symbol_table, _symbols, obj_file_version, count):
+    for _ in range(count):
+        buffer = obj_file.build_obj_file(_symbol_table, _symbols, obj_file_version=obj_file_version)
+
+    return buffer
+
+
+def read_obj_files(buffer, count):
+    for _ in range(count):
+        header, _symbol_table, _symbols = obj_file.read_obj_file_buffer(buffer, [])
+        for symbol in _symbols.values():
+            obj_file.read_obj_file_symbol_body(symbol)
+
+
+def bench_obj_file(scale):
+    # relocations per second of building an object file with 100k relocations (1000 symbols with 100 relocations
+    # each), and of reading it including the machine code and the relocation table of every symbol, 10 times for each
+    # version
+    symbols_count = max(1, int(1000 * scale))
+    _symbol_table, _symbols = build_symbols(symbols_count, 100)
+    relocations_count = symbols_count * 100
+    for obj_file_version in range(1, obj_file.max_obj_file_version + 1):
+        buffer, seconds = measure(build_obj_files, _symbol_table, _symbols, obj_file_version, 10)
+        show_result(f'build (version {obj_file_version})', relocations_count * 10, 'relocations', seconds)
+
+        _, seconds = measure(read_obj_files, buffer, 10)
+        show_result(f'read (version {obj_file_version})', relocations_count * 10, 'relocations', seconds)
+
+
+def write_obj_files(dir_name, obj_files_count, symbols_count):
+    # returns the names of the object files written, each symbol referring to a symbol of the next object file with a
+    # 3-byte instruction
+    obj_file_names = []
+    for i in range(obj_files_count):
+        _symbol_table = symbol_table.new_symbol_table()
+        _symbols = {}
+        for j in range(symbols_count):
+            symbol_name = f'symbol_{i}_{j}'
+            symbol = symbols.add_symbol(symbol_name, symbol_name, _symbols, _symbol_table)
+            symbol.machine_code = bytearray(3)
+            relocation_table.add_relocation(symbol.relocation_table, 1, symbol_table.get_index(
+                f'symbol_{(i + 1) % obj_files_count}_{j}', _symbol_table))
+
+        obj_file_names.append(os.path.join(dir_name, f'{i}.obj'))
+        obj_file.write_obj_file(obj_file_names[-1], _symbol_table, _symbols)
+
+    return obj_file_names
+
+
+def load_linker(obj_file_names):
+    # returns the linker module, with its state reset; the linker parses its arguments when imported
+    argv = sys.argv
+    sys.argv = ['link.py', *obj_file_names]
+    try:
+        return importlib.reload(sys.modules['link']) if 'link' in sys.modules else importlib.import_module('link')
+    finally:
+        sys.argv = argv
+
+
+def link_obj_files(obj_file_names):
+    # links the object files as the linker does if there is no 'main' symbol, but without writing the output (an object
+    # file is limited to 65535 symbols); returns the linker module
+    link = load_linker(obj_file_names)
+    link.read_obj_files(obj_file_names)
+    link.show_ambiguous_symbols()
+    link.link_obj_files(link.obj_files.keys())
+    assert not link.total_errors_count
+
+    return link
+
+
+def build_linked_symbol_maps(symbol_names, buffer):
+    # the symbols of the object files and the linked symbols as the linker kept them before symbols.Symbol: a map per
+    # symbol of the object file (the machine code a view into the object file, the relocations an array of words), and
+    # another map per linked symbol referring to the same machine code and relocation table
+    obj_file_symbols = {}
+    linked_symbols = {}
+    for i, symbol_name in enumerate(symbol_names):
+        obj_file_symbols[symbol_name] = {
+            'proc_index': 0,
+            'machine_code': buffer[3 * i:3 * i + 3],
+            'relocation_table': array.array('H', [1, i])
+        }
+        linked_symbols[symbol_name] = {
+            'proc_index': 0,
+            'machine_code': obj_file_symbols[symbol_name]['machine_code'],
+            'relocation_table': obj_file_symbols[symbol_name]['relocation_table'],
+            'machine_code_base': 3 * i
+        }
+
+    return obj_file_symbols, linked_symbols
+
+
+def build_linked_symbols(symbol_names, buffer):
+    # the symbols of the object files and the linked symbols as the linker keeps them now: a Symbol per symbol (the
+    # small machine code copied out of the object file), moved from the object file into the linked symbols
+    obj_file_symbols = {}
+    linked_symbols = {}
+    for i, symbol_name in enumerate(symbol_names):
+        symbol = symbols.Symbol(0, bytes(buffer[3 * i:3 * i + 3]), relocation_table.new_relocation_table([(1, i)]))
+        symbol.machine_code_base = 3 * i
+        obj_file_symbols[symbol_name] = symbol
+        linked_symbols[symbol_name] = symbol
+
+    return obj_file_symbols, linked_symbols
+
+
+def measure_memory(function, *args):
+    # returns the result of the function and the peak memory traced by tracemalloc while running it
+    tracemalloc.start()
+    try:
+        result = function(*args)
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_link_memory(scale):
+    # the peak memory traced by tracemalloc while linking 500k symbols (50 object files with 10k symbols each, every
+    # symbol with one relocation), excluding the memory-mapped object files; and of the symbols of such a link alone,
+    # kept as maps (before symbols.Symbol) and as Symbols
+    obj_files_count = max(1, int(50 * scale))
+    with tempfile.TemporaryDirectory() as dir_name:
+        obj_file_names = write_obj_files(dir_name, obj_files_count, 10000)
+
+        link, size = measure_memory(link_obj_files, obj_file_names)
+        show_memory_result('link', len(link.linked_symbols), 'symbols', size)
+
+    symbol_names = [f'symbol_{i}' for i in range(obj_files_count * 10000)]
+    buffer = memoryview(bytes(3 * len(symbol_names)))  # the memory-mapped object files
+    _, size = measure_memory(build_linked_symbol_maps, symbol_names, buffer)
+    show_memory_result('symbols as maps (before)', len(symbol_names), 'symbols', size)
+    _, size = measure_memory(build_linked_symbols, symbol_names, buffer)
+    show_memory_result('symbols as Symbols (after)', len(symbol_names), 'symbols', size)
+
+
+def bench_link(scale):
+    # symbols per second of the stages of linking 200k symbols (2000 object files with 100 symbols each, every symbol
+    # with one relocation): reading the object files and indexing their symbols, checking for ambiguous symbols using
+    # the index, and linking the symbols
+    obj_files_count = max(1, int(2000 * scale))
+    with tempfile.TemporaryDirectory() as dir_name:
+        obj_file_names = write_obj_files(dir_name, obj_files_count, 100)
+        symbols_count = obj_files_count * 100
+
+        link = load_linker(obj_file_names)
+        _, seconds = measure(link.read_obj_files, obj_file_names)
+        show_result('read and index', symbols_count, 'symbols', seconds)
+
+        _, seconds = measure(link.show_ambiguous_symbols)
+        show_result('ambiguous symbols', symbols_count, 'symbols', seconds)
+
+        _, seconds = measure(link.link_obj_files, list(link.obj_files.keys()))
+        show_result('link', symbols_count, 'symbols', seconds)
+        assert not link.total_errors_count
+
+
+benchmarks = {
+    'lexer': bench_lexer,
+    'encoder': bench_encoder,
+    'literals': bench_literals,
+    'symbol_table': bench_symbol_table,
+    'obj_file': bench_obj_file,
+    'link_memory': bench_link_memory,
+    'link': bench_link
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmarks of the assembler and the linker')
+    parser.add_argument('benchmark', nargs='*',
+                        help=f"benchmark(s) to be run: {', '.join(benchmarks.keys())} (default: all)")
+    parser.add_argument('--scale', type=float, default=1.0, help='factor of the sizes (e.g. 0.1 for a quick run)')
+    args = parser.parse_args()
+
+    for name in args.benchmark:
+        if name not in benchmarks:
+            parser.error(f"unknown benchmark '{name}'")
+
+    for name in args.benchmark or benchmarks.keys():
+        print(f'{name}:')
+        benchmarks[name](args.scale)
+
+
+if '__main__' == __name__:
+    main()
@@ -2,61 +2,88 @@
 #   ? bytes  machine code
 #   --- eof ---
 
-import binutils
 import fileutils
+import relocation_table
 import symbol_table
 import symbols
 
+import struct
+
 # default memory address to which a program is loaded before it is executed by the cpu
 default_link_base = 0x0900  # TODO: for the time being...
 
+# the highest memory address of the cpu
+max_addr = 0xffff
+
+word_struct = struct.Struct('<H')
+
 
-def build_cpu_symbols(errors=None, _symbol_table=None, _symbols=None, link_base=None):
-    _symbols = symbols.get_symbols(_symbols)
+def build_cpu_symbols(_symbol_table, _symbols, errors=None, link_base=None):
     if link_base is None:
         link_base = default_link_base
 
-    buffer = bytearray()
-
-    for symbol_name in _symbols.keys():
+    # the absolute memory address of each symbol name of the symbol table (None if the symbol is unknown), i.e. the link
+    # base (the memory address to which a program is loaded before it is executed by the cpu) plus the machine code base
+    # of the symbol (set when linking it)
+    symbol_addrs = [None] * len(symbol_table.get_symbol_names(_symbol_table))
+    for symbol_index, symbol_name in enumerate(symbol_table.get_symbol_names(_symbol_table)):
         symbol = symbols.get_symbol(symbol_name, _symbols)
+        if symbol is not None:
+            symbol_addrs[symbol_index] = link_base + symbol.machine_code_base
+
+    # the size of the machine code of all symbols is known in advance, so that it is copied into a single buffer, which
+    # is then patched in place
+    machine_code_size = sum(len(symbol.machine_code) for symbol in _symbols.values())
+    if link_base + machine_code_size > max_addr + 1:
+        if errors is not None:
+            errors.append({
+                'name': 'MACHINE_CODE_TOO_LARGE',
+                'info': [machine_code_size, max_addr + 1 - link_base]
+            })
+        return None
+
+    buffer = bytearray(machine_code_size)
+    offset = 0
+    for symbol in _symbols.values():
+        machine_code_size = len(symbol.machine_code)
+        buffer[offset:offset + machine_code_size] = symbol.machine_code
 
-        machine_code = symbol['machine_code']
         # do the relocation...
-        for relocation in symbol['relocation_table']:
-            relocation_symbol_name = symbol_table.get_symbol_name(relocation['symbol_index'], _symbol_table)
-            if symbols.symbol_exists(relocation_symbol_name, _symbols):
-                # determine the absolute memory address of the relocated symbol by adding its machine code base to the
-                # link base (the machine code base was set when linking the relocated symbol)
-                # the link base is the memory address to which a program is loaded before it is executed by the cpu
-                relocation_symbol = symbols.get_symbol(relocation_symbol_name, _symbols)
-                relocation_symbol_addr = link_base + relocation_symbol['machine_code_base']
-
-                # insert the absolute memory address of the relocated symbol into the machine code of the current symbol
-                # at the correct offset
-                machine_code[relocation['machine_code_offset']] = binutils.word_to_le(relocation_symbol_addr)[0]
-                machine_code[relocation['machine_code_offset'] + 1] = binutils.word_to_le(relocation_symbol_addr)[1]
+        # insert the absolute memory address of the relocated symbol into the machine code of the current symbol at the
+        # correct offset
+        for machine_code_offset, symbol_index in relocation_table.get_relocations(symbol.relocation_table):
+            relocation_symbol_addr = symbol_addrs[symbol_index] if symbol_index < len(symbol_addrs) else None
+            if machine_code_offset + word_struct.size > machine_code_size:
+                # the address would not be inserted into the machine code of the current symbol
+                if errors is not None:
+                    errors.append({
+                        'name': 'CORRUPT_RELOCATION_TABLE',
+                        'info': []
+                    })
+                    return None
+            elif relocation_symbol_addr is not None:
+                word_struct.pack_into(buffer, offset + machine_code_offset, relocation_symbol_addr)
             else:
                 if errors is not None:
                     errors.append({
                         'name': 'UNKNOWN_SYMBOL',
-                        'info': [relocation_symbol_name]
+                        'info': [symbol_table.get_symbol_name(symbol_index, _symbol_table)]
                     })
                     return None
-        buffer.extend(machine_code)
+
+        offset += machine_code_size
 
     return buffer
 
 
-def write_cpu_file(file_name, errors=None, _symbol_table=None, _symbols=None, link_base=None, dump=False):
-    cpu_symbols = build_cpu_symbols(errors, _symbol_table, _symbols, link_base)
+def write_cpu_file(file_name, _symbol_table, _symbols, errors=None, link_base=None, dump=False,
+                   dump_file=None):
+    buffer = build_cpu_symbols(_symbol_table, _symbols, errors, link_base)
 
     if not errors:
-        buffer = bytearray()
-        buffer.extend(cpu_symbols)
-
         if dump:
-            fileutils.dump_buffer(buffer)
+            # stdout, unless a dump file is given
+            fileutils.dump_buffer(buffer, dump_file)
 
         with open(file_name, 'wb') as cpu:
             cpu.write(buffer)
@@ -0,0 +1,108 @@
+# the cycles of the instructions are derived from the microcode (see rom/microcode/microcode.csv), one line of which is
+# one step of an instruction, taking one cycle:
+#
+#   <name>;<unused>;<carry flag>;<zero flag>;<step>;<opcode>;<control signals>
+#
+# the first steps of all instructions (opcode 0bxxxxxxxx) fetch the instruction, then an instruction ends with the step
+# using NXT (or HLT, SRST); a step might only apply if the carry and/or zero flag is set (0b1) or not set (0b0), which
+# is how conditional jumps, calls and returns take a different number of cycles whether the condition is met (true) or
+# not (false)
+
+import fileutils
+
+import contextlib
+import itertools
+import os
+
+end_signals = ['NXT', 'HLT', 'SRST']
+
+
+def parse_microcode_line(line_str):
+    # returns the opcode (None for all opcodes), the flag conditions, the step, whether the step ends the instruction
+    # and the condition given by the name (True, False or None), or None if the line is invalid
+    values = line_str.split(';')
+    if len(values) != 7:
+        return None
+
+    name, _, carry, zero, step, opcode, signals = [value.strip() for value in values]
+
+    try:
+        flags = [None if 'x' == flag[2:].lower() else int(flag[2:], 2) for flag in [carry, zero]]
+        step = int(step[2:], 2)
+        opcode = None if 'x' in opcode[2:].lower() else int(opcode, 0)
+    except ValueError:
+        return None
+
+    if '(true)' in name:
+        condition = True
+    elif '(false)' in name:
+        condition = False
+    else:
+        condition = None
+
+    return opcode, flags, step, any(signal.strip() in end_signals for signal in signals.split(',')), condition
+
+
+def read_microcode_file(file_name, errors=None):
+    # returns the cycles of the instructions, a map keyed by the opcode, each value being the cycles if the condition of
+    # the instruction is met and if it is not (the same for unconditional instructions)
+    if not os.path.isfile(file_name):
+        if errors is not None:
+            errors.append({
+                'name': 'FILE_NOT_FOUND',
+                'info': [file_name]
+            })
+        return None
+
+    steps = []
+    with contextlib.closing(fileutils.read_lines(file_name)) as microcode:
+        for line_num, line_str in enumerate(microcode, 1):
+            if not line_str.strip():
+                continue
+
+            step = parse_microcode_line(line_str)
+            if step is None:
+                if errors is not None:
+                    errors.append({
+                        'name': 'INVALID_MICROCODE',
+                        'info': [file_name, line_num]
+                    })
+                return None
+            steps.append(step)
+
+    # the steps of each opcode, including the steps of all opcodes
+    all_opcodes_steps = [step for step in steps if step[0] is None]
+    opcodes_steps = {}
+    for step in steps:
+        if step[0] is not None:
+            opcodes_steps.setdefault(step[0], list(all_opcodes_steps)).append(step)
+
+    cycles = {}
+    for opcode, opcode_steps in sorted(opcodes_steps.items()):
+
+        # the cycles for any state of the carry and zero flags
+        cycles_met = []
+        cycles_not_met = []
+        for flags in itertools.product([0, 1], repeat=2):
+            flag_steps = [(step, end, condition) for _, step_flags, step, end, condition in opcode_steps
+                          if all(step_flag in [None, flag] for step_flag, flag in zip(step_flags, flags))]
+            end_steps = [step for step, end, condition in flag_steps if end]
+            flag_cycles = (min(end_steps) if end_steps else max(step for step, end, condition in flag_steps)) + 1
+
+            conditions = {condition for step, end, condition in flag_steps if condition is not None}
+            if False in conditions:
+                cycles_not_met.append(flag_cycles)
+            else:
+                cycles_met.append(flag_cycles)
+
+        cycles[opcode] = (max(cycles_met), max(cycles_not_met) if cycles_not_met else max(cycles_met))
+
+    return cycles
+
+
+def format_cycles(cycles_met, cycles_not_met):
+    # e.g. 7/5 for a conditional jump
+    if cycles_met == cycles_not_met:
+        return str(cycles_met)
+    else:
+        return f'{cycles_met}/{cycles_not_met}'
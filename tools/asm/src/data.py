@@ -1,81 +1,96 @@
 import binutils
 
+import functools
 import re
 
-valid_dec_regex = re.compile('[1-9][0-9_]*')
-valid_hex_regex = re.compile('0x[0-9a-f][0-9a-f_]*', re.IGNORECASE)
-valid_bin_regex = re.compile('0b[0-1][0-1_]*', re.IGNORECASE)
-valid_oct_regex = re.compile('0o[0-7][0-7_]*')
-valid_chr_regex = re.compile('(\'.\'|\".\")', re.IGNORECASE)
-valid_str_regex = re.compile('(\'.{2,}\'|\".{2,}\")', re.IGNORECASE)
+# a literal is classified by a single regex, each kind of literal being a named group (in the order of precedence)
+literal_regex = re.compile(
+    r'''(?P<dec>0|[1-9][0-9_]*)'''
+    r'''|(?P<hex>(?i:0x[0-9a-f][0-9a-f_]*))'''
+    r'''|(?P<bin>(?i:0b[0-1][0-1_]*))'''
+    r'''|(?P<oct>0o[0-7][0-7_]*)'''
+    r'''|(?P<chr>'.'|".")'''
+    r'''|(?P<str>'.{2,}'|".{2,}")'''
+)
+
+num_kinds = ['dec', 'hex', 'bin', 'oct']  # the kinds of numeric literals
+
+max_literals_count = 4096  # the number of literals kept by get_literal
+
+
+@functools.lru_cache(maxsize=max_literals_count)
+def get_literal(s):
+    # returns a map containing the kind, value and size of a literal (all None, if not a valid literal); the same
+    # literals are classified over and over again, so the maps are cached and must not be modified
+    match = literal_regex.fullmatch(s)
+    kind = match.lastgroup if match else None
+
+    if 'dec' == kind:
+        value = int(s.replace('_', ''))
+    elif 'hex' == kind:
+        value = int(s[2:].replace('_', ''), 16)
+    elif 'bin' == kind:
+        value = int(s[2:].replace('_', ''), 2)
+    elif 'oct' == kind:
+        value = int(s[2:].replace('_', ''), 8)
+    elif 'chr' == kind:
+        value = ord(s[1])
+    elif 'str' == kind:
+        # string data is a tuple containing the ascii codes of the individual characters
+        # note: codes can be >255 because of unicode characters
+        value = tuple(map(ord, s[1:-1]))
+    else:
+        value = None
+
+    if isinstance(value, tuple):
+        # for tuples (string data), the size is the size of the largest item (character)
+        # note: size can be >8 bit because of unicode characters
+        size = 0
+        for item in value:
+            size = max(size, binutils.byte_length(item) * 8)  # multiples of 8-bit
+    elif value is not None:
+        size = binutils.byte_length(value) * 8  # multiples of 8-bit
+    else:
+        size = None
+
+    return {
+        'kind': kind,
+        'value': value,
+        'size': size
+    }
 
 
 def is_valid_dec(s):
-    return valid_dec_regex.fullmatch(s)
+    return '0' != s and 'dec' == get_literal(s)['kind']
 
 
 def is_valid_hex(s):
-    return valid_hex_regex.fullmatch(s)
+    return 'hex' == get_literal(s)['kind']
 
 
 def is_valid_bin(s):
-    return valid_bin_regex.fullmatch(s)
+    return 'bin' == get_literal(s)['kind']
 
 
 def is_valid_oct(s):
-    return valid_oct_regex.fullmatch(s)
+    return 'oct' == get_literal(s)['kind']
 
 
 def is_valid_chr(s):
-    return valid_chr_regex.fullmatch(s)
+    return 'chr' == get_literal(s)['kind']
 
 
 def is_valid_str(s):
-    return valid_str_regex.fullmatch(s)
+    return 'str' == get_literal(s)['kind']
 
 
 def is_valid(s):
-    return '0' == s or \
-        is_valid_dec(s) or \
-        is_valid_hex(s) or \
-        is_valid_bin(s) or \
-        is_valid_oct(s) or \
-        is_valid_chr(s) or \
-        is_valid_str(s)
+    return get_literal(s)['kind'] is not None
 
 
 def get_value(s):
-    if '0' == s:
-        return 0
-    elif is_valid_dec(s):
-        return int(s.replace('_', ''))
-    elif is_valid_hex(s):
-        return int(s[2:].replace('_', ''), 16)
-    elif is_valid_bin(s):
-        return int(s[2:].replace('_', ''), 2)
-    elif is_valid_oct(s):
-        return int(s[2:].replace('_', ''), 8)
-    elif is_valid_chr(s):
-        return ord(s[1])
-    elif is_valid_str(s):
-        # string data is returned as a tuple containing the ascii codes of the individual characters
-        # note: codes can be >255 because of unicode characters
-        return tuple(map(ord, s[1:-1]))
-    else:
-        return None
+    return get_literal(s)['value']
 
 
 def get_size(s):
-    value = get_value(s)
-    if isinstance(value, tuple):
-        # for tuples (string data), return the size of the largest item (character)
-        # note: size can be >8 bit because of unicode characters
-        values = value
-        size = 0
-        for value in values:
-            size = max(size, binutils.byte_length(value) * 8)  # multiples of 8-bit
-        return size
-    elif value is not None:
-        return binutils.byte_length(value) * 8  # multiples of 8-bit
-    else:
-        return None
+    return get_literal(s)['size']
@@ -1,28 +1,45 @@
 import binutils
 
+import locale
+import mmap
+import os
+import sys
 
-def dump_buffer(buffer):
-    row = 0
-    col = 0
+read_buffer_size = 1024 * 1024  # text files are read in large chunks, but processed line by line
+# memory-mapped files are mapped in windows of this size (a multiple of the page size)
+mmap_window_size = 16 * 1024 * 1024
 
-    for i in range(len(buffer)):
-        if 0 == col:
-            print(hex(row)[2:].upper().zfill(4), '   ', end='')
 
-        byte = buffer[i]
-        print(hex(byte)[2:].upper().zfill(2), '', end='')
-        col += 1
+# the hexadecimal representations of all byte values (each followed by a space), and a table translating all byte values
+# into printable characters (showing '.' for invisible characters), so that dumps are rendered row by row instead of
+# byte by byte
+hex_strs = [hex(byte)[2:].upper().zfill(2) + ' ' for byte in range(256)]
+printable_table = bytes(byte if byte in range(33, 126) else 46 for byte in range(256))
 
-        if 8 == col or i == len(buffer) - 1:
-            print('   ' * (8 - col), '  ', end='')
-            for j in range(row, row + col):
-                byte = buffer[j]
-                if byte not in range(33, 126):
-                    byte = 46  # show '.' for invisible character
-                print(chr(byte), end='')
-            print('')
-            row += col
-            col = 0
+
+def format_hex(buffer):
+    return ''.join([hex_strs[byte] for byte in buffer])
+
+
+def format_row(buffer, s, row_size):
+    # the bytes of a row, padded to the row size, followed by a string (e.g. the source line)
+    return format_hex(buffer) + '   ' * (row_size - len(buffer)) + '   ' + s + '\n'
+
+
+def format_dump_rows(buffer, row_size=8):
+    # yields the rows of a hexdump, each containing the offset, the bytes and the bytes as characters
+    for offset in range(0, len(buffer), row_size):
+        row = buffer[offset:offset + row_size]
+        yield hex(offset)[2:].upper().zfill(4) + '    ' + \
+            format_row(row, row.translate(printable_table).decode('ascii'), row_size)
+
+
+def dump_buffer(buffer, file=None):
+    # the rows are written through one buffered stream, stdout by default
+    if file is None:
+        file = sys.stdout
+
+    file.writelines(format_dump_rows(buffer))
 
 
 def read_byte(file):
@@ -64,3 +81,63 @@ def read_str(file, length=None):
             return None
     else:
         return None
+
+
+def decode_lines(line, encoding):
+    # a line read in binary mode only ends at '\n', so decode it into lines just like reading the file in text mode
+    # would (universal newlines, translating '\r\n' and '\r' to '\n')
+    line_str = line.decode(encoding)
+    if '\r' in line_str:
+        line_strs = line_str.replace('\r\n', '\n').split('\r')
+        for line_str in line_strs[:-1]:
+            yield line_str + '\n'
+        if line_strs[-1]:
+            yield line_strs[-1]
+    else:
+        yield line_str
+
+
+def map_file(file_name):
+    # returns a read-only view of a memory-mapped binary file (the mapping stays open as long as any view is used)
+    with open(file_name, 'rb') as file:
+        if os.fstat(file.fileno()).st_size:
+            return memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+        else:
+            # an empty file cannot be memory-mapped
+            return memoryview(b'')
+
+
+def read_mmap_lines(file):
+    # yields the lines of a file, memory-mapping one window of the file at a time, so that the memory used does not
+    # depend on the size of the file (a line spanning two windows is put together)
+    encoding = locale.getpreferredencoding(False)
+    file_size = os.fstat(file.fileno()).st_size
+    offset = 0
+    rest = b''  # the beginning of a line spanning two windows
+
+    while offset < file_size:
+        window_size = min(mmap_window_size, file_size - offset)
+        with mmap.mmap(file.fileno(), window_size, access=mmap.ACCESS_READ, offset=offset) as _mmap:
+            for line in iter(_mmap.readline, b''):
+                if rest:
+                    line = rest + line
+                    rest = b''
+                if line.endswith(b'\n'):
+                    yield from decode_lines(line, encoding)
+                else:
+                    rest = line
+        offset += window_size
+
+    if rest:
+        yield from decode_lines(rest, encoding)
+
+
+def read_lines(file_name, use_mmap=False):
+    # yields the lines of a text file one by one, so that the memory used does not depend on the size of the file;
+    # optionally, the file is memory-mapped instead of being read
+    if use_mmap:
+        with open(file_name, 'rb') as file:
+            yield from read_mmap_lines(file)
+    else:
+        with open(file_name, 'r', buffering=read_buffer_size) as file:
+            yield from file
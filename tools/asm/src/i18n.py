@@ -24,6 +24,8 @@ error_messages = {
     'UNSUPPORTED_MULTIPLIER_SIZE': 'unsupported multiplier size (given: {}-bit, max: {}-bit)',
     'NO_DATA': 'no data',
     'DUPLICATE_DIRECTIVE': "duplicate directive '{}'",
+    'INCBIN_OUT_OF_RANGE': 'out of range (offset: {}, length: {}, file size: {})',
+    'INVALID_MICROCODE': "invalid microcode '{}' (line {})",
 
     'NO_OBJ_FILES': 'no object file(s)',
     'DUPLICATE_OBJ_FILE': "duplicate object file '{}'",
@@ -32,9 +34,18 @@ error_messages = {
     'INCOMPATIBLE_OBJ_FILE_VERSION': 'incompatible object file version (given: {}, max: {})',
     'NOT_OBJ_FILE': 'not an object file',
     'CORRUPT_SYMBOL_TABLE': 'corrupt symbol table',
+    'CORRUPT_SYMBOL_DIRECTORY': 'corrupt symbol directory',
     'CORRUPT_MACHINE_CODE': 'corrupt machine code',
     'CORRUPT_RELOCATION_TABLE': 'corrupt relocation table',
+    'DUPLICATE_LIB_FILE': "duplicate lib file '{}'",
+    'INCOMPATIBLE_LIB_FILE_VERSION': 'incompatible lib file version (given: {}, max: {})',
+    'NOT_LIB_FILE': 'not a lib file',
+    'CORRUPT_LIB_FILE': 'corrupt lib file',
     'UNKNOWN_SYMBOL': "unknown symbol '{}'",
+    'MACHINE_CODE_TOO_LARGE': 'machine code too large (size: {}, max: {})',
     'AMBIGUOUS_SYMBOL': "ambiguous symbol '{}'",
+    'TOO_MANY_MEMBERS': 'too many members (max: {})',
+    'TOO_MANY_SYMBOLS': 'too many symbols (max: {})',
+    'NAME_TOO_LONG': "name too long '{}' (size: {}, max: {})",
     'AMBIGUOUS_LINK_BASE': 'ambiguous link base (first: {}, {}: {})'
 }
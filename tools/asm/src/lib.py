@@ -0,0 +1,116 @@
+import argparse
+import fileutils
+import i18n
+import lib_file
+import obj_file
+
+import os
+import sys
+
+total_errors_count = 0
+
+
+def show_error(error, file_name=None):
+    global total_errors_count
+
+    total_errors_count += 1
+
+    if file_name:
+        print(f'{file_name}: ', end='')
+
+    print('error:', i18n.error_messages[error['name']].format(*error['info']))
+
+    print()
+
+
+def read_members(file_names):
+    # returns the members of the lib file: the member name (the name of the object file without its directory), the
+    # object file and the names of the symbols it defines
+    members = []
+    member_names = set()
+    symbol_member_names = {}  # the name of the member defining each symbol
+
+    for file_name in file_names:
+        member_name = os.path.basename(file_name)
+        if member_name in member_names:
+            show_error({
+                'name': 'DUPLICATE_OBJ_FILE',
+                'info': [file_name]
+            }, '')
+            continue
+        member_names.add(member_name)
+
+        errors = []
+
+        if os.path.isfile(file_name):
+            buffer = fileutils.map_file(file_name)
+            header, _symbol_table, _symbols = obj_file.read_obj_file_buffer(buffer, errors)
+        else:
+            errors.append({
+                'name': 'FILE_NOT_FOUND',
+                'info': [file_name]
+            })
+
+        # the limits of the lib file format
+        if not errors and len(members) >= lib_file.max_members_count:
+            errors.append({
+                'name': 'TOO_MANY_MEMBERS',
+                'info': [lib_file.max_members_count]
+            })
+
+        if not errors and len(symbol_member_names) + len(_symbols) > lib_file.max_symbol_names_count:
+            errors.append({
+                'name': 'TOO_MANY_SYMBOLS',
+                'info': [lib_file.max_symbol_names_count]
+            })
+
+        if not errors:
+            for name in [member_name, *_symbols.keys()]:
+                if lib_file.get_name_size(name) - 1 > lib_file.max_name_size:
+                    errors.append({
+                        'name': 'NAME_TOO_LONG',
+                        'info': [name, lib_file.get_name_size(name) - 1, lib_file.max_name_size]
+                    })
+                    break
+
+        if not errors:
+            for symbol_name in _symbols.keys():
+                if symbol_name in symbol_member_names:
+                    errors.append({
+                        'name': 'AMBIGUOUS_SYMBOL',
+                        'info': [symbol_name]
+                    })
+                    break
+
+        if not errors:
+            # the symbols are added once all of them are checked, so that a member with errors adds none of them
+            for symbol_name in _symbols.keys():
+                symbol_member_names[symbol_name] = member_name
+            members.append([member_name, bytes(buffer), list(_symbols.keys())])
+
+        if errors:
+            show_error(errors[0], file_name)
+
+    return members
+
+
+# main
+
+parser = argparse.ArgumentParser(description='the librarian')
+parser.add_argument('lib', help='lib file to be created')
+parser.add_argument('file', nargs='+', help='object file(s) to be added')
+args = parser.parse_args()
+
+
+def main():
+    members = read_members(args.file)
+
+    if not total_errors_count:
+        lib_file.write_lib_file(args.lib, members)
+
+
+if '__main__' == __name__:
+    main()
+
+    if total_errors_count:
+        sys.exit(1)
@@ -0,0 +1,190 @@
+# lib file format:
+#   8 bytes  header
+#   ? bytes  member directory
+#   ? bytes  symbol index
+#   ? bytes  the members
+#   --- eof ---
+#
+#
+# header:
+#   3 bytes  file signature ('MPL')
+#   1 byte   lib file version
+#   1 word   number of members
+#   1 word   number of symbol names in symbol index
+#
+# a member in member directory:
+#   1 dword  file offset of member
+#   1 dword  size of member
+#   1 byte   length of member name
+#   ? bytes  member name
+#
+# a symbol name in symbol index, one for each symbol defined by any member:
+#   1 word   member index (in member directory)
+#   1 byte   length of symbol name
+#   ? bytes  symbol name
+#
+# a member:
+#   ? bytes  object file (see obj_file)
+#
+# the symbol index allows the linker to find the member defining a symbol without reading any member, so that only the
+# members defining symbols used by the linked object files are read
+
+import fileutils
+
+import os
+import struct
+
+lib_file_signature = 'MPL'
+max_lib_file_version = 1
+
+# limits of the lib file format
+max_members_count = 0xffff
+max_symbol_names_count = 0xffff
+max_name_size = 0xff
+
+header_struct = struct.Struct('<3sBHH')  # file signature, lib file version, number of members, number of symbol names
+member_struct = struct.Struct('<II')  # file offset of member, size of member
+word_struct = struct.Struct('<H')
+
+
+def get_name_size(name):
+    return 1 + len(name.encode())
+
+
+def build_name(buffer, offset, name):
+    # one byte containing the length of the name, then the name; returns the offset after it
+    name = name.encode()
+    buffer[offset] = len(name)
+    buffer[offset + 1:offset + 1 + len(name)] = name
+
+    return offset + 1 + len(name)
+
+
+def build_lib_file(members):
+    # members are given as lists of the member name, the object file (bytes) and the names of the symbols it defines
+    symbol_index = {}
+    for member_index, (_, _, symbol_names) in enumerate(members):
+        for symbol_name in symbol_names:
+            symbol_index.setdefault(symbol_name, member_index)
+
+    # the size of the lib file is known in advance, so that it is packed into a single buffer
+    offset = header_struct.size + \
+        sum(member_struct.size + get_name_size(member_name) for member_name, _, _ in members) + \
+        sum(word_struct.size + get_name_size(symbol_name) for symbol_name in symbol_index.keys())
+    buffer = bytearray(offset + sum(len(member) for _, member, _ in members))
+
+    header_struct.pack_into(buffer, 0, lib_file_signature.encode(), max_lib_file_version, len(members),
+                            len(symbol_index))
+    directory_offset = header_struct.size
+    for member_name, member, _ in members:
+        member_struct.pack_into(buffer, directory_offset, offset, len(member))
+        directory_offset = build_name(buffer, directory_offset + member_struct.size, member_name)
+
+        buffer[offset:offset + len(member)] = member
+        offset += len(member)
+
+    for symbol_name, member_index in symbol_index.items():
+        word_struct.pack_into(buffer, directory_offset, member_index)
+        directory_offset = build_name(buffer, directory_offset + word_struct.size, symbol_name)
+
+    return buffer
+
+
+def write_lib_file(file_name, members):
+    buffer = build_lib_file(members)
+
+    with open(file_name, 'wb') as lib:
+        lib.write(buffer)
+
+
+def read_name(buffer, offset):
+    # returns the name (None if it is invalid) and the offset after it
+    name = None
+    if offset < len(buffer):
+        length = buffer[offset]
+        if offset + 1 + length <= len(buffer):
+            try:
+                name = bytes(buffer[offset + 1:offset + 1 + length]).decode()
+            except UnicodeDecodeError:
+                pass
+            offset += 1 + length
+
+    return name, offset
+
+
+def read_lib_file_buffer(buffer, errors=None):
+    # returns the members (lists of the member name and a view of the object file) and the symbol index (the member
+    # index keyed by the symbol name) of a lib file in the buffer
+    if len(buffer) < header_struct.size:
+        if errors is not None:
+            errors.append({
+                'name': 'UNEXPECTED_EOF',
+                'info': []
+            })
+        return None, None
+
+    file_signature, lib_file_version, members_count, symbol_names_count = header_struct.unpack_from(buffer, 0)
+    if file_signature != lib_file_signature.encode():
+        if errors is not None:
+            errors.append({
+                'name': 'NOT_LIB_FILE',
+                'info': []
+            })
+        return None, None
+    elif lib_file_version > max_lib_file_version:
+        if errors is not None:
+            errors.append({
+                'name': 'INCOMPATIBLE_LIB_FILE_VERSION',
+                'info': [lib_file_version, max_lib_file_version]
+            })
+        return None, None
+
+    members = []
+    offset = header_struct.size
+    for _ in range(members_count):
+        if offset + member_struct.size > len(buffer):
+            member_name = None
+        else:
+            member_offset, member_size = member_struct.unpack_from(buffer, offset)
+            member_name, offset = read_name(buffer, offset + member_struct.size)
+
+        if member_name is None or member_offset + member_size > len(buffer):
+            if errors is not None:
+                errors.append({
+                    'name': 'CORRUPT_LIB_FILE',
+                    'info': []
+                })
+            return None, None
+        members.append([member_name, buffer[member_offset:member_offset + member_size]])
+
+    symbol_index = {}
+    for _ in range(symbol_names_count):
+        if offset + word_struct.size > len(buffer):
+            symbol_name = None
+        else:
+            member_index = word_struct.unpack_from(buffer, offset)[0]
+            symbol_name, offset = read_name(buffer, offset + word_struct.size)
+
+        if symbol_name is None or member_index >= members_count:
+            if errors is not None:
+                errors.append({
+                    'name': 'CORRUPT_LIB_FILE',
+                    'info': []
+                })
+            return None, None
+        symbol_index[symbol_name] = member_index
+
+    return members, symbol_index
+
+
+def read_lib_file(file_name, errors=None):
+    if os.path.isfile(file_name):
+        # the members are views into the memory-mapped lib file, so that only the members used are read
+        return read_lib_file_buffer(fileutils.map_file(file_name), errors)
+    else:
+        if errors is not None:
+            errors.append({
+                'name': 'FILE_NOT_FOUND',
+                'info': [file_name]
+            })
+        return None, None
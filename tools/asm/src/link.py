@@ -1,6 +1,8 @@
 import argparse
+import concurrent.futures
 import cpu_file
 import i18n
+import lib_file
 import obj_file
 import relocation_table
 import symbol_table
@@ -16,6 +18,21 @@ current_obj_file_name = None
 # object files are a map keyed by the object file name, each object file containing the symbol table and the symbols
 obj_files = {}
 
+# lib files are a map keyed by the lib file name, each lib file containing the members (object files) and the symbol
+# index; the members are only added to the object files if they define symbols which are used, but not defined
+lib_files = {}
+
+# the names of the object files defining each symbol in the given order, so that linking a symbol does not need to look
+# at all object files (symbols defined in more than one object file are reported before linking)
+symbol_obj_file_names = {}
+
+# with --gc, the names of the symbols reachable from 'main' and the kept symbols, only these symbols are linked
+reachable_symbol_names = None
+
+# the global symbol table and the global symbols, i.e. the symbols linked so far (moved from the object files)
+linked_symbol_table = symbol_table.new_symbol_table()
+linked_symbols = {}
+
 # this is the memory address to which a program is loaded before it is executed by the cpu
 # the value is used when determining the absolute memory address of a relocated symbol
 # using the .base directive, the assembler allows setting the link base which is then stored in the object file header
@@ -40,21 +57,38 @@ def get_obj_file(file_name):
 def add_obj_file(file_name):
     if not obj_file_exists(file_name):
         obj_files[file_name] = {
-            'symbol_table': [],
-            'symbols': {}
+            'symbol_table': symbol_table.new_symbol_table(),
+            'symbols': {},
+            'index_map': {}  # the symbol indexes of the global symbol table (see relocation_table.rebuild)
         }
 
     return get_obj_file(file_name)
 
 
+def set_obj_file(file_name, header, _symbol_table, _symbols):
+    _obj_file = add_obj_file(file_name)
+
+    _obj_file['header'] = header
+    _obj_file['symbol_table'] = _symbol_table
+    _obj_file['symbols'] = _symbols
+
+    add_symbol_obj_file_names(file_name, _symbols)
+
+
+def is_lib_file_name(file_name):
+    return '.lib' == os.path.splitext(file_name)[1]
+
+
 def get_symbol_obj_file_names(symbol_name):
-    file_names = []
-    for file_name in obj_files.keys():
-        _obj_file = get_obj_file(file_name)
-        if symbols.symbol_exists(symbol_name, _obj_file['symbols']):
-            file_names.append(file_name)
+    return symbol_obj_file_names.get(symbol_name, [])
 
-    return file_names
+
+def add_symbol_obj_file_names(file_name, _symbols):
+    for symbol_name in _symbols.keys():
+        if symbol_name in symbol_obj_file_names:
+            symbol_obj_file_names[symbol_name].append(file_name)
+        else:
+            symbol_obj_file_names[symbol_name] = [file_name]
 
 
 def show_error(error, obj_file_name=None):
@@ -73,38 +107,210 @@ def show_error(error, obj_file_name=None):
     print()
 
 
-def read_obj_files(file_names):
+def read_detached_obj_file(file_name):
+    # reads an object file in a worker process (see read_obj_files), returning the symbols detached from the
+    # memory-mapped object file, which cannot be passed back
+    errors = []
+
+    header, _symbol_table, _symbols = obj_file.read_obj_file(file_name, errors)
+
+    if not errors:
+        _symbols = obj_file.detach_obj_file_symbols(_symbols)
+
+    return header, _symbol_table, _symbols, errors
+
+
+def read_obj_files(file_names, jobs=1):
     global current_obj_file_name
 
+    # with more than one job, the object files are read in worker processes, but added in the given order (as if read
+    # one after another), so that the same errors are shown in the same order; an object file given more than once is
+    # read by a worker process the first time only (it is either a duplicate, or read again after an error)
+    executor = None
+    results = None
+    worker_file_names = list(dict.fromkeys(file_name for file_name in file_names if not is_lib_file_name(file_name)))
+    if jobs > 1 and len(worker_file_names) > 1:
+        jobs = min(jobs, len(worker_file_names))
+        executor = concurrent.futures.ProcessPoolExecutor(jobs)
+        # thousands of small object files are passed to the worker processes in chunks
+        results = executor.map(read_detached_obj_file, worker_file_names,
+                               chunksize=max(1, len(worker_file_names) // (jobs * 8)))
+    read_file_names = set()
+
     for file_name in file_names:
         current_obj_file_name = file_name
 
-        if obj_file_exists(file_name):
+        if obj_file_exists(file_name) or file_name in lib_files:
             show_error({
-                'name': 'DUPLICATE_OBJ_FILE',
+                'name': 'DUPLICATE_LIB_FILE' if is_lib_file_name(file_name) else 'DUPLICATE_OBJ_FILE',
                 'info': [current_obj_file_name]
             }, '')
-            return
-        else:
+            break
+        elif is_lib_file_name(file_name):
             errors = []
 
-            header, _symbol_table, _symbols = obj_file.read_obj_file(current_obj_file_name, errors)
+            members, symbol_index = lib_file.read_lib_file(current_obj_file_name, errors)
 
             if not errors:
-                _obj_file = add_obj_file(current_obj_file_name)
+                lib_files[current_obj_file_name] = {
+                    'members': members,
+                    'symbol_index': symbol_index
+                }
+
+            if errors:
+                show_error(errors[0])
+        else:
+            if results is not None and file_name not in read_file_names:
+                header, _symbol_table, _symbols, errors = next(results)
 
-                _obj_file['header'] = header
-                _obj_file['symbol_table'] = _symbol_table
-                _obj_file['symbols'] = _symbols
+                if not errors:
+                    _symbols = obj_file.attach_obj_file_symbols(current_obj_file_name, _symbols, errors)
+            else:
+                errors = []
+
+                header, _symbol_table, _symbols = obj_file.read_obj_file(current_obj_file_name, errors)
+            read_file_names.add(file_name)
+
+            if not errors:
+                set_obj_file(current_obj_file_name, header, _symbol_table, _symbols)
 
             if errors:
                 show_error(errors[0])
 
+    if executor is not None:
+        # the object files after a duplicate are not needed anymore
+        executor.shutdown(cancel_futures=True)
+
+
+def get_undefined_symbol_names(_obj_file):
+    return [symbol_name for symbol_name in symbol_table.get_symbol_names(_obj_file['symbol_table'])[1:]
+            if not symbols.symbol_exists(symbol_name, _obj_file['symbols'])]
+
+
+def read_lib_members(symbol_names=()):
+    # adds the members of the lib files defining symbols which are used, but not defined, by the object files (including
+    # the members added) or given (e.g. kept with --keep), searching the lib files in the given order; unknown symbols
+    # are shown when linking
+    global current_obj_file_name
+
+    undefined_symbol_names = list(symbol_names)
+    for _obj_file in obj_files.values():
+        undefined_symbol_names.extend(get_undefined_symbol_names(_obj_file))
+
+    # the list grows while iterating over it, until no member is added anymore
+    for symbol_name in undefined_symbol_names:
+        if get_symbol_obj_file_names(symbol_name):
+            continue
+
+        for lib_file_name, _lib_file in lib_files.items():
+            member_index = _lib_file['symbol_index'].get(symbol_name)
+            if member_index is not None:
+                member_name, buffer = _lib_file['members'][member_index]
+                current_obj_file_name = f'{lib_file_name}({member_name})'
+
+                errors = []
+
+                header, _symbol_table, _symbols = obj_file.read_obj_file_buffer(buffer, errors)
+
+                if not errors:
+                    set_obj_file(current_obj_file_name, header, _symbol_table, _symbols)
+                    undefined_symbol_names.extend(get_undefined_symbol_names(get_obj_file(current_obj_file_name)))
+
+                if errors:
+                    show_error(errors[0])
+                    return
+                break
+
+
+def show_ambiguous_symbols():
+    main_obj_file_names = get_symbol_obj_file_names('main')
+    if len(main_obj_file_names) > 1:
+        # there can only be one 'main' symbol
+        show_error({
+            'name': 'DUPLICATE_SYMBOL',
+            'info': ['main']
+        }, '')
+        return
+
+    # the error is shown for each object file defining the symbol, in the link order (the object file that contains the
+    # 'main' symbol first)
+    for file_name in main_obj_file_names + [file_name for file_name in obj_files.keys()
+                                            if file_name not in main_obj_file_names]:
+        for symbol_name in get_obj_file(file_name)['symbols'].keys():
+            if len(get_symbol_obj_file_names(symbol_name)) > 1:
+                show_error({
+                    'name': 'AMBIGUOUS_SYMBOL',
+                    'info': [symbol_name]
+                }, file_name)
+
+
+def get_symbol_units(_obj_file):
+    # returns the units of the symbols of an object file keyed by the symbol name; the symbols of a unit are linked (or
+    # not) together, as execution might fall through from one symbol into the next: a procedure with its labels, or
+    # consecutive symbols outside of procedures
+    if 'units' not in _obj_file:
+        _obj_file['units'] = {}
+        unit = None
+        proc_index = None
+        for symbol_name, symbol in _obj_file['symbols'].items():
+            if unit is None or symbol.proc_index != proc_index:
+                unit = []
+                proc_index = symbol.proc_index
+            unit.append(symbol_name)
+            _obj_file['units'][symbol_name] = unit
+
+    return _obj_file['units']
+
+
+def find_reachable_symbols(symbol_names):
+    # returns the names of the symbols reachable from the given symbols by following the relocations, or None if a
+    # symbol body is corrupt (unknown symbols are shown when linking)
+    reachable_symbols = set()
+    pending_symbol_names = list(symbol_names)
+    while pending_symbol_names:
+        symbol_name = pending_symbol_names.pop()
+        obj_file_names = get_symbol_obj_file_names(symbol_name)
+        if symbol_name in reachable_symbols or not obj_file_names:
+            continue
+
+        _obj_file = get_obj_file(obj_file_names[0])
+        for unit_symbol_name in get_symbol_units(_obj_file)[symbol_name]:
+            reachable_symbols.add(unit_symbol_name)
+
+            obj_file_symbol = symbols.get_symbol(unit_symbol_name, _obj_file['symbols'])
+            errors = []
+            obj_file.read_obj_file_symbol_body(obj_file_symbol, errors)
+            if errors:
+                show_error(errors[0], obj_file_names[0])
+                return None
+
+            for _, symbol_index in relocation_table.get_relocations(obj_file_symbol.relocation_table):
+                relocation_symbol_name = symbol_table.get_symbol_name(symbol_index, _obj_file['symbol_table'])
+                if relocation_symbol_name not in reachable_symbols:
+                    pending_symbol_names.append(relocation_symbol_name)
+
+    return reachable_symbols
+
+
+def show_unreachable_symbols():
+    # the report of --gc, shown before linking
+    symbols_count = 0
+    machine_code_size = 0
+    for file_name, _obj_file in obj_files.items():
+        for symbol_name, symbol in _obj_file['symbols'].items():
+            if symbol_name not in reachable_symbol_names:
+                symbol_machine_code_size = obj_file.get_symbol_machine_code_size(symbol)
+                print(f"removed '{symbol_name}' ({file_name}): {symbol_machine_code_size} byte(s)")
+                symbols_count += 1
+                machine_code_size += symbol_machine_code_size
+
+    print(f'removed {symbols_count} unreachable symbol(s), {machine_code_size} byte(s)')
+
 
 def link_symbol(symbol_name, file_name=None):
     global link_base, link_offset
 
-    if not symbols.symbol_exists(symbol_name):
+    if not symbols.symbol_exists(symbol_name, linked_symbols):
         obj_file_names = get_symbol_obj_file_names(symbol_name)
         if not obj_file_names:
             show_error({
@@ -112,14 +318,8 @@ def link_symbol(symbol_name, file_name=None):
                 'info': [symbol_name]
             })
             return
-        elif len(obj_file_names) > 1:
-            show_error({
-                'name': 'AMBIGUOUS_SYMBOL',
-                'info': [symbol_name]
-            })
-            return
         elif file_name is None or obj_file_names[0] == file_name:
-            # copy the symbol from the object file symbols to the global symbols
+            # move the symbol from the object file symbols to the global symbols
             _obj_file = get_obj_file(obj_file_names[0])
 
             if _obj_file['header']['link_base'] is not None:
@@ -133,19 +333,25 @@ def link_symbol(symbol_name, file_name=None):
                     link_base = _obj_file['header']['link_base']
 
             obj_file_symbol = symbols.get_symbol(symbol_name, _obj_file['symbols'])
+            # the body of the symbol is only read now that it is linked
+            errors = []
+            obj_file.read_obj_file_symbol_body(obj_file_symbol, errors)
+            if errors:
+                show_error(errors[0], obj_file_names[0])
+                return
 
-            symbol_table.add_symbol(symbol_name)
-            symbol = symbols.add_symbol(symbol_name)
-
-            symbol['machine_code'] = obj_file_symbol['machine_code']
-            symbol['relocation_table'] = obj_file_symbol['relocation_table']
+            # the symbol of the object file itself is added to the global symbols (instead of a copy, as there might be
+            # hundreds of thousands of symbols)
+            symbol_table.add_symbol(symbol_name, linked_symbol_table)
+            symbol = symbols.add_symbol(symbol_name, None, linked_symbols, linked_symbol_table, obj_file_symbol)
 
             # rebuild the relocation table to use the symbol indexes from the global symbol table
-            relocation_table.rebuild(symbol['relocation_table'], _obj_file['symbol_table'])
+            relocation_table.rebuild(symbol.relocation_table, _obj_file['symbol_table'], linked_symbol_table,
+                                     _obj_file['index_map'])
 
             # set the machine code base to the current link offset and increment it for the next symbol to be linked
-            symbol['machine_code_base'] = link_offset
-            link_offset += len(symbol['machine_code'])
+            symbol.machine_code_base = link_offset
+            link_offset += len(symbol.machine_code)
 
 
 def link_obj_file(file_name):
@@ -155,7 +361,8 @@ def link_obj_file(file_name):
 
     _obj_file = get_obj_file(file_name)
     for symbol_name in _obj_file['symbols'].keys():
-        link_symbol(symbol_name, file_name)
+        if reachable_symbol_names is None or symbol_name in reachable_symbol_names:
+            link_symbol(symbol_name, file_name)
 
 
 def link_obj_files(file_names):
@@ -166,46 +373,73 @@ def link_obj_files(file_names):
 # main
 
 parser = argparse.ArgumentParser(description='the linker')
-parser.add_argument('file', nargs='+', help='object file(s) to be linked')
+parser.add_argument('file', nargs='+',
+                    help='object file(s) to be linked, and lib file(s) with object files linked if used')
 parser.add_argument('-d', '--dump', action='store_true', help='dump binary output')
+parser.add_argument('--dump-file', help='write the dump output into a file instead of stdout')
+parser.add_argument('--gc', action='store_true',
+                    help="link only the symbols reachable from 'main' and the kept symbols (when creating a cpu file)")
+parser.add_argument('--keep', action='append', default=[], metavar='SYMBOL',
+                    help='keep a symbol and the symbols reachable from it with --gc')
+parser.add_argument('-j', '--jobs', type=int, default=1, help='number of object files to be read in parallel')
 args = parser.parse_args()
 
 
 def main():
-    global args, current_obj_file_name
+    global args, current_obj_file_name, reachable_symbol_names
 
     obj_file_names = args.file
-    read_obj_files(obj_file_names)
+    read_obj_files(obj_file_names, args.jobs)
+
+    if not total_errors_count:
+        read_lib_members(args.keep if args.gc else [])
+
+    if not total_errors_count:
+        show_ambiguous_symbols()
 
     if not total_errors_count:
         main_obj_file_names = get_symbol_obj_file_names('main')
-        if len(main_obj_file_names) > 1:
-            # there can only be one 'main' symbol
-            show_error({
-                'name': 'DUPLICATE_SYMBOL',
-                'info': ['main']
-            }, '')
-        elif 1 == len(main_obj_file_names):
+        if 1 == len(main_obj_file_names):
             # if there is one 'main' symbol, then create a cpu file (executable)
             current_obj_file_name = ''
 
-            # link order:
-            #   1. the 'main' symbol
-            #   2. all other symbols of the object file that contains the 'main' symbol in the given order
-            #   3. all symbols of all other object files in the given order
-            link_symbol('main')
-            link_obj_file(main_obj_file_names[0])
-            del obj_files[main_obj_file_names[0]]
-            link_obj_files(obj_files.keys())
+            if args.gc:
+                for symbol_name in args.keep:
+                    if not get_symbol_obj_file_names(symbol_name):
+                        show_error({
+                            'name': 'UNKNOWN_SYMBOL',
+                            'info': [symbol_name]
+                        })
 
-            if not total_errors_count:
-                errors = []
-
-                cpu_file_name = os.path.splitext(os.path.basename(main_obj_file_names[0]))[0] + '.cpu'
-                cpu_file.write_cpu_file(cpu_file_name, errors, link_base=link_base, dump=args.dump)
+                if not total_errors_count:
+                    reachable_symbol_names = find_reachable_symbols(['main'] + args.keep)
+                    if reachable_symbol_names is not None:
+                        show_unreachable_symbols()
 
-                if errors:
-                    show_error(errors[0], '')
+            if not total_errors_count:
+                # link order:
+                #   1. the 'main' symbol
+                #   2. all other symbols of the object file that contains the 'main' symbol in the given order
+                #   3. all symbols of all other object files in the given order
+                link_symbol('main')
+                link_obj_file(main_obj_file_names[0])
+                del obj_files[main_obj_file_names[0]]
+                link_obj_files(obj_files.keys())
+
+                if not total_errors_count:
+                    errors = []
+
+                    cpu_file_name = os.path.splitext(os.path.basename(main_obj_file_names[0]))[0] + '.cpu'
+                    if args.dump_file is None:
+                        cpu_file.write_cpu_file(cpu_file_name, linked_symbol_table, linked_symbols, errors, link_base,
+                                                args.dump)
+                    else:
+                        with open(args.dump_file, 'w') as dump_file:
+                            cpu_file.write_cpu_file(cpu_file_name, linked_symbol_table, linked_symbols, errors,
+                                                    link_base, True, dump_file)
+
+                    if errors:
+                        show_error(errors[0], '')
         else:
             # if there is no 'main' symbol, then create a new object file (library)
 
@@ -215,7 +449,7 @@ def main():
 
             if not total_errors_count:
                 obj_file_name = 'output.obj'
-                obj_file.write_obj_file(obj_file_name)
+                obj_file.write_obj_file(obj_file_name, linked_symbol_table, linked_symbols)
 
 
 if '__main__' == __name__:
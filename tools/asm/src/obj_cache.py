@@ -0,0 +1,236 @@
+# the object cache keeps the object files of previously assembled source files in a cache directory, so that unchanged
+# source files do not have to be assembled again
+#
+# an entry is keyed by a hash of the source text, the assembler version and the options affecting the output, and
+# contains the object file, the dump output (if any) and the report of the peephole optimizer (if any); files the
+# object file depends on besides the source file (e.g. using .incbin) are checked against their hashes when reading an
+# entry
+#
+# entry file format:
+#
+#   <size of the object file in decimal> '\n'
+#   <number of dependencies in decimal> '\n'
+#   <the dependencies>
+#   <number of optimized procedures in decimal> '\n'
+#   <the optimized procedures>
+#   <object file>
+#   <dump output (utf-8)>
+#
+# a dependency:
+#   <hash of the file> ' ' <file name (utf-8, relative to the directory of the source file)> '\n'
+#
+# an optimized procedure (see asm.Assembler.assemble):
+#   <number of instructions removed in decimal> ' ' <number of bytes removed in decimal> ' ' <procedure name> '\n'
+#
+# entries are written to a temporary file first, which is then renamed, so that concurrent assemblers never see a
+# partial entry; reading an entry updates its modification time, and when the cache exceeds its maximum size, the least
+# recently used entries are removed
+
+import hashlib
+import os
+import tempfile
+import time
+
+default_max_cache_size = 64 * 1024 * 1024
+
+entry_file_ext = '.entry'
+temp_file_ext = '.tmp'
+read_chunk_size = 1024 * 1024
+temp_file_max_age = 60 * 60  # temporary files older than this were left behind by an interrupted assembler
+
+
+def get_version(modules):
+    # the version is a hash of the sources of the given modules, so that changing the assembler in any way invalidates
+    # all entries
+    hash = hashlib.sha256()
+    for module in modules:
+        try:
+            source = module.__loader__.get_source(module.__name__)
+        except (AttributeError, ImportError, OSError):
+            source = None
+        if source is None:
+            # without the source, there is no way to tell assembler versions apart
+            return None
+        hash.update(source.encode())
+
+    return hash.hexdigest()
+
+
+def hash_file(hash, file_name):
+    # returns False if the file cannot be read
+    try:
+        with open(file_name, 'rb') as file:
+            # files can be large, so hash them chunk by chunk
+            for chunk in iter(lambda: file.read(read_chunk_size), b''):
+                hash.update(chunk)
+    except OSError:
+        return False
+
+    return True
+
+
+def get_key(file_name, version, options):
+    # returns None if the source file cannot be read (the assembler reports that)
+    hash = hashlib.sha256()
+    hash.update(version.encode())
+    hash.update(repr(options).encode())
+
+    if not hash_file(hash, file_name):
+        return None
+
+    return hash.hexdigest()
+
+
+def get_dependency_hash(file_name):
+    # returns None if the file cannot be read
+    hash = hashlib.sha256()
+
+    if not hash_file(hash, file_name):
+        return None
+
+    return hash.hexdigest()
+
+
+def get_entry_file_name(cache_dir, key):
+    return os.path.join(cache_dir, key + entry_file_ext)
+
+
+def read_entry(cache_dir, key, dir_name=''):
+    # returns the object file, the dump output and the optimized procedures, or None if there is no (valid) entry or any
+    # dependency changed
+    entry_file_name = get_entry_file_name(cache_dir, key)
+
+    try:
+        with open(entry_file_name, 'rb') as entry:
+            buffer = entry.read()
+        os.utime(entry_file_name)
+    except OSError:
+        # no entry, or removed by another assembler in the meantime
+        return None
+
+    obj_file_size, separator, buffer = buffer.partition(b'\n')
+    if not separator or not obj_file_size.isdigit():
+        return None
+    obj_file_size = int(obj_file_size)
+
+    dependencies_count, separator, buffer = buffer.partition(b'\n')
+    if not separator or not dependencies_count.isdigit():
+        return None
+    for _ in range(int(dependencies_count)):
+        dependency, separator, buffer = buffer.partition(b'\n')
+        dependency_hash, separator, dependency_file_name = dependency.partition(b' ')
+        if not separator:
+            return None
+        try:
+            dependency_file_name = os.path.join(dir_name, dependency_file_name.decode())
+        except UnicodeDecodeError:
+            return None
+        if dependency_hash.decode('ascii', 'replace') != get_dependency_hash(dependency_file_name):
+            return None
+
+    optimizations = {}
+    optimizations_count, separator, buffer = buffer.partition(b'\n')
+    if not separator or not optimizations_count.isdigit():
+        return None
+    for _ in range(int(optimizations_count)):
+        optimization, separator, buffer = buffer.partition(b'\n')
+        optimization = optimization.split(b' ')
+        if not separator or 3 != len(optimization) or not optimization[0].isdigit() or \
+                not optimization[1].isdigit():
+            return None
+        try:
+            optimizations[optimization[2].decode()] = [int(optimization[0]), int(optimization[1])]
+        except UnicodeDecodeError:
+            return None
+
+    if obj_file_size > len(buffer):
+        return None
+
+    try:
+        output = buffer[obj_file_size:].decode()
+    except UnicodeDecodeError:
+        return None
+
+    return buffer[:obj_file_size], output, optimizations
+
+
+def write_entry(cache_dir, key, obj_file_buffer, output='', optimizations=None, dependencies=(), dir_name=''):
+    if optimizations is None:
+        optimizations = {}
+
+    dependency_hashes = []
+    for dependency_file_name in dependencies:
+        dependency_hash = get_dependency_hash(os.path.join(dir_name, dependency_file_name))
+        if dependency_hash is None or '\n' in dependency_file_name:
+            return
+        dependency_hashes.append((dependency_hash, dependency_file_name))
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, temp_file_name = tempfile.mkstemp(temp_file_ext, dir=cache_dir)
+    except OSError:
+        # the cache is only an optimization
+        return
+
+    try:
+        with os.fdopen(fd, 'wb') as entry:
+            entry.write(f'{len(obj_file_buffer)}\n'.encode())
+            entry.write(f'{len(dependency_hashes)}\n'.encode())
+            for dependency_hash, dependency_file_name in dependency_hashes:
+                entry.write(f'{dependency_hash} {dependency_file_name}\n'.encode())
+            entry.write(f'{len(optimizations)}\n'.encode())
+            for proc_name, (instructions_count, bytes_count) in optimizations.items():
+                entry.write(f'{instructions_count} {bytes_count} {proc_name}\n'.encode())
+            entry.write(obj_file_buffer)
+            entry.write(output.encode())
+        os.replace(temp_file_name, get_entry_file_name(cache_dir, key))
+    except OSError:
+        try:
+            os.remove(temp_file_name)
+        except OSError:
+            pass
+
+
+def get_entries(cache_dir):
+    # returns the modification time, size and file name of all entries
+    entries = []
+    now = time.time()
+
+    try:
+        with os.scandir(cache_dir) as it:
+            for dir_entry in it:
+                try:
+                    stat = dir_entry.stat()
+                    if dir_entry.name.endswith(entry_file_ext):
+                        entries.append((stat.st_mtime, stat.st_size, dir_entry.path))
+                    elif dir_entry.name.endswith(temp_file_ext) and now - stat.st_mtime > temp_file_max_age:
+                        os.remove(dir_entry.path)
+                except OSError:
+                    # removed by another assembler in the meantime
+                    pass
+    except OSError:
+        pass
+
+    return entries
+
+
+def evict(cache_dir, max_cache_size=default_max_cache_size):
+    # remove the least recently used entries until the cache fits into its maximum size
+    entries = get_entries(cache_dir)
+    cache_size = sum(size for mtime, size, entry_file_name in entries)
+
+    for mtime, size, entry_file_name in sorted(entries):
+        if cache_size <= max_cache_size:
+            break
+        try:
+            os.remove(entry_file_name)
+        except OSError:
+            pass
+        cache_size -= size
+
+
+def get_stats(cache_dir):
+    # returns the number of entries and the total size of the cache
+    entries = get_entries(cache_dir)
+
+    return len(entries), sum(size for mtime, size, entry_file_name in entries)
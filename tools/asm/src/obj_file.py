@@ -1,16 +1,26 @@
-# object file format:
-#   4 bytes  header
+# object file format (version 1):
+#   6 bytes  header
 #   ? bytes  symbol table
 #   ? bytes  the symbols
 #   --- eof ---
 #
+# object file format (version 2 and 3):
+#   6 bytes  header
+#   1 word   number of symbol names in symbol table
+#   1 word   number of buckets of hash table
+#   ? bytes  symbol directory
+#   ? bytes  hash table
+#   ? bytes  the symbol names in symbol table
+#   ? bytes  the symbol bodies
+#   --- eof ---
+#
 #
 # header:
 #   3 bytes  file signature ('MPO')
 #   1 byte   object file version
 #   1 word   link base (0xffff = use default)
 #
-# symbol table:
+# symbol table (version 1):
 #   1 word   number of symbol names in symbol table
 #   ? bytes  the symbol names in symbol table
 #
@@ -29,79 +39,230 @@
 # a relocation:
 #   1 word   machine code offset
 #   1 word   symbol index
+#
+# a symbol in symbol directory (version 2 and 3), one for each symbol name in symbol table in the same order:
+#   1 dword  file offset of symbol name
+#   1 dword  file offset of symbol body
+#   1 word   size of machine code (0xffff = external symbol)
+#   1 word   procedure index
+#   1 word   number of relocations
+#   1 word   next symbol in hash table bucket (index in symbol table, 0 = none)
+#
+# hash table (version 2 and 3):
+#   ? words  the first symbol of each bucket (index in symbol table, 0 = none)
+#
+# a symbol body (version 2 and 3, none for an external symbol):
+#   ? bytes  machine code
+#   ? bytes  the relocations (version 3: delta-encoded varints, see relocation_table.encode_varints)
+#
+# the symbol bodies are in the order of the symbol directory, so that (in version 3) the relocations of a symbol end
+# where the body of the next symbol starts (or at the end of the file)
+#
+# a symbol name is found by hashing it (crc-32, modulo the number of buckets) and following the symbols of its bucket in
+# the symbol directory; the symbol directory allows reading a symbol without reading any preceding symbol, so that the
+# bodies of the symbols are only read when they are used
 
-import binutils
 import fileutils
+import relocation_table
 import symbol_table
 import symbols
 
+import array
 import os
+import struct
+import zlib
 
 obj_file_signature = 'MPO'
-max_obj_file_version = 1
+max_obj_file_version = 3
+
+header_struct = struct.Struct('<3sBH')  # file signature, object file version, link base
+word_struct = struct.Struct('<H')
+symbol_header_struct = struct.Struct('<HH')  # size of machine code, procedure index
+relocation_struct = struct.Struct('<HH')  # machine code offset, symbol index
+directory_header_struct = struct.Struct('<HH')  # number of symbol names, number of buckets
+directory_entry_struct = struct.Struct('<IIHHHH')  # see symbol directory
+
+# machine code up to this size is copied instead of being a view into the object file, as a view takes more memory
+max_copied_machine_code_size = 128
+
+
+def get_obj_file_header_size():
+    return header_struct.size
+
+
+def get_obj_file_symbol_table_size(symbol_names):
+    return word_struct.size + sum(1 + len(symbol_name) for symbol_name in symbol_names)
 
 
-def build_obj_file_header(link_base=None):
+def get_obj_file_symbols_size(obj_file_symbols):
+    size = 0
+    for symbol in obj_file_symbols:
+        if symbol is not None:
+            size += symbol_header_struct.size + len(symbol.machine_code) + word_struct.size + \
+                relocation_struct.size * relocation_table.get_relocations_count(symbol.relocation_table)
+        else:
+            # external symbol
+            size += word_struct.size
+
+    return size
+
+
+def get_obj_file_directory_size(symbol_names, obj_file_symbols, obj_file_relocation_tables):
+    # the symbol directory, hash table, symbol names and symbol bodies (version 2 and 3)
+    size = directory_header_struct.size + directory_entry_struct.size * len(symbol_names) + \
+        word_struct.size * get_hash_table_size(symbol_names)
+    size += sum(1 + len(symbol_name) for symbol_name in symbol_names)
+    for symbol, obj_file_relocation_table in zip(obj_file_symbols, obj_file_relocation_tables):
+        if symbol is not None:
+            size += len(symbol.machine_code) + len(obj_file_relocation_table)
+
+    return size
+
+
+def get_hash_table_size(symbol_names):
+    # the number of buckets, one per symbol name
+    return len(symbol_names)
+
+
+def hash_symbol_name(symbol_name, hash_table_size):
+    return zlib.crc32(symbol_name.encode('ascii')) % hash_table_size
+
+
+def build_obj_file_header(buffer, offset=0, link_base=None, obj_file_version=max_obj_file_version):
+    # packs the header into the buffer at the offset and returns the offset after it
     if link_base is None:
         link_base = 0xffff  # 0xffff = use default
 
-    buffer = bytearray()
-    buffer.extend(map(ord, obj_file_signature))
-    buffer.append(max_obj_file_version)
-    buffer.extend(binutils.word_to_le(link_base))
+    header_struct.pack_into(buffer, offset, obj_file_signature.encode(), obj_file_version, link_base)
 
-    return buffer
+    return offset + header_struct.size
 
 
-def build_obj_file_symbol_table(_symbol_table=None):
-    _symbol_table = symbol_table.get_symbol_table(_symbol_table)[1:]  # remove index 0 (global scope)
+def build_obj_file_symbol_table(buffer, offset, symbol_names):
+    # packs the symbol table into the buffer at the offset and returns the offset after it
+    word_struct.pack_into(buffer, offset, len(symbol_names))
+    offset += word_struct.size
+    for symbol_name in symbol_names:
+        buffer[offset] = len(symbol_name)
+        buffer[offset + 1:offset + 1 + len(symbol_name)] = symbol_name.encode('ascii')
+        offset += 1 + len(symbol_name)
 
-    buffer = bytearray()
-    symbol_table_size = len(_symbol_table)
-    buffer.extend(binutils.word_to_le(symbol_table_size))
-    for symbol_name in _symbol_table:
-        buffer.append(len(symbol_name))
-        buffer.extend(map(ord, symbol_name))
+    return offset
 
-    return buffer
 
+def build_obj_file_symbols(buffer, offset, obj_file_symbols):
+    # packs the symbols into the buffer at the offset and returns the offset after them
+    for symbol in obj_file_symbols:
+        if symbol is not None:
+            machine_code = symbol.machine_code
+            symbol_header_struct.pack_into(buffer, offset, len(machine_code), symbol.proc_index)
+            offset += symbol_header_struct.size
 
-def build_obj_file_symbols(_symbol_table=None, _symbols=None):
-    _symbol_table = symbol_table.get_symbol_table(_symbol_table)
+            buffer[offset:offset + len(machine_code)] = machine_code
+            offset += len(machine_code)
 
-    buffer = bytearray()
-    for symbol_name in _symbol_table[1:]:  # skip index 0 (global scope)
-        if symbols.symbol_exists(symbol_name, _symbols):
-            symbol = symbols.get_symbol(symbol_name, _symbols)
+            _relocation_table = symbol.relocation_table
+            word_struct.pack_into(buffer, offset, relocation_table.get_relocations_count(_relocation_table))
+            offset += word_struct.size
 
-            machine_code_size = len(symbol['machine_code'])
-            buffer.extend(binutils.word_to_le(machine_code_size))
+            obj_file_relocation_table = relocation_table.to_bytes(_relocation_table)
+            buffer[offset:offset + len(obj_file_relocation_table)] = obj_file_relocation_table
+            offset += len(obj_file_relocation_table)
+        else:
+            # external symbol
+            word_struct.pack_into(buffer, offset, 0xffff)
+            offset += word_struct.size
 
-            buffer.extend(binutils.word_to_le(symbol['proc_index']))
+    return offset
 
-            buffer.extend(symbol['machine_code'])
 
-            relocation_table_size = len(symbol['relocation_table'])
-            buffer.extend(binutils.word_to_le(relocation_table_size))
-            for relocation in symbol['relocation_table']:
-                buffer.extend(binutils.word_to_le(relocation['machine_code_offset']))
-                buffer.extend(binutils.word_to_le(relocation['symbol_index']))
+def build_obj_file_relocation_table(_relocation_table, obj_file_version=max_obj_file_version):
+    # returns the relocations as stored in the symbol body
+    if obj_file_version >= 3:
+        return relocation_table.encode_varints(_relocation_table)
+    else:
+        return relocation_table.to_bytes(_relocation_table)
+
+
+def build_obj_file_directory(buffer, offset, symbol_names, obj_file_symbols, obj_file_relocation_tables):
+    # packs the symbol directory, hash table, symbol names and symbol bodies (version 2 and 3) into the buffer at the
+    # offset and returns the offset after them
+    hash_table_size = get_hash_table_size(symbol_names)
+    directory_header_struct.pack_into(buffer, offset, len(symbol_names), hash_table_size)
+    offset += directory_header_struct.size
+
+    # the symbols of a bucket are chained in the symbol directory
+    hash_table = [0] * hash_table_size
+    next_indexes = [0] * len(symbol_names)
+    for index, symbol_name in enumerate(symbol_names, 1):
+        bucket = hash_symbol_name(symbol_name, hash_table_size)
+        next_indexes[index - 1] = hash_table[bucket]
+        hash_table[bucket] = index
+
+    directory_offset = offset
+    offset += directory_entry_struct.size * len(symbol_names)
+    if hash_table:
+        struct.pack_into(f'<{hash_table_size}H', buffer, offset, *hash_table)
+    offset += word_struct.size * hash_table_size
+
+    name_offset = offset
+    body_offset = name_offset + sum(1 + len(symbol_name) for symbol_name in symbol_names)
+    for symbol_name, symbol, obj_file_relocation_table, next_index in zip(symbol_names, obj_file_symbols,
+                                                                          obj_file_relocation_tables, next_indexes):
+        if symbol is not None:
+            machine_code = symbol.machine_code
+            directory_entry_struct.pack_into(buffer, directory_offset, name_offset, body_offset, len(machine_code),
+                                             symbol.proc_index,
+                                             relocation_table.get_relocations_count(symbol.relocation_table),
+                                             next_index)
+
+            buffer[body_offset:body_offset + len(machine_code)] = machine_code
+            body_offset += len(machine_code)
+            buffer[body_offset:body_offset + len(obj_file_relocation_table)] = obj_file_relocation_table
+            body_offset += len(obj_file_relocation_table)
         else:
             # external symbol
-            buffer.extend([0xff, 0xff])
+            directory_entry_struct.pack_into(buffer, directory_offset, name_offset, 0, 0xffff, 0, 0, next_index)
+        directory_offset += directory_entry_struct.size
 
-    return buffer
+        buffer[name_offset] = len(symbol_name)
+        buffer[name_offset + 1:name_offset + 1 + len(symbol_name)] = symbol_name.encode('ascii')
+        name_offset += 1 + len(symbol_name)
 
+    return body_offset
 
-def write_obj_file(file_name, _symbol_table=None, _symbols=None, link_base=None):
-    obj_file_header = build_obj_file_header(link_base)
-    obj_file_symbol_table = build_obj_file_symbol_table(_symbol_table)
-    obj_file_symbols = build_obj_file_symbols(_symbol_table, _symbols)
 
-    buffer = bytearray()
-    buffer.extend(obj_file_header)
-    buffer.extend(obj_file_symbol_table)
-    buffer.extend(obj_file_symbols)
+def build_obj_file(_symbol_table, _symbols, link_base=None, obj_file_version=max_obj_file_version):
+    symbol_names = symbol_table.get_symbol_names(_symbol_table)[1:]  # skip index 0 (global scope)
+    # the symbols in the order of the symbol table, None for external symbols
+    obj_file_symbols = [symbols.get_symbol(symbol_name, _symbols) if symbols.symbol_exists(symbol_name, _symbols)
+                        else None for symbol_name in symbol_names]
+
+    # the size of the object file is known in advance, so that it is packed into a single buffer
+    if 1 == obj_file_version:
+        buffer = bytearray(get_obj_file_header_size() + get_obj_file_symbol_table_size(symbol_names) +
+                           get_obj_file_symbols_size(obj_file_symbols))
+
+        offset = build_obj_file_header(buffer, 0, link_base, obj_file_version)
+        offset = build_obj_file_symbol_table(buffer, offset, symbol_names)
+        build_obj_file_symbols(buffer, offset, obj_file_symbols)
+    else:
+        # the size of the relocations depends on their encoding, so they are built first
+        obj_file_relocation_tables = [
+            None if symbol is None else build_obj_file_relocation_table(symbol.relocation_table, obj_file_version)
+            for symbol in obj_file_symbols]
+
+        buffer = bytearray(get_obj_file_header_size() +
+                           get_obj_file_directory_size(symbol_names, obj_file_symbols, obj_file_relocation_tables))
+
+        offset = build_obj_file_header(buffer, 0, link_base, obj_file_version)
+        build_obj_file_directory(buffer, offset, symbol_names, obj_file_symbols, obj_file_relocation_tables)
+
+    return buffer
+
+
+def write_obj_file(file_name, _symbol_table, _symbols, link_base=None, obj_file_version=max_obj_file_version):
+    buffer = build_obj_file(_symbol_table, _symbols, link_base, obj_file_version)
 
     # fileutils.dump_buffer(buffer)
 
@@ -109,171 +270,368 @@ def write_obj_file(file_name, _symbol_table=None, _symbols=None, link_base=None)
         obj.write(buffer)
 
 
-def read_obj_file_header(file, errors=None):
-    file_signature = fileutils.read_str(file, len(obj_file_signature))
-    if file_signature is None:
+def read_word(buffer, offset):
+    # returns the word at the offset, or None at the end of the buffer
+    if offset + 2 <= len(buffer):
+        return word_struct.unpack_from(buffer, offset)[0]
+    else:
+        return None
+
+
+def read_machine_code(buffer, offset, machine_code_size):
+    # the machine code is a view into the buffer, unless it is small enough that a copy takes less memory than a view
+    if machine_code_size <= max_copied_machine_code_size:
+        return bytes(buffer[offset:offset + machine_code_size])
+    else:
+        return buffer[offset:offset + machine_code_size]
+
+
+def read_obj_file_header(buffer, offset=0, errors=None):
+    # returns the header and the offset after it
+    file_signature = bytes(buffer[offset:offset + len(obj_file_signature)])
+    if len(file_signature) < len(obj_file_signature):
         if errors is not None:
             errors.append({
                 'name': 'UNEXPECTED_EOF',
                 'info': []
             })
-        return None
-    elif file_signature == obj_file_signature:
-        obj_file_version = fileutils.read_byte(file)
-        if obj_file_version is None:
+        return None, offset
+    elif file_signature == obj_file_signature.encode():
+        offset += len(obj_file_signature)
+
+        if offset >= len(buffer):
             if errors is not None:
                 errors.append({
                     'name': 'CORRUPT_FILE_HEADER',
                     'info': []
                 })
-            return None
-        elif obj_file_version > max_obj_file_version:
+            return None, offset
+        obj_file_version = buffer[offset]
+        offset += 1
+        if obj_file_version > max_obj_file_version:
             if errors is not None:
                 errors.append({
                     'name': 'INCOMPATIBLE_OBJ_FILE_VERSION',
-                    'info': []
+                    'info': [obj_file_version, max_obj_file_version]
                 })
-            return None
+            return None, offset
 
-        link_base = fileutils.read_word_le(file)
+        link_base = read_word(buffer, offset)
         if link_base is None:
             if errors is not None:
                 errors.append({
                     'name': 'UNEXPECTED_EOF',
                     'info': []
                 })
-            return None
+            return None, offset
         else:
+            offset += 2
             if 0xffff == link_base:
                 link_base = None  # 0xffff = use default
 
         return {
             'obj_file_version': obj_file_version,
             'link_base': link_base
-        }
+        }, offset
     else:
         if errors is not None:
             errors.append({
                 'name': 'NOT_OBJ_FILE',
                 'info': []
             })
-        return None
+        return None, offset
+
 
+def read_symbol_name(buffer, offset):
+    # one byte containing the length of the symbol name, then the symbol name; returns the symbol name (None if it is
+    # invalid) and the offset after it
+    symbol_name = None
+    if offset < len(buffer):
+        length = buffer[offset]
+        if offset + 1 + length <= len(buffer):
+            try:
+                symbol_name = bytes(buffer[offset + 1:offset + 1 + length]).decode('ascii')
+            except UnicodeDecodeError:
+                pass
+            offset += 1 + length
 
-def read_obj_file_symbol_table(file, errors=None):
-    symbol_table_size = fileutils.read_word_le(file)
+    return symbol_name, offset
+
+
+def read_obj_file_symbol_table(buffer, offset=0, errors=None):
+    # returns the symbol table and the offset after it
+    symbol_table_size = read_word(buffer, offset)
     if symbol_table_size is None:
         if errors is not None:
             errors.append({
                 'name': 'UNEXPECTED_EOF',
                 'info': []
             })
-        return None
+        return None, offset
     else:
-        _symbol_table = [None]  # add index 0 (global scope)
+        offset += 2
+
+        _symbol_table = symbol_table.new_symbol_table()
         for i in range(symbol_table_size):
-            symbol_name = fileutils.read_str(file)
+            symbol_name, offset = read_symbol_name(buffer, offset)
             if symbol_name is None:
                 if errors is not None:
                     errors.append({
                         'name': 'CORRUPT_SYMBOL_TABLE',
                         'info': []
                     })
-                return None
+                return None, offset
             elif symbol_table.symbol_exists(symbol_name, _symbol_table):
                 if errors is not None:
                     errors.append({
                         'name': 'DUPLICATE_SYMBOL',
                         'info': [symbol_name]
                     })
-                return None
+                return None, offset
             else:
                 symbol_table.add_symbol(symbol_name, _symbol_table)
 
-        return _symbol_table
-
+        return _symbol_table, offset
 
-def read_obj_file_symbols(file, _symbol_table=None, errors=None):
-    _symbol_table = symbol_table.get_symbol_table(_symbol_table)
 
+def read_obj_file_symbols(buffer, offset, _symbol_table, errors=None):
+    # returns the symbols and the offset after them; the machine code of the symbols are views into the buffer, unless
+    # small (see read_machine_code)
     _symbols = {}
-    for symbol_name in _symbol_table[1:]:  # skip index 0 (global scope)
-        machine_code_size = fileutils.read_word_le(file)
+    for symbol_name in symbol_table.get_symbol_names(_symbol_table)[1:]:  # skip index 0 (global scope)
+        machine_code_size = read_word(buffer, offset)
         if machine_code_size is None:
             if errors is not None:
                 errors.append({
                     'name': 'UNEXPECTED_EOF',
                     'info': []
                 })
-            return None
-        elif machine_code_size != 0xffff:
+            return None, offset
+        offset += 2
+
+        if machine_code_size != 0xffff:
             # if not external symbol
             symbol = symbols.add_symbol(symbol_name, None, _symbols, _symbol_table)
 
-            proc_index = fileutils.read_word_le(file)
+            proc_index = read_word(buffer, offset)
             if proc_index is None:
                 if errors is not None:
                     errors.append({
                         'name': 'UNEXPECTED_EOF',
                         'info': []
                     })
-                return None
+                return None, offset
             else:
-                symbol['proc_index'] = proc_index
+                symbol.proc_index = proc_index
+                offset += 2
 
-            machine_code = file.read(machine_code_size)
-            if len(machine_code) == machine_code_size:
-                symbol['machine_code'].extend(machine_code)
+            if offset + machine_code_size <= len(buffer):
+                symbol.machine_code = read_machine_code(buffer, offset, machine_code_size)
+                offset += machine_code_size
             else:
                 if errors is not None:
                     errors.append({
                         'name': 'CORRUPT_MACHINE_CODE',
                         'info': []
                     })
-                return None
+                return None, offset
 
-            relocation_table_size = fileutils.read_word_le(file)
+            relocation_table_size = read_word(buffer, offset)
             if relocation_table_size is None:
                 if errors is not None:
                     errors.append({
                         'name': 'UNEXPECTED_EOF',
                         'info': []
                     })
-                return None
+                return None, offset
+            offset += 2
+
+            if offset + relocation_struct.size * relocation_table_size <= len(buffer):
+                symbol.relocation_table = relocation_table.from_bytes(
+                    buffer[offset:offset + relocation_struct.size * relocation_table_size])
+                offset += relocation_struct.size * relocation_table_size
             else:
-                for i in range(relocation_table_size):
-                    machine_code_offset = fileutils.read_word_le(file)
-                    symbol_index = fileutils.read_word_le(file)
-                    if machine_code_offset is None or symbol_index is None:
-                        if errors is not None:
-                            errors.append({
-                                'name': 'CORRUPT_RELOCATION_TABLE',
-                                'info': []
-                            })
-                        return None
-                    else:
-                        symbol['relocation_table'].append({
-                            'machine_code_offset': machine_code_offset,
-                            'symbol_index': symbol_index
-                        })
+                if errors is not None:
+                    errors.append({
+                        'name': 'CORRUPT_RELOCATION_TABLE',
+                        'info': []
+                    })
+                return None, offset
 
-    return _symbols
+    return _symbols, offset
 
 
-def read_obj_file(file_name, errors=None):
-    if os.path.isfile(file_name):
-        with open(file_name, 'rb') as obj:
-            header = read_obj_file_header(obj, errors)
-            _symbol_table = None
-            _symbols = None
+def read_obj_file_directory(buffer, offset=0, obj_file_version=max_obj_file_version, errors=None):
+    # returns the symbol table and the symbols of a version 2 or 3 object file; the bodies of the symbols are not read,
+    # until the symbols are used (see read_obj_file_symbol_body)
+    if offset + directory_header_struct.size > len(buffer):
+        if errors is not None:
+            errors.append({
+                'name': 'UNEXPECTED_EOF',
+                'info': []
+            })
+        return None, None
+    symbol_table_size, hash_table_size = directory_header_struct.unpack_from(buffer, offset)
+    offset += directory_header_struct.size
 
-            if not errors:
-                _symbol_table = read_obj_file_symbol_table(obj, errors)
+    directory_size = directory_entry_struct.size * symbol_table_size
+    if offset + directory_size + word_struct.size * hash_table_size > len(buffer):
+        if errors is not None:
+            errors.append({
+                'name': 'CORRUPT_SYMBOL_DIRECTORY',
+                'info': []
+            })
+        return None, None
+    directory = list(directory_entry_struct.iter_unpack(buffer[offset:offset + directory_size]))
+
+    _symbol_table = symbol_table.new_symbol_table()
+    for entry in directory:
+        symbol_name, _ = read_symbol_name(buffer, entry[0])  # file offset of symbol name
+        if symbol_name is None:
+            if errors is not None:
+                errors.append({
+                    'name': 'CORRUPT_SYMBOL_TABLE',
+                    'info': []
+                })
+            return None, None
+        elif symbol_table.symbol_exists(symbol_name, _symbol_table):
+            if errors is not None:
+                errors.append({
+                    'name': 'DUPLICATE_SYMBOL',
+                    'info': [symbol_name]
+                })
+            return None, None
+        else:
+            symbol_table.add_symbol(symbol_name, _symbol_table)
+
+    # the end of each symbol body is the start of the next one
+    body_end_offsets = []
+    body_end_offset = len(buffer)
+    for _, body_offset, machine_code_size, *_ in reversed(directory):
+        body_end_offsets.append(body_end_offset)
+        if machine_code_size != 0xffff:
+            body_end_offset = body_offset
+    body_end_offsets.reverse()
+
+    _symbols = {}
+    for symbol_name, entry, body_end_offset in zip(symbol_table.get_symbol_names(_symbol_table)[1:], directory,
+                                                   body_end_offsets):  # skip index 0 (global scope)
+        _, body_offset, machine_code_size, proc_index, relocations_count, _ = entry
+        if machine_code_size != 0xffff:
+            # if not external symbol
+            if obj_file_version >= 3:
+                relocation_table_size = body_end_offset - body_offset - machine_code_size
+            else:
+                relocation_table_size = relocation_struct.size * relocations_count
+
+            if body_offset + machine_code_size > len(buffer):
+                if errors is not None:
+                    errors.append({
+                        'name': 'CORRUPT_MACHINE_CODE',
+                        'info': []
+                    })
+                return None, None
+            elif relocation_table_size < 0 or body_offset + machine_code_size + relocation_table_size > len(buffer):
+                if errors is not None:
+                    errors.append({
+                        'name': 'CORRUPT_RELOCATION_TABLE',
+                        'info': []
+                    })
+                return None, None
+
+            symbol = symbols.add_symbol(symbol_name, None, _symbols, _symbol_table, symbols.Symbol(body=(
+                buffer, body_offset, machine_code_size, relocations_count, relocation_table_size, obj_file_version)))
+            symbol.proc_index = proc_index
+
+    return _symbol_table, _symbols
+
+
+def read_obj_file_symbol_body(symbol, errors=None):
+    # reads the machine code and the relocation table of a symbol of a version 2 or 3 object file, if not read yet (the
+    # symbol directory was validated when reading it, but not the encoding of the relocations); returns None if the
+    # relocations are corrupt
+    body = symbol.body
+    if body is not None:
+        symbol.body = None
+        buffer, body_offset, machine_code_size, relocations_count, relocation_table_size, obj_file_version = body
+        symbol.machine_code = read_machine_code(buffer, body_offset, machine_code_size)
+
+        offset = body_offset + machine_code_size
+        if obj_file_version >= 3:
+            symbol.relocation_table = relocation_table.decode_varints(buffer[offset:offset + relocation_table_size],
+                                                                      relocations_count)
+            if symbol.relocation_table is None:
+                if errors is not None:
+                    errors.append({
+                        'name': 'CORRUPT_RELOCATION_TABLE',
+                        'info': []
+                    })
+                return None
+        else:
+            symbol.relocation_table = relocation_table.from_bytes(buffer[offset:offset + relocation_table_size])
+
+    return symbol
+
+
+def get_symbol_machine_code_size(symbol):
+    # returns the size of the machine code of a symbol, without reading the body of the symbol
+    if symbol.body is not None:
+        return symbol.body[2]  # size of machine code
+    else:
+        return len(symbol.machine_code)
+
+
+def find_obj_file_symbol(buffer, symbol_name):
+    # looks up a symbol name in a version 2 or 3 object file using its hash table, without reading the symbol table;
+    # returns the index of the symbol name in the symbol table (0 if not found) and the symbol in symbol directory
+    offset = header_struct.size
+    if offset + directory_header_struct.size > len(buffer):
+        return 0, None
+    symbol_table_size, hash_table_size = directory_header_struct.unpack_from(buffer, offset)
+    offset += directory_header_struct.size
+    if not hash_table_size:
+        return 0, None
+
+    hash_table_offset = offset + directory_entry_struct.size * symbol_table_size
+    bucket_offset = hash_table_offset + word_struct.size * hash_symbol_name(symbol_name, hash_table_size)
+    if bucket_offset + word_struct.size > len(buffer):
+        return 0, None
+
+    index = word_struct.unpack_from(buffer, bucket_offset)[0]
+    visited = 0
+    while 0 < index <= symbol_table_size and visited < symbol_table_size:
+        entry = directory_entry_struct.unpack_from(buffer, offset + directory_entry_struct.size * (index - 1))
+        if read_symbol_name(buffer, entry[0])[0] == symbol_name:
+            return index, entry
+        index = entry[5]  # next symbol in hash table bucket
+        visited += 1  # a corrupt hash table might contain a cycle
+
+    return 0, None
+
+
+def read_obj_file_buffer(buffer, errors=None):
+    # returns the header, the symbol table and the symbols of an object file in the buffer (e.g. a member of a library)
+    header, offset = read_obj_file_header(buffer, 0, errors)
+    _symbol_table = None
+    _symbols = None
+
+    if not errors:
+        if header['obj_file_version'] <= 1:
+            _symbol_table, offset = read_obj_file_symbol_table(buffer, offset, errors)
 
             if not errors:
-                _symbols = read_obj_file_symbols(obj, _symbol_table, errors)
+                _symbols, offset = read_obj_file_symbols(buffer, offset, _symbol_table, errors)
+        else:
+            _symbol_table, _symbols = read_obj_file_directory(buffer, offset, header['obj_file_version'], errors)
+
+    return header, _symbol_table, _symbols
 
-            return header, _symbol_table, _symbols
+
+def read_obj_file(file_name, errors=None):
+    if os.path.isfile(file_name):
+        # the object file is memory-mapped and read using views into the mapping, so that the machine code of the
+        # symbols (unless small) is not copied until it is patched
+        return read_obj_file_buffer(fileutils.map_file(file_name), errors)
     else:
         if errors is not None:
             errors.append({
@@ -281,3 +639,57 @@ def read_obj_file(file_name, errors=None):
                 'info': [file_name]
             })
         return None, None, None
+
+
+def detach_obj_file_symbols(_symbols):
+    # returns the symbols of an object file without any view into the memory-mapped object file, so that they can be
+    # passed to another process, which attaches them to its own mapping of the object file (see attach_obj_file_symbols)
+    # the symbols not read yet are passed as an array of their procedure indexes and bodies, as unpickling hundreds of
+    # thousands of symbols takes almost as long as reading them
+    bodies = array.array('I')
+    read_symbols = {}
+    for symbol_name, symbol in _symbols.items():
+        if symbol.body is None:
+            if isinstance(symbol.machine_code, memoryview):
+                symbol.machine_code = bytes(symbol.machine_code)
+            read_symbols[symbol_name] = symbol
+        else:
+            bodies.append(symbol.proc_index)
+            bodies.extend(symbol.body[1:])
+
+    return list(_symbols.keys()), bodies, read_symbols
+
+
+def attach_obj_file_symbols(file_name, detached_symbols, errors=None):
+    # returns the symbols detached from an object file (see detach_obj_file_symbols), with the symbols not read yet
+    # attached to the memory-mapped object file
+    symbol_names, bodies, read_symbols = detached_symbols
+
+    buffer = None
+    if bodies:
+        if os.path.isfile(file_name):
+            buffer = fileutils.map_file(file_name)
+        else:
+            if errors is not None:
+                errors.append({
+                    'name': 'FILE_NOT_FOUND',
+                    'info': [file_name]
+                })
+            return None
+
+    # procedure index, file offset of symbol body, size of machine code, number of relocations, size of relocation table
+    # and object file version of each symbol not read yet
+    fields = iter(bodies)
+    entries = zip(fields, fields, fields, fields, fields, fields)
+
+    _symbols = {}
+    for symbol_name in symbol_names:
+        symbol = read_symbols.get(symbol_name)
+        if symbol is None:
+            proc_index, body_offset, machine_code_size, relocations_count, relocation_table_size, obj_file_version = \
+                next(entries)
+            symbol = symbols.Symbol(proc_index, body=(buffer, body_offset, machine_code_size, relocations_count,
+                                                      relocation_table_size, obj_file_version))
+        _symbols[symbol_name] = symbol
+
+    return _symbols
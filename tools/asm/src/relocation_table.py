@@ -1,12 +1,154 @@
-# a relocation table is an array of relocations, each relocation is a map containing the machine code offset and the
-# array index of the symbol name in the corresponding symbol table
+# a relocation table is an array of relocations, each relocation is a pair of integers in the array: the machine code
+# offset and the array index of the symbol name in the corresponding symbol table
+#
+# the integers are kept in a flat array (instead of a map per relocation), which takes a fraction of the memory and
+# allows processing all relocations at once; in object files they are words, but in memory the symbol indexes of the
+# global symbol table of the linker might not fit into a word
+#
+# encoded as varints (see encode_varints), each machine code offset and symbol index is stored as the difference to the
+# one of the previous relocation, so that e.g. a table of words referring to consecutive symbols takes two bytes per
+# relocation
 
 import symbol_table
 
+import array
+import itertools
+import re
+import sys
 
-def rebuild(relocation_table, old_symbol_table, new_symbol_table=None):
-    new_symbol_table = symbol_table.get_symbol_table(new_symbol_table)
+# the type code of the array (unsigned int)
+typecode = 'I'
 
-    for relocation in relocation_table:
-        symbol_name = symbol_table.get_symbol_name(relocation['symbol_index'], old_symbol_table)
-        relocation['symbol_index'] = symbol_table.get_index(symbol_name, new_symbol_table)
+# the zigzag-decoded values of single-byte varints
+zigzag_values = [(value >> 1) ^ -(value & 1) for value in range(0x80)]
+
+# a varint is any number of bytes with the high bit set, then a byte with the high bit not set
+multi_byte_varint_regex = re.compile(b'[\x80-\xff]+[\x00-\x7f]')
+
+
+def new_relocation_table(relocations=()):
+    # relocations given as pairs of machine code offset and symbol index
+    return array.array(typecode, itertools.chain.from_iterable(relocations))
+
+
+def copy(relocation_table):
+    return array.array(typecode, relocation_table)
+
+
+def add_relocation(relocation_table, machine_code_offset, symbol_index):
+    relocation_table.append(machine_code_offset)
+    relocation_table.append(symbol_index)
+
+
+def get_relocations(relocation_table):
+    # returns the pairs of machine code offset and symbol index
+    return zip(relocation_table[0::2], relocation_table[1::2])
+
+
+def get_relocations_count(relocation_table):
+    return len(relocation_table) // 2
+
+
+def move(relocation_table, machine_code_offset):
+    # add the machine code offset to all relocations, e.g. when appending the machine code to other machine code
+    if machine_code_offset and relocation_table:
+        relocation_table[0::2] = array.array(typecode,
+                                             [offset + machine_code_offset for offset in relocation_table[0::2]])
+
+
+def rebuild(relocation_table, old_symbol_table, new_symbol_table, index_map=None):
+    # index_map keeps the symbol indexes of the new symbol table already looked up (e.g. for all relocation tables using
+    # the same symbol table)
+    if not relocation_table:
+        return
+
+    if index_map is None:
+        index_map = {}
+
+    # symbol names are added to the new symbol table in the order of the relocations
+    for symbol_index in dict.fromkeys(relocation_table[1::2]):
+        if symbol_index not in index_map:
+            symbol_name = symbol_table.get_symbol_name(symbol_index, old_symbol_table)
+            index_map[symbol_index] = symbol_table.get_index(symbol_name, new_symbol_table)
+
+    remap(relocation_table, index_map)
+
+
+def remap(relocation_table, index_map):
+    # index_map maps each symbol index of the symbol table to the symbol index of the new symbol table
+    if relocation_table:
+        relocation_table[1::2] = array.array(typecode,
+                                             [index_map[symbol_index] for symbol_index in relocation_table[1::2]])
+
+
+def to_bytes(relocation_table):
+    # the words in little endian byte order (as in object files)
+    words = array.array('H', relocation_table)
+    if 'big' == sys.byteorder:
+        words.byteswap()
+
+    return words.tobytes()
+
+
+def from_bytes(buffer):
+    # the words in little endian byte order (as in object files)
+    words = array.array('H')
+    words.frombytes(buffer)
+    if 'big' == sys.byteorder:
+        words.byteswap()
+
+    return array.array(typecode, words)
+
+
+def encode_varints(relocation_table):
+    # the differences are zigzag-encoded (0, -1, 1, -2, 2, ... as 0, 1, 2, 3, 4, ...), then stored 7 bits per byte,
+    # least significant first, the high bit set in all but the last byte
+    buffer = bytearray()
+    previous_values = [0, 0]
+    for i, value in enumerate(relocation_table):
+        difference = value - previous_values[i & 1]
+        previous_values[i & 1] = value
+
+        difference = difference << 1 if difference >= 0 else (~difference << 1) | 1
+        while difference >= 0x80:
+            buffer.append(difference & 0x7f | 0x80)
+            difference >>= 7
+        buffer.append(difference)
+
+    return buffer
+
+
+def decode_varints(buffer, relocations_count):
+    # returns None if the varints are not the given number of valid relocations
+    if not relocations_count or not buffer:
+        return new_relocation_table() if not relocations_count and not buffer else None
+
+    buffer = bytes(buffer)
+    if buffer[-1] >= 0x80:
+        # the last varint is incomplete
+        return None
+
+    # most varints take a single byte, the ones taking more bytes are decoded one by one in between
+    differences = []
+    offset = 0
+    for match in multi_byte_varint_regex.finditer(buffer):
+        differences.extend(map(zigzag_values.__getitem__, buffer[offset:match.start()]))
+        value = 0
+        for byte in reversed(match.group()):
+            value = value << 7 | byte & 0x7f
+        differences.append((value >> 1) ^ -(value & 1))
+        offset = match.end()
+    differences.extend(map(zigzag_values.__getitem__, buffer[offset:]))
+
+    if len(differences) != 2 * relocations_count:
+        return None
+
+    # the values are words, as in object files
+    words = array.array('H', bytes(len(differences) * 2))
+    try:
+        words[0::2] = array.array('H', list(itertools.accumulate(differences[0::2])))
+        words[1::2] = array.array('H', list(itertools.accumulate(differences[1::2])))
+    except OverflowError:
+        return None
+
+    return array.array(typecode, words)
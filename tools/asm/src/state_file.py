@@ -0,0 +1,54 @@
+# a state file keeps the assembled procedures of a source file next to its object file, so that the next incremental
+# assembly only has to assemble the procedures whose text changed
+#
+# state file format (json):
+#
+#   {
+#     "version": <assembler version, followed by ' -O' if the procedures are optimized>,
+#     "blocks": {
+#       <fingerprint of the text of a procedure>: [<symbol>, ...]
+#     }
+#   }
+#
+# a symbol (in the order of definition, the first symbol is the procedure itself):
+#
+#   [<symbol name>, <machine code (hex)>, [[<machine code offset>, <symbol name>], ...]]
+#
+# the relocations use symbol names instead of indexes, as the symbol table changes with every assembly
+
+import json
+import os
+
+
+def get_state_file_name(asm_file_name):
+    return os.path.splitext(os.path.basename(asm_file_name))[0] + '.state'
+
+
+def read_state_file(file_name, version):
+    # returns the blocks, or an empty map if there is no state file or it was written by another assembler version
+    try:
+        with open(file_name, 'r') as state:
+            _state = json.load(state)
+    except (OSError, ValueError):
+        return {}
+
+    if not isinstance(_state, dict) or version != _state.get('version') or not isinstance(_state.get('blocks'), dict):
+        return {}
+
+    return _state['blocks']
+
+
+def write_state_file(file_name, version, blocks):
+    temp_file_name = file_name + '.tmp'
+
+    try:
+        with open(temp_file_name, 'w') as state:
+            # json.dumps is much faster than json.dump, which cannot use the c encoder
+            state.write(json.dumps({
+                'version': version,
+                'blocks': blocks
+            }, separators=(',', ':')))
+        os.replace(temp_file_name, file_name)
+    except OSError:
+        # the state file is only an optimization
+        pass
@@ -1,53 +1,73 @@
 # a symbol table is an array of symbol names
 # relocation tables are using the array index of the symbol name as the reference
 # index 0 represents 'global' and is used for symbols not inside of procedures
+#
+# for constant-time lookups, the symbol table is a map containing the array of symbol names and a map of each symbol
+# name to its array index; symbol names are interned, as the same names are used over and over again
+#
+# the order of the symbol names is tracked separately from their indexes, so that moving a symbol name to the end does
+# not change any index; sorting the symbol table then builds a new one with the indexes in that order
 
-# add index 0 (global scope, might be obsolete, because instructions now require a symbol)
-_symbol_table = [None]
+import sys
 
 
-def get_symbol_table(symbol_table=None):
-    if symbol_table is None:
-        return _symbol_table
-    else:
-        return symbol_table
-
-
-def set_symbol_table(symbol_table):
-    global _symbol_table
-
-    _symbol_table = symbol_table
+def new_symbol_table():
+    # add index 0 (global scope, might be obsolete, because instructions now require a symbol)
+    return {
+        'names': [None],
+        'indexes': {None: 0},
+        'order': [0],     # the indexes in the order of the symbol names, None where a symbol name was moved away
+        'positions': [0]  # the position of each index in the order
+    }
 
 
-def symbol_exists(symbol_name, symbol_table=None):
-    symbol_table = get_symbol_table(symbol_table)
+def get_symbol_names(symbol_table):
+    return symbol_table['names']
 
-    return symbol_name in symbol_table
 
+def symbol_exists(symbol_name, symbol_table):
+    return symbol_name in symbol_table['indexes']
 
-def get_index(symbol_name, symbol_table=None):
-    symbol_table = get_symbol_table(symbol_table)
 
-    # add the symbol if it does not exist yet
-    if not symbol_exists(symbol_name, symbol_table):
-        symbol_table.append(symbol_name)
+def get_index(symbol_name, symbol_table):
+    index = symbol_table['indexes'].get(symbol_name)
+    if index is None:
+        # add the symbol if it does not exist yet
+        if symbol_name is not None:
+            symbol_name = sys.intern(symbol_name)
+        index = len(symbol_table['names'])
+        symbol_table['names'].append(symbol_name)
+        symbol_table['indexes'][symbol_name] = index
+        symbol_table['positions'].append(len(symbol_table['order']))
+        symbol_table['order'].append(index)
 
-    return symbol_table.index(symbol_name)
+    return index
 
 
-def get_symbol_name(index, symbol_table=None):
-    symbol_table = get_symbol_table(symbol_table)
-
-    if index < len(symbol_table):
-        return symbol_table[index]
+def get_symbol_name(index, symbol_table):
+    if index < len(symbol_table['names']):
+        return symbol_table['names'][index]
     else:
         return None
 
 
-def add_symbol(symbol_name, symbol_table=None):
+def add_symbol(symbol_name, symbol_table):
     get_index(symbol_name, symbol_table)
 
 
-def remove_symbol(symbol_name, symbol_table=None):
-    symbol_table = get_symbol_table(symbol_table)
-    symbol_table.remove(symbol_name)
+def move_symbol_to_end(symbol_name, symbol_table):
+    index = symbol_table['indexes'][symbol_name]
+    symbol_table['order'][symbol_table['positions'][index]] = None
+    symbol_table['positions'][index] = len(symbol_table['order'])
+    symbol_table['order'].append(index)
+
+
+def sort_symbol_table(symbol_table):
+    # build a new symbol table in the order of the symbol names and map each old index to its new index
+    sorted_symbol_table = new_symbol_table()
+    index_map = [0] * len(symbol_table['names'])
+    for index in symbol_table['order']:
+        if index is not None:
+            index_map[index] = get_index(symbol_table['names'][index], sorted_symbol_table)
+
+    return sorted_symbol_table, index_map
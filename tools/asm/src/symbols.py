@@ -1,40 +1,45 @@
-# symbols are a map keyed by the symbol name, each symbol is a map containing the machine code and the relocation table
+# symbols are a map keyed by the symbol name, each symbol is a Symbol containing the machine code and the relocation
+# table
 
+import relocation_table
 import symbol_table
 
-_symbols = {}
 
+class Symbol:
+    # a class with slots instead of a map per symbol, as a link might contain hundreds of thousands of small symbols
+    __slots__ = ('proc_index', 'machine_code', 'relocation_table', 'machine_code_base', 'body')
 
-def get_symbols(symbols=None):
-    if symbols is None:
-        return _symbols
-    else:
-        return symbols
-
+    def __init__(self, proc_index=0, machine_code=None, _relocation_table=None, body=None):
+        self.proc_index = proc_index
+        if body is None:
+            self.machine_code = bytearray() if machine_code is None else machine_code
+            self.relocation_table = relocation_table.new_relocation_table() if _relocation_table is None \
+                else _relocation_table
+        else:
+            # the machine code and the relocation table are read from the object file later (see obj_file)
+            self.machine_code = None
+            self.relocation_table = None
+        self.machine_code_base = None  # the offset in the machine code of all linked symbols (see link)
+        self.body = body  # the location of the machine code and the relocation table in an object file, until read
 
-def symbol_exists(symbol_name, symbols=None):
-    symbols = get_symbols(symbols)
 
+def symbol_exists(symbol_name, symbols):
     return symbol_name in symbols.keys()
 
 
-def get_symbol(symbol_name, symbols=None):
-    symbols = get_symbols(symbols)
-
+def get_symbol(symbol_name, symbols):
     if symbol_exists(symbol_name, symbols):
         return symbols[symbol_name]
     else:
         return None
 
 
-def add_symbol(symbol_name, proc_name=None, symbols=None, _symbol_table=None):
-    symbols = get_symbols(symbols)
-
+def add_symbol(symbol_name, proc_name, symbols, _symbol_table, symbol=None):
+    # the symbol might be given, e.g. when moving a symbol from an object file to the linked symbols
     if not symbol_exists(symbol_name, symbols):
-        symbols[symbol_name] = {
-            'proc_index': symbol_table.get_index(proc_name, _symbol_table),
-            'machine_code': bytearray(),
-            'relocation_table': [],
-        }
+        if symbol is None:
+            symbol = Symbol()
+        symbol.proc_index = symbol_table.get_index(proc_name, _symbol_table)
+        symbols[symbol_name] = symbol
 
     return get_symbol(symbol_name, symbols)
@@ -0,0 +1,1243 @@
+# regression tests of the instruction encoder: the machine code and the relocations (or the errors) of every form of
+# every mnemonic, as encoded by the assembler before the encoder became table-driven; and tests of the peephole
+# optimizer (see -O)
+#
+# run: python3 -m pytest (in this directory)
+
+import asm
+import relocation_table
+import symbol_table
+
+import pytest
+
+
+def assemble_line_str(line_str):
+    # returns the machine code (hex) and the relocations (machine code offset and symbol name), or the errors; local
+    # symbol names are expanded using the procedure 'proc'
+    errors = []
+    line = asm.parse_asm_line_str(line_str, errors)
+    assert not errors
+
+    _symbol_table = symbol_table.new_symbol_table()
+    assembly = asm.assemble_asm_line(line, 'proc', _symbol_table, errors)
+    if errors:
+        return [(error['name'], error['info']) for error in errors]
+
+    return assembly['machine_code'].hex(), [
+        (machine_code_offset, symbol_table.get_symbol_name(symbol_index, _symbol_table))
+        for machine_code_offset, symbol_index in relocation_table.get_relocations(assembly['relocation_table'])
+    ]
+
+
+expected_encodings = {
+    'nop': ('00', []),
+    'hlt': ('ff', []),
+    'rst': ('f7', []),
+    'inchl': ('97', []),
+    'dechl': ('a7', []),
+    'pushhl': ('91', []),
+    'pophl': ('95', []),
+    'pushf': ('87', []),
+    'popf': ('d9', []),
+    'mov a, a': ('80', []),
+    'mov a, b': ('82', []),
+    'mov a, c': ('84', []),
+    'mov a, d': ('86', []),
+    'mov a, h': ('88', []),
+    'mov a, l': ('8a', []),
+    'mov a, m': ('8c', []),
+    'mov a, 0x12': ('8e12', []),
+    "mov a, 'a'": ('8e61', []),
+    'mov a, 63': ('8e3f', []),
+    'mov b, a': ('90', []),
+    'mov b, b': ('92', []),
+    'mov b, c': ('94', []),
+    'mov b, d': ('96', []),
+    'mov b, h': ('98', []),
+    'mov b, l': ('9a', []),
+    'mov b, m': ('9c', []),
+    'mov b, 0x12': ('9e12', []),
+    "mov b, 'a'": ('9e61', []),
+    'mov b, 63': ('9e3f', []),
+    'mov c, a': ('a0', []),
+    'mov c, b': ('a2', []),
+    'mov c, c': ('a4', []),
+    'mov c, d': ('a6', []),
+    'mov c, h': ('a8', []),
+    'mov c, l': ('aa', []),
+    'mov c, m': ('ac', []),
+    'mov c, 0x12': ('ae12', []),
+    "mov c, 'a'": ('ae61', []),
+    'mov c, 63': ('ae3f', []),
+    'mov d, a': ('b0', []),
+    'mov d, b': ('b2', []),
+    'mov d, c': ('b4', []),
+    'mov d, d': ('b6', []),
+    'mov d, h': ('b8', []),
+    'mov d, l': ('ba', []),
+    'mov d, m': ('bc', []),
+    'mov d, 0x12': ('be12', []),
+    "mov d, 'a'": ('be61', []),
+    'mov d, 63': ('be3f', []),
+    'mov h, a': ('c0', []),
+    'mov h, b': ('c2', []),
+    'mov h, c': ('c4', []),
+    'mov h, d': ('c6', []),
+    'mov h, h': ('c8', []),
+    'mov h, l': ('ca', []),
+    'mov h, m': ('cc', []),
+    'mov h, 0x12': ('ce12', []),
+    "mov h, 'a'": ('ce61', []),
+    'mov h, 63': ('ce3f', []),
+    'mov l, a': ('d0', []),
+    'mov l, b': ('d2', []),
+    'mov l, c': ('d4', []),
+    'mov l, d': ('d6', []),
+    'mov l, h': ('d8', []),
+    'mov l, l': ('da', []),
+    'mov l, m': ('dc', []),
+    'mov l, 0x12': ('de12', []),
+    "mov l, 'a'": ('de61', []),
+    'mov l, 63': ('de3f', []),
+    'mov hl, hl': ('00', []),
+    'mov hl, ip': ('02', []),
+    'mov hl, sp': ('04', []),
+    'mov hl, 0x12': ('0e1200', []),
+    'mov hl, 0x1234': ('0e3412', []),
+    "mov hl, 'a'": ('0e6100', []),
+    "mov hl, '€'": ('0eac20', []),
+    'mov hl, foo': ('0e0000', [(1, 'foo')]),
+    'mov hl, @loc': ('0e0000', [(1, 'proc_loc')]),
+    'mov hl, 63': ('0e3f00', []),
+    'mov ip, hl': ('10', []),
+    'mov ip, ip': ('12', []),
+    'mov ip, sp': ('14', []),
+    'mov ip, 0x12': ('1e1200', []),
+    'mov ip, 0x1234': ('1e3412', []),
+    "mov ip, 'a'": ('1e6100', []),
+    "mov ip, '€'": ('1eac20', []),
+    'mov ip, foo': ('1e0000', [(1, 'foo')]),
+    'mov ip, @loc': ('1e0000', [(1, 'proc_loc')]),
+    'mov ip, 63': ('1e3f00', []),
+    'mov sp, hl': ('20', []),
+    'mov sp, ip': ('22', []),
+    'mov sp, sp': ('24', []),
+    'mov sp, 0x12': ('2e1200', []),
+    'mov sp, 0x1234': ('2e3412', []),
+    "mov sp, 'a'": ('2e6100', []),
+    "mov sp, '€'": ('2eac20', []),
+    'mov sp, foo': ('2e0000', [(1, 'foo')]),
+    'mov sp, @loc': ('2e0000', [(1, 'proc_loc')]),
+    'mov sp, 63': ('2e3f00', []),
+    'mov m, a': ('e0', []),
+    'mov m, b': ('e2', []),
+    'mov m, c': ('e4', []),
+    'mov m, d': ('e6', []),
+    'mov m, h': ('e8', []),
+    'mov m, l': ('ea', []),
+    'loda a, 0x12': ('8d1200', []),
+    'loda a, 0x1234': ('8d3412', []),
+    'loda a, foo': ('8d0000', [(1, 'foo')]),
+    'loda a, @loc': ('8d0000', [(1, 'proc_loc')]),
+    'loda a, 63': ('8d3f00', []),
+    'loda b, 0x12': ('9d1200', []),
+    'loda b, 0x1234': ('9d3412', []),
+    'loda b, foo': ('9d0000', [(1, 'foo')]),
+    'loda b, @loc': ('9d0000', [(1, 'proc_loc')]),
+    'loda b, 63': ('9d3f00', []),
+    'loda c, 0x12': ('ad1200', []),
+    'loda c, 0x1234': ('ad3412', []),
+    'loda c, foo': ('ad0000', [(1, 'foo')]),
+    'loda c, @loc': ('ad0000', [(1, 'proc_loc')]),
+    'loda c, 63': ('ad3f00', []),
+    'loda d, 0x12': ('bd1200', []),
+    'loda d, 0x1234': ('bd3412', []),
+    'loda d, foo': ('bd0000', [(1, 'foo')]),
+    'loda d, @loc': ('bd0000', [(1, 'proc_loc')]),
+    'loda d, 63': ('bd3f00', []),
+    'loda h, 0x12': ('cd1200', []),
+    'loda h, 0x1234': ('cd3412', []),
+    'loda h, foo': ('cd0000', [(1, 'foo')]),
+    'loda h, @loc': ('cd0000', [(1, 'proc_loc')]),
+    'loda h, 63': ('cd3f00', []),
+    'loda l, 0x12': ('dd1200', []),
+    'loda l, 0x1234': ('dd3412', []),
+    'loda l, foo': ('dd0000', [(1, 'foo')]),
+    'loda l, @loc': ('dd0000', [(1, 'proc_loc')]),
+    'loda l, 63': ('dd3f00', []),
+    'stoa 0x12, a': ('e11200', []),
+    'stoa 0x12, b': ('e31200', []),
+    'stoa 0x12, c': ('e51200', []),
+    'stoa 0x12, d': ('e71200', []),
+    'stoa 0x12, h': ('e91200', []),
+    'stoa 0x12, l': ('eb1200', []),
+    'stoa 0x1234, a': ('e13412', []),
+    'stoa 0x1234, b': ('e33412', []),
+    'stoa 0x1234, c': ('e53412', []),
+    'stoa 0x1234, d': ('e73412', []),
+    'stoa 0x1234, h': ('e93412', []),
+    'stoa 0x1234, l': ('eb3412', []),
+    'stoa foo, a': ('e10000', [(1, 'foo')]),
+    'stoa foo, b': ('e30000', [(1, 'foo')]),
+    'stoa foo, c': ('e50000', [(1, 'foo')]),
+    'stoa foo, d': ('e70000', [(1, 'foo')]),
+    'stoa foo, h': ('e90000', [(1, 'foo')]),
+    'stoa foo, l': ('eb0000', [(1, 'foo')]),
+    'stoa @loc, a': ('e10000', [(1, 'proc_loc')]),
+    'stoa @loc, b': ('e30000', [(1, 'proc_loc')]),
+    'stoa @loc, c': ('e50000', [(1, 'proc_loc')]),
+    'stoa @loc, d': ('e70000', [(1, 'proc_loc')]),
+    'stoa @loc, h': ('e90000', [(1, 'proc_loc')]),
+    'stoa @loc, l': ('eb0000', [(1, 'proc_loc')]),
+    'stoa 63, a': ('e13f00', []),
+    'stoa 63, b': ('e33f00', []),
+    'stoa 63, c': ('e53f00', []),
+    'stoa 63, d': ('e73f00', []),
+    'stoa 63, h': ('e93f00', []),
+    'stoa 63, l': ('eb3f00', []),
+    'push a': ('80', []),
+    'push b': ('92', []),
+    'push c': ('a4', []),
+    'push d': ('b6', []),
+    'push h': ('c8', []),
+    'push l': ('da', []),
+    'pop a': ('81', []),
+    'pop b': ('93', []),
+    'pop c': ('a5', []),
+    'pop d': ('b7', []),
+    'pop h': ('c9', []),
+    'pop l': ('db', []),
+    'add a': ('60', []),
+    'add b': ('62', []),
+    'add c': ('64', []),
+    'add d': ('66', []),
+    'add h': ('68', []),
+    'add l': ('6a', []),
+    'add m': ('6c', []),
+    'add 0x12': ('6e12', []),
+    "add 'a'": ('6e61', []),
+    'add 63': ('6e3f', []),
+    'sub a': ('61', []),
+    'sub b': ('63', []),
+    'sub c': ('65', []),
+    'sub d': ('67', []),
+    'sub h': ('69', []),
+    'sub l': ('6b', []),
+    'sub m': ('6d', []),
+    'sub 0x12': ('6f12', []),
+    "sub 'a'": ('6f61', []),
+    'sub 63': ('6f3f', []),
+    'cmp a': ('70', []),
+    'cmp b': ('72', []),
+    'cmp c': ('74', []),
+    'cmp d': ('76', []),
+    'cmp h': ('78', []),
+    'cmp l': ('7a', []),
+    'cmp m': ('7c', []),
+    'cmp 0x12': ('7e12', []),
+    "cmp 'a'": ('7e61', []),
+    'cmp 63': ('7e3f', []),
+    'adc a': ('50', []),
+    'adc b': ('51', []),
+    'adc c': ('52', []),
+    'adc d': ('53', []),
+    'adc h': ('54', []),
+    'adc l': ('55', []),
+    'adc m': ('56', []),
+    'adc 0x12': ('5712', []),
+    "adc 'a'": ('5761', []),
+    'adc 63': ('573f', []),
+    'sbb a': ('58', []),
+    'sbb b': ('59', []),
+    'sbb c': ('5a', []),
+    'sbb d': ('5b', []),
+    'sbb h': ('5c', []),
+    'sbb l': ('5d', []),
+    'sbb m': ('5e', []),
+    'sbb 0x12': ('5f12', []),
+    "sbb 'a'": ('5f61', []),
+    'sbb 63': ('5f3f', []),
+    'and a': ('30', []),
+    'and b': ('31', []),
+    'and c': ('32', []),
+    'and d': ('33', []),
+    'and h': ('34', []),
+    'and l': ('35', []),
+    'and m': ('36', []),
+    'and 0x12': ('3712', []),
+    "and 'a'": ('3761', []),
+    'and 63': ('373f', []),
+    'or a': ('38', []),
+    'or b': ('39', []),
+    'or c': ('3a', []),
+    'or d': ('3b', []),
+    'or h': ('3c', []),
+    'or l': ('3d', []),
+    'or m': ('3e', []),
+    'or 0x12': ('3f12', []),
+    "or 'a'": ('3f61', []),
+    'or 63': ('3f3f', []),
+    'xor a': ('40', []),
+    'xor b': ('41', []),
+    'xor c': ('42', []),
+    'xor d': ('43', []),
+    'xor h': ('44', []),
+    'xor l': ('45', []),
+    'xor m': ('46', []),
+    'xor 0x12': ('4712', []),
+    "xor 'a'": ('4761', []),
+    'xor 63': ('473f', []),
+    'jmp m': ('75', []),
+    'jmp 0x12': ('771200', []),
+    'jmp 0x1234': ('773412', []),
+    'jmp foo': ('770000', [(1, 'foo')]),
+    'jmp @loc': ('770000', [(1, 'proc_loc')]),
+    'jmp 63': ('773f00', []),
+    'jc m': ('79', []),
+    'jc 0x12': ('7b1200', []),
+    'jc 0x1234': ('7b3412', []),
+    'jc foo': ('7b0000', [(1, 'foo')]),
+    'jc @loc': ('7b0000', [(1, 'proc_loc')]),
+    'jc 63': ('7b3f00', []),
+    'jnc m': ('7d', []),
+    'jnc 0x12': ('7f1200', []),
+    'jnc 0x1234': ('7f3412', []),
+    'jnc foo': ('7f0000', [(1, 'foo')]),
+    'jnc @loc': ('7f0000', [(1, 'proc_loc')]),
+    'jnc 63': ('7f3f00', []),
+    'jz m': ('8f', []),
+    'jz 0x12': ('9f1200', []),
+    'jz 0x1234': ('9f3412', []),
+    'jz foo': ('9f0000', [(1, 'foo')]),
+    'jz @loc': ('9f0000', [(1, 'proc_loc')]),
+    'jz 63': ('9f3f00', []),
+    'jnz m': ('af', []),
+    'jnz 0x12': ('bf1200', []),
+    'jnz 0x1234': ('bf3412', []),
+    'jnz foo': ('bf0000', [(1, 'foo')]),
+    'jnz @loc': ('bf0000', [(1, 'proc_loc')]),
+    'jnz 63': ('bf3f00', []),
+    'ja m': ('01', []),
+    'ja 0x12': ('031200', []),
+    'ja 0x1234': ('033412', []),
+    'ja foo': ('030000', [(1, 'foo')]),
+    'ja @loc': ('030000', [(1, 'proc_loc')]),
+    'ja 63': ('033f00', []),
+    'jna m': ('06', []),
+    'jna 0x12': ('071200', []),
+    'jna 0x1234': ('073412', []),
+    'jna foo': ('070000', [(1, 'foo')]),
+    'jna @loc': ('070000', [(1, 'proc_loc')]),
+    'jna 63': ('073f00', []),
+    'jb m': ('79', []),
+    'jb 0x12': ('7b1200', []),
+    'jb 0x1234': ('7b3412', []),
+    'jb foo': ('7b0000', [(1, 'foo')]),
+    'jb @loc': ('7b0000', [(1, 'proc_loc')]),
+    'jb 63': ('7b3f00', []),
+    'jnb m': ('7d', []),
+    'jnb 0x12': ('7f1200', []),
+    'jnb 0x1234': ('7f3412', []),
+    'jnb foo': ('7f0000', [(1, 'foo')]),
+    'jnb @loc': ('7f0000', [(1, 'proc_loc')]),
+    'jnb 63': ('7f3f00', []),
+    'je m': ('8f', []),
+    'je 0x12': ('9f1200', []),
+    'je 0x1234': ('9f3412', []),
+    'je foo': ('9f0000', [(1, 'foo')]),
+    'je @loc': ('9f0000', [(1, 'proc_loc')]),
+    'je 63': ('9f3f00', []),
+    'jne m': ('af', []),
+    'jne 0x12': ('bf1200', []),
+    'jne 0x1234': ('bf3412', []),
+    'jne foo': ('bf0000', [(1, 'foo')]),
+    'jne @loc': ('bf0000', [(1, 'proc_loc')]),
+    'jne 63': ('bf3f00', []),
+    'jae m': ('7d', []),
+    'jae 0x12': ('7f1200', []),
+    'jae 0x1234': ('7f3412', []),
+    'jae foo': ('7f0000', [(1, 'foo')]),
+    'jae @loc': ('7f0000', [(1, 'proc_loc')]),
+    'jae 63': ('7f3f00', []),
+    'jnae m': ('79', []),
+    'jnae 0x12': ('7b1200', []),
+    'jnae 0x1234': ('7b3412', []),
+    'jnae foo': ('7b0000', [(1, 'foo')]),
+    'jnae @loc': ('7b0000', [(1, 'proc_loc')]),
+    'jnae 63': ('7b3f00', []),
+    'jbe m': ('06', []),
+    'jbe 0x12': ('071200', []),
+    'jbe 0x1234': ('073412', []),
+    'jbe foo': ('070000', [(1, 'foo')]),
+    'jbe @loc': ('070000', [(1, 'proc_loc')]),
+    'jbe 63': ('073f00', []),
+    'jnbe m': ('01', []),
+    'jnbe 0x12': ('031200', []),
+    'jnbe 0x1234': ('033412', []),
+    'jnbe foo': ('030000', [(1, 'foo')]),
+    'jnbe @loc': ('030000', [(1, 'proc_loc')]),
+    'jnbe 63': ('033f00', []),
+    'call m': ('c1', []),
+    'call 0x12': ('c31200', []),
+    'call 0x1234': ('c33412', []),
+    'call foo': ('c30000', [(1, 'foo')]),
+    'call @loc': ('c30000', [(1, 'proc_loc')]),
+    'call 63': ('c33f00', []),
+    'cc m': ('c5', []),
+    'cc 0x12': ('c71200', []),
+    'cc 0x1234': ('c73412', []),
+    'cc foo': ('c70000', [(1, 'foo')]),
+    'cc @loc': ('c70000', [(1, 'proc_loc')]),
+    'cc 63': ('c73f00', []),
+    'cnc m': ('cb', []),
+    'cnc 0x12': ('cf1200', []),
+    'cnc 0x1234': ('cf3412', []),
+    'cnc foo': ('cf0000', [(1, 'foo')]),
+    'cnc @loc': ('cf0000', [(1, 'proc_loc')]),
+    'cnc 63': ('cf3f00', []),
+    'cz m': ('d1', []),
+    'cz 0x12': ('d31200', []),
+    'cz 0x1234': ('d33412', []),
+    'cz foo': ('d30000', [(1, 'foo')]),
+    'cz @loc': ('d30000', [(1, 'proc_loc')]),
+    'cz 63': ('d33f00', []),
+    'cnz m': ('d5', []),
+    'cnz 0x12': ('d71200', []),
+    'cnz 0x1234': ('d73412', []),
+    'cnz foo': ('d70000', [(1, 'foo')]),
+    'cnz @loc': ('d70000', [(1, 'proc_loc')]),
+    'cnz 63': ('d73f00', []),
+    'ca m': ('12', []),
+    'ca 0x12': ('131200', []),
+    'ca 0x1234': ('133412', []),
+    'ca foo': ('130000', [(1, 'foo')]),
+    'ca @loc': ('130000', [(1, 'proc_loc')]),
+    'ca 63': ('133f00', []),
+    'cna m': ('16', []),
+    'cna 0x12': ('171200', []),
+    'cna 0x1234': ('173412', []),
+    'cna foo': ('170000', [(1, 'foo')]),
+    'cna @loc': ('170000', [(1, 'proc_loc')]),
+    'cna 63': ('173f00', []),
+    'cb m': ('c5', []),
+    'cb 0x12': ('c71200', []),
+    'cb 0x1234': ('c73412', []),
+    'cb foo': ('c70000', [(1, 'foo')]),
+    'cb @loc': ('c70000', [(1, 'proc_loc')]),
+    'cb 63': ('c73f00', []),
+    'cnb m': ('cb', []),
+    'cnb 0x12': ('cf1200', []),
+    'cnb 0x1234': ('cf3412', []),
+    'cnb foo': ('cf0000', [(1, 'foo')]),
+    'cnb @loc': ('cf0000', [(1, 'proc_loc')]),
+    'cnb 63': ('cf3f00', []),
+    'ce m': ('d1', []),
+    'ce 0x12': ('d31200', []),
+    'ce 0x1234': ('d33412', []),
+    'ce foo': ('d30000', [(1, 'foo')]),
+    'ce @loc': ('d30000', [(1, 'proc_loc')]),
+    'ce 63': ('d33f00', []),
+    'cne m': ('d5', []),
+    'cne 0x12': ('d71200', []),
+    'cne 0x1234': ('d73412', []),
+    'cne foo': ('d70000', [(1, 'foo')]),
+    'cne @loc': ('d70000', [(1, 'proc_loc')]),
+    'cne 63': ('d73f00', []),
+    'cae m': ('cb', []),
+    'cae 0x12': ('cf1200', []),
+    'cae 0x1234': ('cf3412', []),
+    'cae foo': ('cf0000', [(1, 'foo')]),
+    'cae @loc': ('cf0000', [(1, 'proc_loc')]),
+    'cae 63': ('cf3f00', []),
+    'cnae m': ('c5', []),
+    'cnae 0x12': ('c71200', []),
+    'cnae 0x1234': ('c73412', []),
+    'cnae foo': ('c70000', [(1, 'foo')]),
+    'cnae @loc': ('c70000', [(1, 'proc_loc')]),
+    'cnae 63': ('c73f00', []),
+    'cbe m': ('16', []),
+    'cbe 0x12': ('171200', []),
+    'cbe 0x1234': ('173412', []),
+    'cbe foo': ('170000', [(1, 'foo')]),
+    'cbe @loc': ('170000', [(1, 'proc_loc')]),
+    'cbe 63': ('173f00', []),
+    'cnbe m': ('12', []),
+    'cnbe 0x12': ('131200', []),
+    'cnbe 0x1234': ('133412', []),
+    'cnbe foo': ('130000', [(1, 'foo')]),
+    'cnbe @loc': ('130000', [(1, 'proc_loc')]),
+    'cnbe 63': ('133f00', []),
+    'ret': ('05', []),
+    'rc': ('11', []),
+    'rnc': ('15', []),
+    'rz': ('21', []),
+    'rnz': ('23', []),
+    'ra': ('83', []),
+    'rna': ('85', []),
+    'rb': ('11', []),
+    'rnb': ('15', []),
+    're': ('21', []),
+    'rne': ('23', []),
+    'rae': ('15', []),
+    'rnae': ('11', []),
+    'rbe': ('85', []),
+    'rnbe': ('83', []),
+    'iret': ('b5', []),
+    'int 0x12': ('df12', []),
+    'int 63': ('df3f', []),
+    'inc a': ('f0', []),
+    'inc b': ('f1', []),
+    'inc c': ('f2', []),
+    'inc d': ('f3', []),
+    'inc h': ('f4', []),
+    'inc l': ('f5', []),
+    'inc m': ('f6', []),
+    'dec a': ('f8', []),
+    'dec b': ('f9', []),
+    'dec c': ('fa', []),
+    'dec d': ('fb', []),
+    'dec h': ('fc', []),
+    'dec l': ('fd', []),
+    'dec m': ('fe', []),
+    'not a': ('08', []),
+    'not b': ('09', []),
+    'not c': ('0a', []),
+    'not d': ('0b', []),
+    'not h': ('0c', []),
+    'not l': ('0d', []),
+    'not m': ('0f', []),
+    'shl a': ('18', []),
+    'shl b': ('19', []),
+    'shl c': ('1a', []),
+    'shl d': ('1b', []),
+    'shl h': ('1c', []),
+    'shl l': ('1d', []),
+    'shl m': ('1f', []),
+    'shr a': ('28', []),
+    'shr b': ('29', []),
+    'shr c': ('2a', []),
+    'shr d': ('2b', []),
+    'shr h': ('2c', []),
+    'shr l': ('2d', []),
+    'shr m': ('2f', []),
+    "db 'ab'(3)": ('616261626162', []),
+    'dw foo, @loc': ('00000000', [(0, 'foo'), (2, 'proc_loc')]),
+    "dw 'ab'": ('61006200', []),
+}
+
+
+expected_errors = {
+    'nop a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'hlt a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'rst a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'inchl a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'dechl a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'pushhl a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'pophl a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'pushf a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'popf a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'mov a, hl': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'mov a, 0x1234': [('INCOMPATIBLE_DATA_SIZE', [16, 8])],
+    'mov a, 0x12345': [('INCOMPATIBLE_DATA_SIZE', [24, 8])],
+    "mov a, 'ab'": [('INCOMPATIBLE_DATA_TYPE', [])],
+    'mov a, foo': [('INVALID_OPERAND', ['foo'])],
+    'mov a, 1x': [('INVALID_OPERAND', ['1x'])],
+    'mov hl, a': [('INCOMPATIBLE_REGISTER_SIZE', [8, 16])],
+    'mov hl, m': [('UNSUPPORTED_OPERAND', ['m'])],
+    'mov hl, 0x12345': [('INCOMPATIBLE_DATA_SIZE', [24, 16])],
+    "mov hl, 'ab'": [('INCOMPATIBLE_DATA_TYPE', [])],
+    'mov hl, 1x': [('INVALID_OPERAND', ['1x'])],
+    'mov m, hl': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'mov m, m': [('UNSUPPORTED_OPERAND', ['m'])],
+    'mov m, 0x1234': [('INVALID_OPERAND', ['0x1234'])],
+    'mov m, 0x12345': [('INVALID_OPERAND', ['0x12345'])],
+    'mov m, 64': [('INVALID_OPERAND', ['64'])],
+    "mov m, 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'mov m, foo': [('INVALID_OPERAND', ['foo'])],
+    'mov m, 1x': [('INVALID_OPERAND', ['1x'])],
+    'mov 0x1234, a': [('INVALID_OPERAND', ['0x1234'])],
+    'mov 0x1234, hl': [('INVALID_OPERAND', ['0x1234'])],
+    'mov 0x1234, m': [('INVALID_OPERAND', ['0x1234'])],
+    'mov 0x1234, 0x1234': [('INVALID_OPERAND', ['0x1234'])],
+    'mov 0x1234, 0x12345': [('INVALID_OPERAND', ['0x1234'])],
+    'mov 0x1234, 64': [('INVALID_OPERAND', ['0x1234'])],
+    "mov 0x1234, 'ab'": [('INVALID_OPERAND', ['0x1234'])],
+    'mov 0x1234, foo': [('INVALID_OPERAND', ['0x1234'])],
+    'mov 0x1234, 1x': [('INVALID_OPERAND', ['0x1234'])],
+    'mov 0x12345, a': [('INVALID_OPERAND', ['0x12345'])],
+    'mov 0x12345, hl': [('INVALID_OPERAND', ['0x12345'])],
+    'mov 0x12345, m': [('INVALID_OPERAND', ['0x12345'])],
+    'mov 0x12345, 0x1234': [('INVALID_OPERAND', ['0x12345'])],
+    'mov 0x12345, 0x12345': [('INVALID_OPERAND', ['0x12345'])],
+    'mov 0x12345, 64': [('INVALID_OPERAND', ['0x12345'])],
+    "mov 0x12345, 'ab'": [('INVALID_OPERAND', ['0x12345'])],
+    'mov 0x12345, foo': [('INVALID_OPERAND', ['0x12345'])],
+    'mov 0x12345, 1x': [('INVALID_OPERAND', ['0x12345'])],
+    'mov 64, a': [('INVALID_OPERAND', ['64'])],
+    'mov 64, hl': [('INVALID_OPERAND', ['64'])],
+    'mov 64, m': [('INVALID_OPERAND', ['64'])],
+    'mov 64, 0x1234': [('INVALID_OPERAND', ['64'])],
+    'mov 64, 0x12345': [('INVALID_OPERAND', ['64'])],
+    'mov 64, 64': [('INVALID_OPERAND', ['64'])],
+    "mov 64, 'ab'": [('INVALID_OPERAND', ['64'])],
+    'mov 64, foo': [('INVALID_OPERAND', ['64'])],
+    'mov 64, 1x': [('INVALID_OPERAND', ['64'])],
+    "mov 'ab', a": [('INVALID_OPERAND', ["'ab'"])],
+    "mov 'ab', hl": [('INVALID_OPERAND', ["'ab'"])],
+    "mov 'ab', m": [('INVALID_OPERAND', ["'ab'"])],
+    "mov 'ab', 0x1234": [('INVALID_OPERAND', ["'ab'"])],
+    "mov 'ab', 0x12345": [('INVALID_OPERAND', ["'ab'"])],
+    "mov 'ab', 64": [('INVALID_OPERAND', ["'ab'"])],
+    "mov 'ab', 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    "mov 'ab', foo": [('INVALID_OPERAND', ["'ab'"])],
+    "mov 'ab', 1x": [('INVALID_OPERAND', ["'ab'"])],
+    'mov foo, a': [('INVALID_OPERAND', ['foo'])],
+    'mov foo, hl': [('INVALID_OPERAND', ['foo'])],
+    'mov foo, m': [('INVALID_OPERAND', ['foo'])],
+    'mov foo, 0x1234': [('INVALID_OPERAND', ['foo'])],
+    'mov foo, 0x12345': [('INVALID_OPERAND', ['foo'])],
+    'mov foo, 64': [('INVALID_OPERAND', ['foo'])],
+    "mov foo, 'ab'": [('INVALID_OPERAND', ['foo'])],
+    'mov foo, foo': [('INVALID_OPERAND', ['foo'])],
+    'mov foo, 1x': [('INVALID_OPERAND', ['foo'])],
+    'mov 1x, a': [('INVALID_OPERAND', ['1x'])],
+    'mov 1x, hl': [('INVALID_OPERAND', ['1x'])],
+    'mov 1x, m': [('INVALID_OPERAND', ['1x'])],
+    'mov 1x, 0x1234': [('INVALID_OPERAND', ['1x'])],
+    'mov 1x, 0x12345': [('INVALID_OPERAND', ['1x'])],
+    'mov 1x, 64': [('INVALID_OPERAND', ['1x'])],
+    "mov 1x, 'ab'": [('INVALID_OPERAND', ['1x'])],
+    'mov 1x, foo': [('INVALID_OPERAND', ['1x'])],
+    'mov 1x, 1x': [('INVALID_OPERAND', ['1x'])],
+    'mov a, a, a': [('TOO_MANY_OPERANDS', [3, 2])],
+    'mov a': [('INSUFFICIENT_OPERANDS', [1, 2])],
+    'loda a, a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'loda a, hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'loda a, m': [('UNSUPPORTED_OPERAND', ['m'])],
+    'loda a, 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "loda a, 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'loda a, 1x': [('INVALID_OPERAND', ['1x'])],
+    'loda hl, a': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'loda hl, hl': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'loda hl, m': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'loda hl, 0x1234': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'loda hl, 0x12345': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'loda hl, 64': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    "loda hl, 'ab'": [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'loda hl, foo': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'loda hl, 1x': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'loda m, a': [('UNSUPPORTED_OPERAND', ['m'])],
+    'loda m, hl': [('UNSUPPORTED_OPERAND', ['m'])],
+    'loda m, m': [('UNSUPPORTED_OPERAND', ['m'])],
+    'loda m, 0x1234': [('UNSUPPORTED_OPERAND', ['m'])],
+    'loda m, 0x12345': [('UNSUPPORTED_OPERAND', ['m'])],
+    'loda m, 64': [('UNSUPPORTED_OPERAND', ['m'])],
+    "loda m, 'ab'": [('UNSUPPORTED_OPERAND', ['m'])],
+    'loda m, foo': [('UNSUPPORTED_OPERAND', ['m'])],
+    'loda m, 1x': [('UNSUPPORTED_OPERAND', ['m'])],
+    'loda 0x1234, a': [('INVALID_OPERAND', ['0x1234'])],
+    'loda 0x1234, hl': [('INVALID_OPERAND', ['0x1234'])],
+    'loda 0x1234, m': [('INVALID_OPERAND', ['0x1234'])],
+    'loda 0x1234, 0x1234': [('INVALID_OPERAND', ['0x1234'])],
+    'loda 0x1234, 0x12345': [('INVALID_OPERAND', ['0x1234'])],
+    'loda 0x1234, 64': [('INVALID_OPERAND', ['0x1234'])],
+    "loda 0x1234, 'ab'": [('INVALID_OPERAND', ['0x1234'])],
+    'loda 0x1234, foo': [('INVALID_OPERAND', ['0x1234'])],
+    'loda 0x1234, 1x': [('INVALID_OPERAND', ['0x1234'])],
+    'loda 0x12345, a': [('INVALID_OPERAND', ['0x12345'])],
+    'loda 0x12345, hl': [('INVALID_OPERAND', ['0x12345'])],
+    'loda 0x12345, m': [('INVALID_OPERAND', ['0x12345'])],
+    'loda 0x12345, 0x1234': [('INVALID_OPERAND', ['0x12345'])],
+    'loda 0x12345, 0x12345': [('INVALID_OPERAND', ['0x12345'])],
+    'loda 0x12345, 64': [('INVALID_OPERAND', ['0x12345'])],
+    "loda 0x12345, 'ab'": [('INVALID_OPERAND', ['0x12345'])],
+    'loda 0x12345, foo': [('INVALID_OPERAND', ['0x12345'])],
+    'loda 0x12345, 1x': [('INVALID_OPERAND', ['0x12345'])],
+    'loda 64, a': [('INVALID_OPERAND', ['64'])],
+    'loda 64, hl': [('INVALID_OPERAND', ['64'])],
+    'loda 64, m': [('INVALID_OPERAND', ['64'])],
+    'loda 64, 0x1234': [('INVALID_OPERAND', ['64'])],
+    'loda 64, 0x12345': [('INVALID_OPERAND', ['64'])],
+    'loda 64, 64': [('INVALID_OPERAND', ['64'])],
+    "loda 64, 'ab'": [('INVALID_OPERAND', ['64'])],
+    'loda 64, foo': [('INVALID_OPERAND', ['64'])],
+    'loda 64, 1x': [('INVALID_OPERAND', ['64'])],
+    "loda 'ab', a": [('INVALID_OPERAND', ["'ab'"])],
+    "loda 'ab', hl": [('INVALID_OPERAND', ["'ab'"])],
+    "loda 'ab', m": [('INVALID_OPERAND', ["'ab'"])],
+    "loda 'ab', 0x1234": [('INVALID_OPERAND', ["'ab'"])],
+    "loda 'ab', 0x12345": [('INVALID_OPERAND', ["'ab'"])],
+    "loda 'ab', 64": [('INVALID_OPERAND', ["'ab'"])],
+    "loda 'ab', 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    "loda 'ab', foo": [('INVALID_OPERAND', ["'ab'"])],
+    "loda 'ab', 1x": [('INVALID_OPERAND', ["'ab'"])],
+    'loda foo, a': [('INVALID_OPERAND', ['foo'])],
+    'loda foo, hl': [('INVALID_OPERAND', ['foo'])],
+    'loda foo, m': [('INVALID_OPERAND', ['foo'])],
+    'loda foo, 0x1234': [('INVALID_OPERAND', ['foo'])],
+    'loda foo, 0x12345': [('INVALID_OPERAND', ['foo'])],
+    'loda foo, 64': [('INVALID_OPERAND', ['foo'])],
+    "loda foo, 'ab'": [('INVALID_OPERAND', ['foo'])],
+    'loda foo, foo': [('INVALID_OPERAND', ['foo'])],
+    'loda foo, 1x': [('INVALID_OPERAND', ['foo'])],
+    'loda 1x, a': [('INVALID_OPERAND', ['1x'])],
+    'loda 1x, hl': [('INVALID_OPERAND', ['1x'])],
+    'loda 1x, m': [('INVALID_OPERAND', ['1x'])],
+    'loda 1x, 0x1234': [('INVALID_OPERAND', ['1x'])],
+    'loda 1x, 0x12345': [('INVALID_OPERAND', ['1x'])],
+    'loda 1x, 64': [('INVALID_OPERAND', ['1x'])],
+    "loda 1x, 'ab'": [('INVALID_OPERAND', ['1x'])],
+    'loda 1x, foo': [('INVALID_OPERAND', ['1x'])],
+    'loda 1x, 1x': [('INVALID_OPERAND', ['1x'])],
+    'loda a, a, a': [('TOO_MANY_OPERANDS', [3, 2])],
+    'loda a': [('INSUFFICIENT_OPERANDS', [1, 2])],
+    'stoa a, a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'stoa a, hl': [('UNSUPPORTED_OPERAND', ['a'])],
+    'stoa a, m': [('UNSUPPORTED_OPERAND', ['a'])],
+    'stoa a, 0x1234': [('UNSUPPORTED_OPERAND', ['a'])],
+    'stoa a, 0x12345': [('UNSUPPORTED_OPERAND', ['a'])],
+    'stoa a, 64': [('UNSUPPORTED_OPERAND', ['a'])],
+    "stoa a, 'ab'": [('UNSUPPORTED_OPERAND', ['a'])],
+    'stoa a, foo': [('UNSUPPORTED_OPERAND', ['a'])],
+    'stoa a, 1x': [('UNSUPPORTED_OPERAND', ['a'])],
+    'stoa hl, a': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'stoa hl, hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'stoa hl, m': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'stoa hl, 0x1234': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'stoa hl, 0x12345': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'stoa hl, 64': [('UNSUPPORTED_OPERAND', ['hl'])],
+    "stoa hl, 'ab'": [('UNSUPPORTED_OPERAND', ['hl'])],
+    'stoa hl, foo': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'stoa hl, 1x': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'stoa m, a': [('UNSUPPORTED_OPERAND', ['m'])],
+    'stoa m, hl': [('UNSUPPORTED_OPERAND', ['m'])],
+    'stoa m, m': [('UNSUPPORTED_OPERAND', ['m'])],
+    'stoa m, 0x1234': [('UNSUPPORTED_OPERAND', ['m'])],
+    'stoa m, 0x12345': [('UNSUPPORTED_OPERAND', ['m'])],
+    'stoa m, 64': [('UNSUPPORTED_OPERAND', ['m'])],
+    "stoa m, 'ab'": [('UNSUPPORTED_OPERAND', ['m'])],
+    'stoa m, foo': [('UNSUPPORTED_OPERAND', ['m'])],
+    'stoa m, 1x': [('UNSUPPORTED_OPERAND', ['m'])],
+    'stoa 0x1234, hl': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'stoa 0x1234, m': [('UNSUPPORTED_OPERAND', ['m'])],
+    'stoa 0x1234, 0x1234': [('INVALID_OPERAND', ['0x1234'])],
+    'stoa 0x1234, 0x12345': [('INVALID_OPERAND', ['0x12345'])],
+    'stoa 0x1234, 64': [('INVALID_OPERAND', ['64'])],
+    "stoa 0x1234, 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'stoa 0x1234, foo': [('INVALID_OPERAND', ['foo'])],
+    'stoa 0x1234, 1x': [('INVALID_OPERAND', ['1x'])],
+    'stoa 0x12345, a': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    'stoa 0x12345, hl': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    'stoa 0x12345, m': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    'stoa 0x12345, 0x1234': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    'stoa 0x12345, 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    'stoa 0x12345, 64': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "stoa 0x12345, 'ab'": [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    'stoa 0x12345, foo': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    'stoa 0x12345, 1x': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    'stoa 64, hl': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'stoa 64, m': [('UNSUPPORTED_OPERAND', ['m'])],
+    'stoa 64, 0x1234': [('INVALID_OPERAND', ['0x1234'])],
+    'stoa 64, 0x12345': [('INVALID_OPERAND', ['0x12345'])],
+    'stoa 64, 64': [('INVALID_OPERAND', ['64'])],
+    "stoa 64, 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'stoa 64, foo': [('INVALID_OPERAND', ['foo'])],
+    'stoa 64, 1x': [('INVALID_OPERAND', ['1x'])],
+    "stoa 'ab', a": [('INVALID_OPERAND', ["'ab'"])],
+    "stoa 'ab', hl": [('INVALID_OPERAND', ["'ab'"])],
+    "stoa 'ab', m": [('INVALID_OPERAND', ["'ab'"])],
+    "stoa 'ab', 0x1234": [('INVALID_OPERAND', ["'ab'"])],
+    "stoa 'ab', 0x12345": [('INVALID_OPERAND', ["'ab'"])],
+    "stoa 'ab', 64": [('INVALID_OPERAND', ["'ab'"])],
+    "stoa 'ab', 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    "stoa 'ab', foo": [('INVALID_OPERAND', ["'ab'"])],
+    "stoa 'ab', 1x": [('INVALID_OPERAND', ["'ab'"])],
+    'stoa foo, hl': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'stoa foo, m': [('UNSUPPORTED_OPERAND', ['m'])],
+    'stoa foo, 0x1234': [('INVALID_OPERAND', ['0x1234'])],
+    'stoa foo, 0x12345': [('INVALID_OPERAND', ['0x12345'])],
+    'stoa foo, 64': [('INVALID_OPERAND', ['64'])],
+    "stoa foo, 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'stoa foo, foo': [('INVALID_OPERAND', ['foo'])],
+    'stoa foo, 1x': [('INVALID_OPERAND', ['1x'])],
+    'stoa 1x, a': [('INVALID_OPERAND', ['1x'])],
+    'stoa 1x, hl': [('INVALID_OPERAND', ['1x'])],
+    'stoa 1x, m': [('INVALID_OPERAND', ['1x'])],
+    'stoa 1x, 0x1234': [('INVALID_OPERAND', ['1x'])],
+    'stoa 1x, 0x12345': [('INVALID_OPERAND', ['1x'])],
+    'stoa 1x, 64': [('INVALID_OPERAND', ['1x'])],
+    "stoa 1x, 'ab'": [('INVALID_OPERAND', ['1x'])],
+    'stoa 1x, foo': [('INVALID_OPERAND', ['1x'])],
+    'stoa 1x, 1x': [('INVALID_OPERAND', ['1x'])],
+    'stoa a, a, a': [('TOO_MANY_OPERANDS', [3, 2])],
+    'stoa a': [('INSUFFICIENT_OPERANDS', [1, 2])],
+    'push hl': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'push m': [('UNSUPPORTED_OPERAND', ['m'])],
+    'push 0x1234': [('INVALID_OPERAND', ['0x1234'])],
+    'push 0x12345': [('INVALID_OPERAND', ['0x12345'])],
+    'push 64': [('INVALID_OPERAND', ['64'])],
+    "push 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'push foo': [('INVALID_OPERAND', ['foo'])],
+    'push 1x': [('INVALID_OPERAND', ['1x'])],
+    'push a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'push': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'pop hl': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'pop m': [('UNSUPPORTED_OPERAND', ['m'])],
+    'pop 0x1234': [('INVALID_OPERAND', ['0x1234'])],
+    'pop 0x12345': [('INVALID_OPERAND', ['0x12345'])],
+    'pop 64': [('INVALID_OPERAND', ['64'])],
+    "pop 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'pop foo': [('INVALID_OPERAND', ['foo'])],
+    'pop 1x': [('INVALID_OPERAND', ['1x'])],
+    'pop a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'pop': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'add hl': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'add 0x1234': [('INCOMPATIBLE_DATA_SIZE', [16, 8])],
+    'add 0x12345': [('INCOMPATIBLE_DATA_SIZE', [24, 8])],
+    "add 'ab'": [('INCOMPATIBLE_DATA_TYPE', [])],
+    'add foo': [('INVALID_OPERAND', ['foo'])],
+    'add 1x': [('INVALID_OPERAND', ['1x'])],
+    'add a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'add': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'sub hl': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'sub 0x1234': [('INCOMPATIBLE_DATA_SIZE', [16, 8])],
+    'sub 0x12345': [('INCOMPATIBLE_DATA_SIZE', [24, 8])],
+    "sub 'ab'": [('INCOMPATIBLE_DATA_TYPE', [])],
+    'sub foo': [('INVALID_OPERAND', ['foo'])],
+    'sub 1x': [('INVALID_OPERAND', ['1x'])],
+    'sub a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'sub': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'cmp hl': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'cmp 0x1234': [('INCOMPATIBLE_DATA_SIZE', [16, 8])],
+    'cmp 0x12345': [('INCOMPATIBLE_DATA_SIZE', [24, 8])],
+    "cmp 'ab'": [('INCOMPATIBLE_DATA_TYPE', [])],
+    'cmp foo': [('INVALID_OPERAND', ['foo'])],
+    'cmp 1x': [('INVALID_OPERAND', ['1x'])],
+    'cmp a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'cmp': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'adc hl': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'adc 0x1234': [('INCOMPATIBLE_DATA_SIZE', [16, 8])],
+    'adc 0x12345': [('INCOMPATIBLE_DATA_SIZE', [24, 8])],
+    "adc 'ab'": [('INCOMPATIBLE_DATA_TYPE', [])],
+    'adc foo': [('INVALID_OPERAND', ['foo'])],
+    'adc 1x': [('INVALID_OPERAND', ['1x'])],
+    'adc a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'adc': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'sbb hl': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'sbb 0x1234': [('INCOMPATIBLE_DATA_SIZE', [16, 8])],
+    'sbb 0x12345': [('INCOMPATIBLE_DATA_SIZE', [24, 8])],
+    "sbb 'ab'": [('INCOMPATIBLE_DATA_TYPE', [])],
+    'sbb foo': [('INVALID_OPERAND', ['foo'])],
+    'sbb 1x': [('INVALID_OPERAND', ['1x'])],
+    'sbb a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'sbb': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'and hl': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'and 0x1234': [('INCOMPATIBLE_DATA_SIZE', [16, 8])],
+    'and 0x12345': [('INCOMPATIBLE_DATA_SIZE', [24, 8])],
+    "and 'ab'": [('INCOMPATIBLE_DATA_TYPE', [])],
+    'and foo': [('INVALID_OPERAND', ['foo'])],
+    'and 1x': [('INVALID_OPERAND', ['1x'])],
+    'and a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'and': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'or hl': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'or 0x1234': [('INCOMPATIBLE_DATA_SIZE', [16, 8])],
+    'or 0x12345': [('INCOMPATIBLE_DATA_SIZE', [24, 8])],
+    "or 'ab'": [('INCOMPATIBLE_DATA_TYPE', [])],
+    'or foo': [('INVALID_OPERAND', ['foo'])],
+    'or 1x': [('INVALID_OPERAND', ['1x'])],
+    'or a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'or': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'xor hl': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'xor 0x1234': [('INCOMPATIBLE_DATA_SIZE', [16, 8])],
+    'xor 0x12345': [('INCOMPATIBLE_DATA_SIZE', [24, 8])],
+    "xor 'ab'": [('INCOMPATIBLE_DATA_TYPE', [])],
+    'xor foo': [('INVALID_OPERAND', ['foo'])],
+    'xor 1x': [('INVALID_OPERAND', ['1x'])],
+    'xor a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'xor': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'jmp a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'jmp hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'jmp 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "jmp 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'jmp 1x': [('INVALID_OPERAND', ['1x'])],
+    'jmp a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'jmp': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'jc a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'jc hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'jc 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "jc 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'jc 1x': [('INVALID_OPERAND', ['1x'])],
+    'jc a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'jc': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'jnc a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'jnc hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'jnc 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "jnc 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'jnc 1x': [('INVALID_OPERAND', ['1x'])],
+    'jnc a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'jnc': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'jz a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'jz hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'jz 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "jz 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'jz 1x': [('INVALID_OPERAND', ['1x'])],
+    'jz a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'jz': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'jnz a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'jnz hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'jnz 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "jnz 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'jnz 1x': [('INVALID_OPERAND', ['1x'])],
+    'jnz a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'jnz': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'ja a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'ja hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'ja 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "ja 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'ja 1x': [('INVALID_OPERAND', ['1x'])],
+    'ja a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'ja': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'jna a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'jna hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'jna 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "jna 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'jna 1x': [('INVALID_OPERAND', ['1x'])],
+    'jna a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'jna': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'jb a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'jb hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'jb 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "jb 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'jb 1x': [('INVALID_OPERAND', ['1x'])],
+    'jb a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'jb': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'jnb a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'jnb hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'jnb 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "jnb 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'jnb 1x': [('INVALID_OPERAND', ['1x'])],
+    'jnb a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'jnb': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'je a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'je hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'je 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "je 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'je 1x': [('INVALID_OPERAND', ['1x'])],
+    'je a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'je': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'jne a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'jne hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'jne 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "jne 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'jne 1x': [('INVALID_OPERAND', ['1x'])],
+    'jne a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'jne': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'jae a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'jae hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'jae 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "jae 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'jae 1x': [('INVALID_OPERAND', ['1x'])],
+    'jae a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'jae': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'jnae a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'jnae hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'jnae 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "jnae 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'jnae 1x': [('INVALID_OPERAND', ['1x'])],
+    'jnae a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'jnae': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'jbe a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'jbe hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'jbe 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "jbe 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'jbe 1x': [('INVALID_OPERAND', ['1x'])],
+    'jbe a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'jbe': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'jnbe a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'jnbe hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'jnbe 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "jnbe 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'jnbe 1x': [('INVALID_OPERAND', ['1x'])],
+    'jnbe a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'jnbe': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'call a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'call hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'call 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "call 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'call 1x': [('INVALID_OPERAND', ['1x'])],
+    'call a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'call': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'cc a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'cc hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'cc 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "cc 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'cc 1x': [('INVALID_OPERAND', ['1x'])],
+    'cc a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'cc': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'cnc a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'cnc hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'cnc 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "cnc 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'cnc 1x': [('INVALID_OPERAND', ['1x'])],
+    'cnc a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'cnc': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'cz a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'cz hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'cz 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "cz 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'cz 1x': [('INVALID_OPERAND', ['1x'])],
+    'cz a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'cz': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'cnz a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'cnz hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'cnz 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "cnz 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'cnz 1x': [('INVALID_OPERAND', ['1x'])],
+    'cnz a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'cnz': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'ca a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'ca hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'ca 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "ca 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'ca 1x': [('INVALID_OPERAND', ['1x'])],
+    'ca a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'ca': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'cna a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'cna hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'cna 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "cna 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'cna 1x': [('INVALID_OPERAND', ['1x'])],
+    'cna a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'cna': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'cb a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'cb hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'cb 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "cb 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'cb 1x': [('INVALID_OPERAND', ['1x'])],
+    'cb a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'cb': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'cnb a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'cnb hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'cnb 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "cnb 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'cnb 1x': [('INVALID_OPERAND', ['1x'])],
+    'cnb a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'cnb': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'ce a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'ce hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'ce 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "ce 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'ce 1x': [('INVALID_OPERAND', ['1x'])],
+    'ce a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'ce': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'cne a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'cne hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'cne 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "cne 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'cne 1x': [('INVALID_OPERAND', ['1x'])],
+    'cne a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'cne': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'cae a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'cae hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'cae 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "cae 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'cae 1x': [('INVALID_OPERAND', ['1x'])],
+    'cae a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'cae': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'cnae a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'cnae hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'cnae 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "cnae 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'cnae 1x': [('INVALID_OPERAND', ['1x'])],
+    'cnae a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'cnae': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'cbe a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'cbe hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'cbe 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "cbe 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'cbe 1x': [('INVALID_OPERAND', ['1x'])],
+    'cbe a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'cbe': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'cnbe a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'cnbe hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'cnbe 0x12345': [('INCOMPATIBLE_ADDR_SIZE', [24, 16])],
+    "cnbe 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'cnbe 1x': [('INVALID_OPERAND', ['1x'])],
+    'cnbe a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'cnbe': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'ret a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'rc a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'rnc a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'rz a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'rnz a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'ra a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'rna a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'rb a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'rnb a': [('TOO_MANY_OPERANDS', [1, 0])],
+    're a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'rne a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'rae a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'rnae a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'rbe a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'rnbe a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'iret a': [('TOO_MANY_OPERANDS', [1, 0])],
+    'int a': [('UNSUPPORTED_OPERAND', ['a'])],
+    'int hl': [('UNSUPPORTED_OPERAND', ['hl'])],
+    'int m': [('UNSUPPORTED_OPERAND', ['m'])],
+    'int 0x1234': [('INCOMPATIBLE_DATA_SIZE', [16, 8])],
+    'int 0x12345': [('INCOMPATIBLE_DATA_SIZE', [24, 8])],
+    'int 64': [('INVALID_INT', [64])],
+    "int 'ab'": [('UNSUPPORTED_OPERAND', ["'ab'"])],
+    'int foo': [('INVALID_OPERAND', ['foo'])],
+    'int 1x': [('INVALID_OPERAND', ['1x'])],
+    'int a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'int': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'inc hl': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'inc 0x1234': [('INVALID_OPERAND', ['0x1234'])],
+    'inc 0x12345': [('INVALID_OPERAND', ['0x12345'])],
+    'inc 64': [('INVALID_OPERAND', ['64'])],
+    "inc 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'inc foo': [('INVALID_OPERAND', ['foo'])],
+    'inc 1x': [('INVALID_OPERAND', ['1x'])],
+    'inc a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'inc': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'dec hl': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'dec 0x1234': [('INVALID_OPERAND', ['0x1234'])],
+    'dec 0x12345': [('INVALID_OPERAND', ['0x12345'])],
+    'dec 64': [('INVALID_OPERAND', ['64'])],
+    "dec 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'dec foo': [('INVALID_OPERAND', ['foo'])],
+    'dec 1x': [('INVALID_OPERAND', ['1x'])],
+    'dec a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'dec': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'not hl': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'not 0x1234': [('INVALID_OPERAND', ['0x1234'])],
+    'not 0x12345': [('INVALID_OPERAND', ['0x12345'])],
+    'not 64': [('INVALID_OPERAND', ['64'])],
+    "not 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'not foo': [('INVALID_OPERAND', ['foo'])],
+    'not 1x': [('INVALID_OPERAND', ['1x'])],
+    'not a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'not': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'shl hl': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'shl 0x1234': [('INVALID_OPERAND', ['0x1234'])],
+    'shl 0x12345': [('INVALID_OPERAND', ['0x12345'])],
+    'shl 64': [('INVALID_OPERAND', ['64'])],
+    "shl 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'shl foo': [('INVALID_OPERAND', ['foo'])],
+    'shl 1x': [('INVALID_OPERAND', ['1x'])],
+    'shl a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'shl': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'shr hl': [('INCOMPATIBLE_REGISTER_SIZE', [16, 8])],
+    'shr 0x1234': [('INVALID_OPERAND', ['0x1234'])],
+    'shr 0x12345': [('INVALID_OPERAND', ['0x12345'])],
+    'shr 64': [('INVALID_OPERAND', ['64'])],
+    "shr 'ab'": [('INVALID_OPERAND', ["'ab'"])],
+    'shr foo': [('INVALID_OPERAND', ['foo'])],
+    'shr 1x': [('INVALID_OPERAND', ['1x'])],
+    'shr a, a': [('TOO_MANY_OPERANDS', [2, 1])],
+    'shr': [('INSUFFICIENT_OPERANDS', [0, 1])],
+    'db': [('NO_DATA', [])],
+    'dw': [('NO_DATA', [])],
+    'db 256': [('INCOMPATIBLE_DATA_SIZE', [16, 8])],
+    "db 'ab'(0)": [('INVALID_MULTIPLIER', ['0'])],
+    'dw 0x12345': [('INCOMPATIBLE_DATA_SIZE', [24, 16])],
+    'db 1x': [('INVALID_OPERAND', ['1x'])],
+    'xyz a': [('INVALID_MNEMONIC', ['xyz'])],
+    'db 0x12 ( 65536 )': [('UNSUPPORTED_MULTIPLIER_SIZE', [24, 16])],
+    "db 'a' ( 'b' )": [('UNSUPPORTED_MULTIPLIER', ["'b'"])],
+}
+
+
+@pytest.mark.parametrize('line_str', expected_encodings.keys())
+def test_encoding(line_str):
+    assert assemble_line_str(line_str) == expected_encodings[line_str]
+
+
+@pytest.mark.parametrize('line_str', expected_errors.keys())
+def test_error(line_str):
+    assert assemble_line_str(line_str) == expected_errors[line_str]
+
+
+def assemble_optimized(tmp_path, source):
+    # returns the machine code (hex) of each symbol of a source assembled with the peephole optimizer
+    asm_file_name = tmp_path / 'test.asm'
+    asm_file_name.write_text(source)
+
+    assembler = asm.Assembler(optimize=True)
+    obj_file_buffer, errors, optimizations = assembler.assemble(str(asm_file_name))
+    assert not errors
+
+    return {symbol_name: symbol.machine_code.hex() for symbol_name, symbol in assembler.symbols.items()}
+
+
+def test_optimize_jmp_to_next_label(tmp_path):
+    assert assemble_optimized(tmp_path, """
+.proc foo
+    jmp @next
+@next:
+    ret
+.endproc
+""") == {'foo': '', 'foo_next': '05'}
+
+
+def test_optimize_jmp_to_main(tmp_path):
+    # the linker puts the 'main' symbol first, so the label before it is not followed by it after linking
+    assert assemble_optimized(tmp_path, """
+.proc foo
+    jmp main
+main:
+    ret
+.endproc
+""") == {'foo': '770000', 'main': '05'}
+
+
+def test_optimize_jmp_from_main(tmp_path):
+    # likewise, the 'main' symbol is not followed by the label after it
+    assert assemble_optimized(tmp_path, """
+.proc foo
+    hlt
+main:
+    jmp @next
+@next:
+    ret
+.endproc
+""") == {'foo': 'ff', 'main': '770000', 'foo_next': '05'}
+
+
+def test_optimize_cmp_zero(tmp_path):
+    assert assemble_optimized(tmp_path, """
+.proc main
+    add b
+    cmp 0
+    jz main
+.endproc
+""") == {'main': '629f0000'}
+
+
+def test_optimize_data_like_cmp_zero(tmp_path):
+    # data is never touched, even if its bytes are those of cmp 0
+    assert assemble_optimized(tmp_path, """
+.proc main
+    add b
+    db 0x7e, 0
+    jz main
+.endproc
+""") == {'main': '627e009f0000'}
+
+
+def test_optimize_report(tmp_path):
+    # the optimizer reports the number of instructions and bytes it removed per procedure instead of printing them
+    asm_file_name = tmp_path / 'test.asm'
+    asm_file_name.write_text("""
+.proc foo
+    jmp @next
+@next:
+    ret
+.endproc
+""")
+
+    assembler = asm.Assembler(optimize=True)
+    obj_file_buffer, errors, optimizations = assembler.assemble(str(asm_file_name))
+    assert not errors
+    assert optimizations == {'foo': [1, 3]}
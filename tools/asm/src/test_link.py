@@ -0,0 +1,68 @@
+# tests of the linker and the librarian, run as commands on object files assembled from small sources
+#
+# run: python3 -m pytest (in this directory)
+
+import os
+import subprocess
+import sys
+
+src_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def run(tool, *args, cwd):
+    # returns the exit code and the output of the assembler, the linker or the librarian
+    process = subprocess.run([sys.executable, os.path.join(src_dir, tool + '.py'), *args], cwd=cwd,
+                             stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    return process.returncode, process.stdout
+
+
+def assemble(tmp_path, **sources):
+    # assembles the sources given as keyword arguments (the name of the object file without .obj)
+    for name, source in sources.items():
+        (tmp_path / f'{name}.asm').write_text(source)
+    assert run('asm', *[f'{name}.asm' for name in sources.keys()], cwd=tmp_path) == (0, '')
+
+
+def test_ambiguous_symbols(tmp_path):
+    # the error is shown for each object file defining the symbol
+    assemble(tmp_path, a='.proc z\n    ret\n.endproc\n', b='.proc x\n    ret\n.endproc\n.proc y\n    ret\n.endproc\n',
+             c='.proc x\n    ret\n.endproc\n', d='.proc x\n    ret\n.endproc\n.proc y\n    ret\n.endproc\n')
+    assert run('link', 'a.obj', 'b.obj', 'c.obj', 'd.obj', cwd=tmp_path) == (1, (
+        "b.obj: error: ambiguous symbol 'x'\n\n"
+        "b.obj: error: ambiguous symbol 'y'\n\n"
+        "c.obj: error: ambiguous symbol 'x'\n\n"
+        "d.obj: error: ambiguous symbol 'x'\n\n"
+        "d.obj: error: ambiguous symbol 'y'\n\n"))
+
+
+def test_ambiguous_symbols_main(tmp_path):
+    # the object file that contains the 'main' symbol is linked first, and so its errors are shown first
+    assemble(tmp_path, b='.proc x\n    ret\n.endproc\n',
+             m='.proc main\n    ret\n.endproc\n.proc x\n    ret\n.endproc\n')
+    assert run('link', 'b.obj', 'm.obj', cwd=tmp_path) == (1, (
+        "m.obj: error: ambiguous symbol 'x'\n\n"
+        "b.obj: error: ambiguous symbol 'x'\n\n"))
+
+
+def test_duplicate_main(tmp_path):
+    assemble(tmp_path, m='.proc main\n    ret\n.endproc\n', n='.proc main\n    ret\n.endproc\n')
+    assert run('link', 'm.obj', 'n.obj', cwd=tmp_path) == (1, "error: duplicate symbol 'main'\n\n")
+
+
+def test_gc_keep_lib_symbol(tmp_path):
+    # a symbol kept with --keep is looked up in the lib files as well, adding the member defining it
+    assemble(tmp_path, main='.proc main\n    ret\n.endproc\n',
+             k='.proc kept\n    hlt\n.endproc\n.proc other\n    nop\n.endproc\n')
+    assert run('lib', 'k.lib', 'k.obj', cwd=tmp_path) == (0, '')
+    assert run('link', '--gc', '--keep', 'kept', '-d', 'main.obj', 'k.lib', cwd=tmp_path) == (0, (
+        "removed 'other' (k.lib(k.obj)): 1 byte(s)\n"
+        "removed 1 unreachable symbol(s), 1 byte(s)\n"
+        "0000    05 FF                      ..\n"))
+
+
+def test_lib_ambiguous_symbol(tmp_path):
+    # a member with an ambiguous symbol adds none of its symbols, so that a later member may define them
+    assemble(tmp_path, a='.proc x\n    ret\n.endproc\n', b='.proc y\n    ret\n.endproc\n.proc x\n    ret\n.endproc\n',
+             c='.proc y\n    ret\n.endproc\n')
+    assert run('lib', 'k.lib', 'a.obj', 'b.obj', 'c.obj', cwd=tmp_path) == (1, (
+        "b.obj: error: ambiguous symbol 'x'\n\n"))
@@ -1,4 +1,4 @@
-# usage: rom [csv file] [address config] [data config] [output file] ([extract bits])
+# usage: rom [csv file] [address config] [data config] [output file] ([extract bits]) ([--mmap])
 #     csv file: columns separated by semicolon, no headers, no quotes, no escapes
 #
 #     address config: how to build the rom address from the csv file
@@ -22,6 +22,8 @@
 #         this can either be a single bit, like 1, or a bit range like 0-7. this is useful when separating wide data
 #         across multiple eeproms; by default, all bits will be extracted.
 #
+#     --mmap (optional): memory-map the csv file and the flags file instead of reading them
+#
 # flags file format:
 # one flag per line; each line is either just a flag name, or can also contain a bit mask, separated by semicolon. each
 # flag will set the next bit left to the current bit width. a bit mask represents the full value and will extend the
@@ -38,9 +40,11 @@
 import bin_file
 import binutils
 import data
+import fileutils
 import i18n
 import raw_file
 
+import contextlib
 import math
 import os
 import re
@@ -64,6 +68,8 @@ valid_bits_regex = re.compile('0b[0-1x][0-1x_]*', re.IGNORECASE)
 extract_bits_from = None
 extract_bits_to = None
 
+use_mmap = False
+
 rom = {}
 
 
@@ -190,12 +196,12 @@ def read_flags_file(file_name, errors=None):
         flags = {}
         flags_bits = 0
 
-        with open(file_name, 'r') as file:
+        with contextlib.closing(fileutils.read_lines(file_name, use_mmap)) as file:
             current_file_name = file_name
             line_num = 0
             current_line_num = line_num
 
-            for line_str in file.readlines():
+            for line_str in file:
                 current_line_str = line_str
                 line_num += 1
                 current_line_num = line_num
@@ -208,8 +214,9 @@ def read_flags_file(file_name, errors=None):
                     if is_valid_name(flag_name):
                         if len(i) > 1:
                             flag_value = i[1].strip()
-                            if data.is_valid(flag_value) and not data.is_valid_str(flag_value):
-                                flag_value = data.get_value(flag_value)
+                            literal = data.get_literal(flag_value)
+                            if literal['kind'] not in [None, 'str']:
+                                flag_value = literal['value']
                             else:
                                 if errors is not None:
                                     errors.append({
@@ -325,8 +332,9 @@ def parse_csv_line(line_str, errors=None):
     for column, bits in addr_config.items():
         if column <= len(columns):
             column_value = columns[column - 1].strip()
-            if data.is_valid(column_value) and not data.is_valid_str(column_value):
-                column_value = format(data.get_value(column_value), 'b')
+            literal = data.get_literal(column_value)
+            if literal['kind'] not in [None, 'str']:
+                column_value = format(literal['value'], 'b')
                 if bits is not None:
                     column_value = column_value.zfill(bits)
             elif is_valid_bits(column_value):
@@ -359,8 +367,9 @@ def parse_csv_line(line_str, errors=None):
 
     if data_config_column <= len(columns):
         column_value = columns[data_config_column - 1].strip()
-        if data.is_valid(column_value) and not data.is_valid_str(column_value):
-            column_value = format(data.get_value(column_value), 'b')
+        literal = data.get_literal(column_value)
+        if literal['kind'] not in [None, 'str']:
+            column_value = format(literal['value'], 'b')
             if data_config_bits is not None:
                 column_value = column_value.zfill(data_config_bits)
         elif data_config_flags:
@@ -428,12 +437,12 @@ def read_csv_file(file_name):
     global current_file_name, current_line_num, current_line_str
 
     if os.path.isfile(file_name):
-        with open(file_name, 'r') as csv:
+        with contextlib.closing(fileutils.read_lines(file_name, use_mmap)) as csv:
             current_file_name = file_name
             line_num = 0
             current_line_num = line_num
 
-            for line_str in csv.readlines():
+            for line_str in csv:
                 current_line_str = line_str
                 line_num += 1
                 current_line_num = line_num
@@ -470,7 +479,11 @@ def read_csv_file(file_name):
 
 def main():
     global addr_config, addr_config_bits, data_config_column, data_config_bits, data_config_flags, extract_bits_from, \
-        extract_bits_to
+        extract_bits_to, use_mmap
+
+    if '--mmap' in sys.argv:
+        use_mmap = True
+        sys.argv.remove('--mmap')
 
     if len(sys.argv) > 1 and sys.argv[1] in ['-h', '--help']:
         pass  # TODO: help